@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for icon-manager.py
+
+Generates synthetic libraries (icon-catalog.json, raw/ PNGs and the
+catalog/<category>/ symlinks) at several sizes and times the hot paths
+two ways:
+
+- in isolation: a worker process per size imports icon-manager.py with
+  ICONICS_DIR pointing at the synthetic library and times each
+  IconManager operation on its own;
+- end to end: the icon wrapper is run as a user would run it (daemon
+  disabled), including interpreter start-up.
+
+Results are written as JSON, so runs can be compared over time.
+
+Usage:
+    python3 benchmark.py                                # 1k, 10k and 100k icons
+    python3 benchmark.py --sizes 1000 10000 --repeat 5 -o bench.json
+    python3 benchmark.py --workdir /tmp/iconics-bench   # keep and reuse the libraries
+    python3 benchmark.py --compare before.json after.json
+"""
+
+import argparse
+import contextlib
+import csv
+import importlib.util
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pngtools
+
+REPO_DIR = Path(__file__).resolve().parent
+MANAGER = REPO_DIR / "icon-manager.py"
+WRAPPER = REPO_DIR / "icon"
+DEFAULT_SIZES = (1000, 10000, 100000)
+RESULTS_VERSION = 1
+CATEGORIES = ["files", "network", "security", "tools", "ui", "emoji", "development"]
+SYLLABLES = ["ba", "ko", "mi", "ne", "ru", "ta", "vo", "zi", "la", "pe", "so", "du", "fi", "ga", "hu", "ja"]
+COMMON_WORDS = ["lock", "arrow", "folder", "network", "user", "settings", "cloud", "file",
+                "key", "search", "home", "mail", "star", "chart", "bug", "code"]
+
+# Queries cover the search paths: exact tag, multi-word, prefix and typo
+SEARCH_QUERIES = {"tag": "lock", "multiword": "arrow folder", "prefix": "netw", "typo": "setings"}
+
+
+def vocabulary() -> list:
+    """Common words first (most frequent), then 4,096 synthetic ones"""
+    words = list(COMMON_WORDS)
+    words += [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+    return words
+
+
+def generate_library(root: Path, count: int, seed: int = 0):
+    """Write a synthetic library of count icons under root
+
+    Tags follow a Zipf-like distribution over the vocabulary, so search
+    postings are as skewed as in a real catalog. import.csv holds
+    count // 10 further rows (with raw/ files) for the bulk import run.
+    """
+    rng = random.Random(seed)
+    words = vocabulary()
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    raw_dir = root / "raw"
+    raw_dir.mkdir(parents=True)
+    for category in CATEGORIES:
+        (root / "catalog" / category).mkdir(parents=True)
+
+    templates = [pngtools.encode(16, 16, bytes([(i * 37) % 256, (i * 91) % 256, (i * 53) % 256, 255]) * 256)
+                 for i in range(64)]
+
+    def entry(icon_id: str, n: int) -> dict:
+        tags = list(dict.fromkeys(rng.choices(words, weights, k=rng.randint(1, 5))))
+        semantic = f"{'-'.join(tags[:2])}-{n}"
+        return {"id": icon_id, "filename": f"raw/{icon_id}.png", "semanticName": semantic,
+                "tags": tags, "category": rng.choice(CATEGORIES),
+                "description": f"{' '.join(tags).capitalize()} icon", "usedIn": []}
+
+    icons = []
+    for n in range(count):
+        icon = entry(f"icon-{n:06d}", n)
+        icons.append(icon)
+        (raw_dir / f"{icon['id']}.png").write_bytes(templates[n % len(templates)])
+        (root / "catalog" / icon["category"] / f"{icon['semanticName']}.png").symlink_to(
+            f"../../{icon['filename']}")
+    with open(root / "icon-catalog.json", 'w') as f:
+        json.dump({"version": "1.0", "icons": icons, "categories": CATEGORIES}, f, indent=2)
+
+    with open(root / "import.csv", 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "semantic", "tags", "category", "description"])
+        for n in range(count, count + max(count // 10, 1)):
+            icon = entry(f"new-{n:06d}", n)
+            (raw_dir / f"{icon['id']}.png").write_bytes(templates[n % len(templates)])
+            writer.writerow([icon["id"], icon["semanticName"], ",".join(icon["tags"]),
+                             icon["category"], icon["description"]])
+
+    # The wrapper runs $ICONICS_DIR/icon-launcher.py; Python resolves the
+    # links, so the repository's own modules are imported
+    (root / "icon-manager.py").symlink_to(MANAGER)
+    (root / "icon-launcher.py").symlink_to(REPO_DIR / "icon-launcher.py")
+    shutil.copy(root / "icon-catalog.json", root / "icon-catalog.json.orig")
+
+
+def reset_library(root: Path):
+    """Restore the generated catalog and drop state left by earlier runs"""
+    shutil.copy(root / "icon-catalog.json.orig", root / "icon-catalog.json")
+    for path in root.glob(".icon-*"):
+        path.unlink()
+
+
+def summarize(runs: list) -> dict:
+    return {"min": min(runs), "median": statistics.median(runs), "runs": runs}
+
+
+def measure(fn, repeat: int, setup=None) -> dict:
+    """Time fn() repeat times (after setup(), untimed), output discarded"""
+    runs = []
+    for _ in range(repeat):
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            fn()
+            runs.append(time.perf_counter() - start)
+    return summarize(runs)
+
+
+def run_isolated(root: Path, repeat: int) -> dict:
+    """Time IconManager operations against the library at root
+
+    Runs in its own process: ICON_DIR and friends are read from
+    ICONICS_DIR when icon-manager.py is imported.
+    """
+    os.environ["ICONICS_DIR"] = str(root)
+    spec = importlib.util.spec_from_file_location("icon_manager", MANAGER)
+    im = importlib.util.module_from_spec(spec)
+    sys.modules["icon_manager"] = im  # like a regular import: tracebacks, inspect, pickle
+    spec.loader.exec_module(im)
+
+    rng = random.Random(1)
+    results = {}
+    state = {}
+
+    def loaded_manager(store=None):
+        manager = im.IconManager(store)
+        manager._load()  # the catalog is otherwise loaded on first access
+        return manager
+
+    def drop_sidecar():
+        im.CATALOG_CACHE_FILE.unlink(missing_ok=True)
+
+    def restore():
+        shutil.copy(root / "icon-catalog.json.orig", im.CATALOG_FILE)
+        drop_sidecar()
+        state["manager"] = loaded_manager()
+
+    results["load_catalog.cold"] = measure(loaded_manager, repeat, drop_sidecar)
+    results["load_catalog.warm"] = measure(loaded_manager, repeat)
+
+    manager = loaded_manager()
+    ids = [icon["id"] for icon in manager.catalog["icons"]]
+    names = [icon["semanticName"] for icon in manager.catalog["icons"]]
+
+    def fresh_manager():
+        state["manager"] = loaded_manager()
+
+    for kind, query in SEARCH_QUERIES.items():
+        results[f"search.{kind}.first"] = measure(lambda: state["manager"].search(query), repeat,
+                                                  fresh_manager)
+        results[f"search.{kind}.warm"] = measure(lambda: manager.search(query), repeat)
+
+    lookups = [rng.choice(ids) for _ in range(10000)]
+
+    def find_all():
+        for icon_id in lookups:
+            manager.find_icon_by_id(icon_id)
+
+    per_call = measure(find_all, repeat)
+    results["find_icon_by_id"] = summarize([t / len(lookups) for t in per_call["runs"]])
+
+    def drop_stats():
+        im.STATS_FILE.unlink(missing_ok=True)
+        state["manager"] = im.IconManager()
+
+    results["stats.cold"] = measure(lambda: state["manager"].stats(), repeat, drop_stats)
+    results["stats"] = measure(manager.stats, repeat)
+    results["validate"] = measure(manager.validate, repeat)
+    results["validate.incremental"] = measure(lambda: manager.validate(incremental=True), repeat)
+
+    project = Path(tempfile.mkdtemp(prefix="iconics-bench-project-"))
+    export_names = rng.sample(names, min(10, len(names)))
+
+    def clear_project():
+        shutil.rmtree(project / ".github", ignore_errors=True)
+
+    results["export_to_project"] = measure(lambda: manager.export_to_project(str(project), export_names),
+                                           repeat, clear_project)
+    shutil.rmtree(project, ignore_errors=True)
+
+    counter = iter(range(repeat))
+
+    def add_one():
+        n = next(counter)
+        manager.add_icon(f"new-{len(ids) + n:06d}", f"bench-added-{n}", ["bench"], "ui")
+
+    results["add_icon"] = measure(add_one, repeat)
+    results["bulk_import"] = measure(lambda: state["manager"].bulk_import(str(root / "import.csv")),
+                                     repeat, restore)
+    restore()
+
+    # The same library in the sharded store: category reads and single-icon saves
+    im.ShardedCatalogStore(im.SHARD_DIR).replace_catalog(state["manager"].catalog)
+
+    def fresh_sharded():
+        state["manager"] = im.IconManager("sharded")
+
+    def list_tools():
+        state["manager"].load_categories(["tools"])
+        state["manager"].list_category("tools")
+
+    results["sharded.list_category"] = measure(list_tools, repeat, fresh_sharded)
+    sharded = loaded_manager("sharded")
+    added = iter(range(repeat))
+
+    def add_one_sharded():
+        n = next(added)
+        sharded.add_icon(f"shard-{len(ids) + n:06d}", f"bench-sharded-{n}", ["bench"], "tools")
+
+    results["sharded.add_icon"] = measure(add_one_sharded, repeat)
+    shutil.rmtree(im.SHARD_DIR)
+    im.SHARD_CACHE_FILE.unlink(missing_ok=True)
+
+    # The same library in the sqlite store: search, info and add straight from
+    # the database in a fresh manager, against a full load of the catalog
+    im.SQLiteCatalogStore(im.CATALOG_DB_FILE).replace_catalog(state["manager"].catalog)
+
+    def fresh_sqlite():
+        state["manager"] = im.IconManager("sqlite")
+
+    results["sqlite.load_catalog"] = measure(lambda: loaded_manager("sqlite"), repeat)
+    for kind, query in SEARCH_QUERIES.items():
+        results[f"sqlite.search.{kind}"] = measure(lambda: state["manager"].search(query), repeat,
+                                                   fresh_sqlite)
+    info_name = rng.choice(names)
+    results["sqlite.info"] = measure(lambda: state["manager"].info(info_name), repeat, fresh_sqlite)
+    added_rows = iter(range(repeat))
+
+    def add_one_sqlite():
+        n = next(added_rows)
+        state["manager"].add_icon(f"sql-{len(ids) + n:06d}", f"bench-sqlite-{n}", ["bench"], "ui")
+
+    results["sqlite.add_icon"] = measure(add_one_sqlite, repeat, fresh_sqlite)
+    im.CATALOG_DB_FILE.unlink()
+    return results
+
+
+def run_wrapper(root: Path, repeat: int) -> dict:
+    """Time icon wrapper commands end to end against the library at root"""
+    with open(root / "icon-catalog.json.orig") as f:
+        icons = json.load(f)["icons"]
+    env = dict(os.environ, ICONICS_DIR=str(root), ICONICS_SOCKET=str(root / "no-daemon.sock"))
+    project = Path(tempfile.mkdtemp(prefix="iconics-bench-project-"))
+    commands = {
+        "search": ["search", SEARCH_QUERIES["tag"]],
+        "info": ["info", icons[0]["semanticName"]],
+        "list": ["list", "tools"],
+        "stats": ["stats"],
+        "validate": ["validate"],
+        "use": ["use", icons[0]["semanticName"], icons[-1]["semanticName"]],
+    }
+    results = {}
+    try:
+        for name, args in commands.items():
+            runs = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                subprocess.run(["bash", str(WRAPPER), *args], cwd=project, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                runs.append(time.perf_counter() - start)
+            results[name] = summarize(runs)
+    finally:
+        shutil.rmtree(project, ignore_errors=True)
+        reset_library(root)
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_benchmarks(sizes: list, repeat: int, workdir: Path, wrapper: bool) -> dict:
+    report = {
+        "version": RESULTS_VERSION,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "repeat": repeat,
+        "sizes": {},
+    }
+    for size in sizes:
+        root = workdir / f"library-{size}"
+        entry = report["sizes"][str(size)] = {}
+        if not (root / "icon-catalog.json.orig").exists():
+            shutil.rmtree(root, ignore_errors=True)
+            print(f"Generating {size:,} icons in {root}...", flush=True)
+            start = time.perf_counter()
+            generate_library(root, size)
+            entry["generate"] = time.perf_counter() - start
+        else:
+            reset_library(root)
+
+        print(f"Timing {size:,} icons in isolation...", flush=True)
+        worker = subprocess.run([sys.executable, __file__, "--worker", str(root), "--repeat", str(repeat)],
+                                capture_output=True, text=True)
+        if worker.returncode != 0:
+            sys.stderr.write(worker.stderr)
+            raise SystemExit(f"✗ Benchmark worker failed for {size:,} icons")
+        entry["isolated"] = json.loads(worker.stdout.splitlines()[-1])
+
+        if wrapper:
+            print(f"Timing {size:,} icons through the icon wrapper...", flush=True)
+            entry["wrapper"] = run_wrapper(root, repeat)
+    return report
+
+
+def print_report(report: dict):
+    for size, entry in report["sizes"].items():
+        print(f"\n=== {int(size):,} icons ===")
+        for group in ("isolated", "wrapper"):
+            for name, timing in entry.get(group, {}).items():
+                print(f"  {group[:4]}  {name:28} {format_seconds(timing['median']):>10}  "
+                      f"(min {format_seconds(timing['min'])})")
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds:.2f} s"
+
+
+def compare(before_file: str, after_file: str, threshold: float = 0.10) -> bool:
+    """Print median changes between two result files
+
+    Returns False if any timing got slower by more than threshold.
+    """
+    with open(before_file) as f:
+        before = json.load(f)
+    with open(after_file) as f:
+        after = json.load(f)
+
+    regressed = False
+    for size, entry in after["sizes"].items():
+        old_entry = before["sizes"].get(size)
+        if old_entry is None:
+            continue
+        print(f"\n=== {int(size):,} icons ===")
+        for group in ("isolated", "wrapper"):
+            for name, timing in entry.get(group, {}).items():
+                old = old_entry.get(group, {}).get(name)
+                if old is None:
+                    continue
+                ratio = timing["median"] / old["median"] if old["median"] else 1.0
+                marker = "  "
+                if ratio > 1 + threshold:
+                    marker, regressed = "✗ ", True
+                elif ratio < 1 - threshold:
+                    marker = "✓ "
+                print(f"  {marker}{group[:4]}  {name:28} {format_seconds(old['median']):>10} → "
+                      f"{format_seconds(timing['median']):>10}  ({ratio:.2f}x)")
+    return not regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark icon-manager.py on synthetic libraries")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Library sizes to generate (default: 1000 10000 100000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (default: 3)")
+    parser.add_argument("-o", "--output", default="bench-results.json",
+                        help="JSON results file (default: bench-results.json)")
+    parser.add_argument("--workdir", help="Keep generated libraries here and reuse them (default: temp dir)")
+    parser.add_argument("--no-wrapper", action="store_true", help="Skip the end-to-end icon wrapper runs")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="Compare two result files; exits 1 if anything is >10%% slower")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_isolated(Path(args.worker), args.repeat)))
+        return
+    if args.compare:
+        sys.exit(0 if compare(*args.compare) else 1)
+
+    if args.workdir:
+        workdir = Path(args.workdir)
+        workdir.mkdir(parents=True, exist_ok=True)
+        report = run_benchmarks(args.sizes, args.repeat, workdir, not args.no_wrapper)
+    else:
+        with tempfile.TemporaryDirectory(prefix="iconics-bench-") as tmp:
+            report = run_benchmarks(args.sizes, args.repeat, Path(tmp), not args.no_wrapper)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
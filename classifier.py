@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Keyword-based category classification for Iconics
+
+One shared keyword table for generate-csv, the classify command and the
+improve_* scripts. All keywords are compiled into a single trie-shaped
+regex, so a whole batch of names is classified in one scan instead of
+testing every keyword against every word.
+"""
+
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_CATEGORY = "ui"
+
+# Category -> keywords matched anywhere in a name (after separators are
+# normalized to "-"). Where keywords overlap, the longest one at a position
+# wins ("powerbook" is tools, not files via "book"); on equal scores the
+# category listed first wins.
+CATEGORY_KEYWORDS = {
+    "files": ["file", "document", "folder", "pdf", "doc", "text", "page", "book", "paper",
+              "picture", "image", "save"],
+    "network": ["network", "wifi", "cloud", "internet", "connection", "globe", "web", "server",
+                "router", "rss", "reddit", "pinterest", "safari", "opera", "twitter", "facebook",
+                "gmail", "mail", "linkedin"],
+    "security": ["lock", "key", "shield", "security", "secure", "certificate", "password",
+                 "protection", "safe", "no-entry"],
+    "tools": ["tool", "wrench", "gear", "settings", "config", "hammer", "screwdriver", "toolbox",
+              "camera", "canon", "powerbook", "powermac", "ipod", "nano", "scanner", "printer",
+              "ruler", "pen-tool", "paint", "editor", "player", "browser"],
+    "ui": ["button", "icon", "arrow", "close", "open", "menu", "navigation", "pointer", "cursor"],
+    "development": ["code", "bug", "database", "api", "console", "terminal", "git", "debug", "test",
+                    "develop", "compile", "pixel", "rgb"],
+    "emoji": ["smile", "happy", "sad", "face", "emotion", "laugh", "cry", "emoji", "owl", "piggy",
+              "peace", "poo", "pirate", "pets"],
+}
+
+_SEPARATORS = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(name: str) -> str:
+    """Lowercase a name and collapse everything but letters and digits to "-" """
+    return _SEPARATORS.sub("-", name.lower())
+
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """Regex source matching any of words, factored into a prefix trie
+
+    The regex engine tries alternatives one by one, so a flat
+    "a|b|c|..." alternation costs a comparison per keyword at every
+    position; the trie shape rejects a position after a character or two.
+    Longer words are preferred where one word is a prefix of another.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: Dict) -> str:
+        branches = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if "" in node:
+            return f"(?:{body})?" if len(branches) == 1 else f"{body}?"
+        return body
+
+    return emit(trie)
+
+
+class Classifier:
+    """Pick a category for names by counting keyword matches
+
+    Args:
+        keywords: Category -> keyword list (default: CATEGORY_KEYWORDS);
+                  categories are ranked in iteration order for ties
+        default: Category for names without any keyword (None to let
+                 callers keep an existing category)
+    """
+
+    def __init__(self, keywords: Optional[Dict[str, Iterable[str]]] = None,
+                 default: Optional[str] = DEFAULT_CATEGORY):
+        keywords = CATEGORY_KEYWORDS if keywords is None else keywords
+        self.default = default
+        self._category = {}
+        for category, words in keywords.items():
+            for word in words:
+                self._category.setdefault(normalize(word), category)
+        self._rank = {category: i for i, category in enumerate(keywords)}
+        self._pattern = re.compile(trie_pattern(self._category))
+
+    def classify(self, name: str) -> Optional[str]:
+        """Category for a single name"""
+        return self.classify_many([name])[0]
+
+    def classify_many(self, names: Iterable[str]) -> List[Optional[str]]:
+        """Categories for a batch of names, in order
+
+        The names are joined into one newline-separated text and scanned
+        once; each match is attributed to its name by offset.
+        """
+        names = list(names)
+        if not names:
+            return []
+        lines = [normalize(name) for name in names]
+        ends = list(accumulate(len(line) + 1 for line in lines))
+        scores = [None] * len(lines)
+        for match in self._pattern.finditer("\n".join(lines)):
+            i = bisect_right(ends, match.start())
+            counts = scores[i]
+            if counts is None:
+                counts = scores[i] = {}
+            category = self._category[match.group()]
+            counts[category] = counts.get(category, 0) + 1
+
+        rank = self._rank
+        return [max(counts, key=lambda c: (counts[c], -rank[c])) if counts else self.default
+                for counts in scores]
+
+
+@lru_cache(maxsize=None)
+def default_classifier() -> Classifier:
+    """Shared Classifier over CATEGORY_KEYWORDS, compiled on first use"""
+    return Classifier()
@@ -9,14 +9,23 @@ _icon_completion() {
     cur="${COMP_WORDS[COMP_CWORD]}"
     prev="${COMP_WORDS[COMP_CWORD-1]}"
 
-    commands="search use suggest md here cat info recent stats validate list add import generate help history again quick popular s u sug h i r st v l imp gen"
+    local iconics_dir="${ICONICS_DIR:-/home/zack/dev/iconics}"
+
+    commands="search similar use suggest md here cat info recent stats validate list add import generate help history again quick popular s sim u sug h i r st v l imp gen"
     categories="files network security tools ui emoji development"
+    if [[ -f "$iconics_dir/.icon-categories" ]]; then
+        categories="$(<"$iconics_dir/.icon-categories")"
+    fi
 
-    # Get icon names from catalog
-    _get_icon_names() {
-        local iconics_dir="/home/zack/dev/iconics"
-        if [[ -f "$iconics_dir/icon-catalog.json" ]]; then
-            python3 -c "import json; catalog = json.load(open('$iconics_dir/icon-catalog.json')); print(' '.join([icon['semanticName'] for icon in catalog['icons']]))" 2>/dev/null
+    # Complete icon names from the sorted list icon-manager.py writes on every
+    # catalog save; look(1) binary-searches it for the prefix
+    _complete_icon_names() {
+        local names_file="$iconics_dir/.icon-names"
+        [[ -f "$names_file" ]] || return
+        if [[ -n "$cur" ]] && command -v look >/dev/null 2>&1; then
+            mapfile -t COMPREPLY < <(LC_ALL=C look -- "$cur" "$names_file")
+        else
+            COMPREPLY=($(compgen -W "$(<"$names_file")" -- "${cur}"))
         fi
     }
 
@@ -28,9 +37,9 @@ _icon_completion() {
         2)
             # Complete based on previous command
             case "${prev}" in
-                use|u|md|markdown|info|i|here|h)
+                use|u|md|markdown|info|i|here|h|similar|sim)
                     # Complete with icon names
-                    COMPREPLY=($(compgen -W "$(_get_icon_names)" -- "${cur}"))
+                    _complete_icon_names
                     ;;
                 cat|category|list|l)
                     # Complete with categories
@@ -57,7 +66,7 @@ _icon_completion() {
             # For commands that take multiple icon names
             case "${COMP_WORDS[1]}" in
                 use|u|md|markdown|here|h)
-                    COMPREPLY=($(compgen -W "$(_get_icon_names)" -- "${cur}"))
+                    _complete_icon_names
                     ;;
             esac
             ;;
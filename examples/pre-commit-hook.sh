@@ -2,11 +2,49 @@
 # Git pre-commit hook example for icon suggestions
 # Install: cp examples/pre-commit-hook.sh .git/hooks/pre-commit && chmod +x .git/hooks/pre-commit
 
+ICONICS_DIR="${ICONICS_DIR:-/home/zack/dev/iconics}"
+
 # Check if README was modified and suggest icons
 if git diff --cached --name-only | grep -q "README.md"; then
     echo "📝 README.md modified. Consider adding icons:"
-    echo "   /home/zack/dev/iconics/icon suggest <topic>"
-    echo "   /home/zack/dev/iconics/icon use <icon-names>"
+    echo "   $ICONICS_DIR/icon suggest <topic>"
+    echo "   $ICONICS_DIR/icon use <icon-names>"
+fi
+
+# In the iconics repo itself: validate the catalog when it or the icons change.
+# --incremental only re-reads directories changed since the last run, so this
+# stays fast. Issues already recorded by the last plain `icon validate` (the
+# baseline in .icon-validate.json) don't block the commit unless they concern a
+# path staged in it; new ones always do (bypass with --no-verify).
+if [ "$(git rev-parse --show-toplevel)" -ef "$ICONICS_DIR" ] &&
+   git diff --cached --name-only | grep -qE '^(icon-catalog\.json|raw/|catalog/)'; then
+    report_file="/tmp/iconics-validate.$$.json"
+    python3 "$ICONICS_DIR/icon-manager.py" validate --incremental --json --baseline > "$report_file"
+    python3 - "$report_file" "$ICONICS_DIR" <<'EOF'
+import json, os, subprocess, sys
+report = json.load(open(sys.argv[1]))
+staged = set(subprocess.run(["git", "diff", "--cached", "--name-only"],
+                            capture_output=True, text=True).stdout.splitlines())
+
+def staged_path(issue):
+    path = issue.get("path", "")
+    return (os.path.relpath(path, sys.argv[2]) if os.path.isabs(path) else path) in staged
+
+blocking = [i for i in report["issues"] if i.get("new", True) or staged_path(i)]
+if not blocking:
+    sys.exit(0)
+print(f"✗ Catalog validation failed: {len(blocking)} new or staged issue(s)")
+for issue in blocking[:10]:
+    print(f"  {issue['message']}")
+if len(blocking) > 10:
+    print(f"  ... run 'icon validate --baseline' for the full list")
+if not report["baseline"]:
+    print("  (no baseline recorded yet; run 'icon validate' to accept the current issues)")
+sys.exit(1)
+EOF
+    status=$?
+    rm -f "$report_file"
+    [ $status -eq 0 ] || exit 1
 fi
 
 # Allow commit to proceed
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Pixel feature vectors and nearest-neighbour lookup for Iconics
+
+Each icon is reduced to a small float32 vector: an opacity-weighted RGB
+histogram, the bits of a luma difference hash and a coarse alpha
+silhouette. Vectors for the library are kept in a memory-mapped .npy file
+with a JSON index of the files they describe, so only changed files are
+decoded again and lookups page in just the rows they use.
+
+Requires NumPy; icon-manager.py imports this module only for visual
+suggestions.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import pngtools
+
+FEATURE_VERSION = 1  # bump when the vector layout changes
+HIST_BINS = 4  # levels per RGB channel: 64 joint color bins
+HASH_SIZE = 8  # luma dHash grid: 64 bits
+SHAPE_GRID = 4  # alpha coverage grid: 16 cells
+FEATURE_DIM = HIST_BINS ** 3 + HASH_SIZE * HASH_SIZE + SHAPE_GRID * SHAPE_GRID
+LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def _grid_means(plane: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """Box-average a 2-D array down to rows x cols cells
+
+    Planes smaller than the grid repeat their edge samples.
+    """
+    height, width = plane.shape
+    row_starts = np.arange(rows) * height // rows
+    col_starts = np.arange(cols) * width // cols
+    sums = np.add.reduceat(np.add.reduceat(plane, row_starts, axis=0), col_starts, axis=1)
+    row_counts = np.maximum(np.diff(row_starts, append=height), 1)
+    col_counts = np.maximum(np.diff(col_starts, append=width), 1)
+    return sums / np.outer(row_counts, col_counts)
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def pixel_features(width: int, height: int, pixels: bytes) -> np.ndarray:
+    """Feature vector (FEATURE_DIM float32) of RGBA pixels
+
+    The three parts are scaled to unit length each and the whole vector
+    to unit length, so the dot product of two vectors is a cosine
+    similarity that weighs color, structure and shape equally. Hash bits
+    are stored as +/-1, which makes their share of the dot product
+    1 - 2 * Hamming distance / 64.
+    """
+    rgba = np.frombuffer(pixels, dtype=np.uint8).reshape(height, width, 4)
+    rgb = rgba[..., :3]
+    alpha = rgba[..., 3].astype(np.float32) / 255
+
+    # Color histogram weighted by opacity, so transparent padding doesn't count
+    levels = (rgb // (256 // HIST_BINS)).astype(np.intp)
+    bins = (levels[..., 0] * HIST_BINS + levels[..., 1]) * HIST_BINS + levels[..., 2]
+    histogram = np.bincount(bins.ravel(), weights=alpha.ravel(), minlength=HIST_BINS ** 3)
+
+    # dHash over luma composited onto white (as pngtools.difference_hash)
+    luma = (rgb @ LUMA) * alpha + 255 * (1 - alpha)
+    cells = _grid_means(luma, HASH_SIZE, HASH_SIZE + 1)
+    bits = np.where(cells[:, :-1] > cells[:, 1:], 1.0, -1.0)
+
+    silhouette = _grid_means(alpha, SHAPE_GRID, SHAPE_GRID)
+
+    parts = [_unit(histogram), _unit(bits.ravel()), _unit(silhouette.ravel())]
+    return _unit(np.concatenate(parts)).astype(np.float32)
+
+
+def file_features(path: str) -> Optional[np.ndarray]:
+    """Feature vector of an image file, or None if it can't be decoded
+
+    Runs in worker processes, so it takes a plain string path.
+    """
+    try:
+        with open(path, 'rb') as f:
+            width, height, pixels = pngtools.decode(f.read())
+    except (OSError, pngtools.PNGError):
+        return None
+    return pixel_features(width, height, pixels)
+
+
+class FeatureStore:
+    """Feature vectors for image files, memory-mapped from a .npy file
+
+    The JSON index next to the .npy (same name, .json suffix) lists each
+    row's file (relative to the library root) with the size and mtime it
+    was computed from.
+
+    Args:
+        path: The .npy file
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.index_path = path.with_suffix(".json")
+        self.files = []  # row -> relative file name
+        self.stamps = {}  # relative file name -> [size, mtime_ns]
+        self.rows = {}  # relative file name -> row
+        self.vectors = np.zeros((0, FEATURE_DIM), dtype=np.float32)
+        self._load()
+
+    def _load(self):
+        try:
+            index = json.loads(self.index_path.read_text())
+            vectors = np.load(self.path, mmap_mode="r")
+        except (OSError, ValueError):
+            return
+        if index.get("version") != FEATURE_VERSION or \
+                vectors.shape != (len(index["files"]), FEATURE_DIM):
+            return
+        self.vectors = vectors
+        for row, (name, size, mtime) in enumerate(index["files"]):
+            self.files.append(name)
+            self.stamps[name] = [size, mtime]
+            self.rows[name] = row
+
+    def update(self, root: Path, files: Iterable[str],
+               map_func: Callable = map) -> Tuple[int, List[str]]:
+        """Make sure the store has current vectors for files
+
+        Files already in the store are kept (and refreshed if they
+        changed); files that no longer exist are dropped. The .npy is
+        rewritten only when something changed.
+
+        Args:
+            root: Library root the file names are relative to
+            files: File names to add or refresh
+            map_func: map()-like function used to run file_features,
+                      e.g. a process pool's map
+
+        Returns:
+            (number of vectors computed, files that couldn't be decoded)
+        """
+        stamps = {}
+        for name in dict.fromkeys([*self.files, *files]):
+            try:
+                st = os.stat(root / name)
+            except OSError:
+                continue
+            stamps[name] = [st.st_size, st.st_mtime_ns]
+
+        stale = [name for name, stamp in stamps.items() if self.stamps.get(name) != stamp]
+        if not stale and len(stamps) == len(self.files):
+            return 0, []
+
+        fresh = dict(zip(stale, map_func(file_features, [str(root / name) for name in stale])))
+        failed = [name for name, vector in fresh.items() if vector is None]
+        names = [name for name in stamps if fresh.get(name, True) is not None]
+
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        vectors = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32,
+                                            shape=(len(names), FEATURE_DIM))
+        for row, name in enumerate(names):
+            vectors[row] = fresh[name] if name in fresh else self.vectors[self.rows[name]]
+        vectors.flush()
+        del vectors
+        os.replace(tmp_path, self.path)
+
+        index = {"version": FEATURE_VERSION, "files": [[name, *stamps[name]] for name in names]}
+        tmp_index = self.index_path.with_name(f".{self.index_path.name}.{os.getpid()}.tmp")
+        tmp_index.write_text(json.dumps(index))
+        os.replace(tmp_index, self.index_path)
+
+        self.files, self.stamps, self.rows = [], {}, {}
+        self.vectors = np.zeros((0, FEATURE_DIM), dtype=np.float32)
+        self._load()
+        return len(fresh) - len(failed), failed
+
+    def matrix(self, files: List[str]) -> np.ndarray:
+        """Vectors for files (which must be in the store), one row each"""
+        return self.vectors[[self.rows[name] for name in files]]
+
+
+def nearest(queries: np.ndarray, base: np.ndarray, k: int,
+            block: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+    """k most similar base rows for each query row, best first
+
+    Similarity is the dot product (cosine, for the unit vectors above).
+    Queries are processed block rows at a time to bound the size of the
+    similarity matrix.
+
+    Returns:
+        (indices, similarities), both len(queries) x min(k, len(base))
+    """
+    k = min(k, len(base))
+    indices = np.empty((len(queries), k), dtype=np.intp)
+    similarities = np.empty((len(queries), k), dtype=np.float32)
+    for start in range(0, len(queries), block):
+        sims = queries[start:start + block] @ base.T
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1)
+        indices[start:start + block] = np.take_along_axis(top, order, axis=1)
+        similarities[start:start + block] = np.take_along_axis(top_sims, order, axis=1)
+    return indices, similarities
@@ -10,120 +10,1900 @@ import json
 import os
 import shutil
 import argparse
-import csv
-from datetime import datetime
+import bisect
+import gc
+import marshal
+import math
+import re
+import struct
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from itertools import chain, islice
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, Iterable, List, Dict, Optional, Sequence, Tuple
 
-ICON_DIR = Path("/home/zack/dev/iconics")
+_MODULE_START = time.perf_counter()  # end of interpreter start-up, for --profile
+
+ICON_DIR = Path(os.environ.get("ICONICS_DIR") or "/home/zack/dev/iconics")
 CATALOG_FILE = ICON_DIR / "icon-catalog.json"
+CATALOG_CACHE_FILE = ICON_DIR / ".icon-catalog.cache"
+CATALOG_DB_FILE = ICON_DIR / "icon-catalog.db"
+CATALOG_LOCK_FILE = ICON_DIR / ".icon-catalog.lock"
+SHARD_DIR = ICON_DIR / "icon-catalog.d"  # sharded store: one JSON file per category
+SHARD_MANIFEST = "_manifest.json"  # shard names start with a letter or digit, so never clash
+SHARD_CACHE_FILE = ICON_DIR / ".icon-shards.cache"
+SHARD_VERSION = 1
+SHARD_NAME_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9_-]*")
+# File whose state identifies the stored catalog, per storage backend
+STORE_FILES = {"json": CATALOG_FILE, "sqlite": CATALOG_DB_FILE, "sharded": SHARD_DIR / SHARD_MANIFEST}
 RAW_DIR = ICON_DIR / "raw"
 CATALOG_DIR = ICON_DIR / "catalog"
 HISTORY_FILE = ICON_DIR / ".icon-history.json"
 ANALYTICS_FILE = ICON_DIR / ".icon-analytics.json"
+USAGE_LOG_FILE = ICON_DIR / ".icon-usage.log"
+USAGE_COMPACT_BYTES = 64 * 1024  # fold the log into history/analytics past this size
+VALIDATE_STATE_FILE = ICON_DIR / ".icon-validate.json"
+NAMES_FILE = ICON_DIR / ".icon-names"  # sorted semantic names, read by the completion scripts
+CATEGORIES_FILE = ICON_DIR / ".icon-categories"
+VALIDATE_STATE_VERSION = 1
+STATS_FILE = ICON_DIR / ".icon-stats.json"  # stats summary, valid for one catalog file state
+STATS_VERSION = 1
+STATS_SAMPLES = 10  # icons listed per category
+IO_WORKERS = 8  # threads for file I/O (export, image scan)
+BLOB_DIR = RAW_DIR / "blobs"  # content-addressed files shared by duplicate icons
+DEDUPE_DISTANCE = 4  # max differing perceptual-hash bits for near-duplicates
+DERIVATIVE_CACHE_DIR = ICON_DIR / ".derivative-cache"  # resized icons, named by source hash and size
+RESIZE_VERSION = 1  # bump when the resampler changes
+SIZE_SPEC_RE = re.compile(r"(\d+)(x?)")  # "24" (pixels) or "2x" (scale factor)
+FEATURE_FILE = ICON_DIR / ".icon-features.npy"  # pixel feature vectors (see features.py), index in .json
+FEATURE_NEIGHBORS = 5  # cataloged neighbours consulted per visual suggestion
+SPRITE_CACHE_DIR = ICON_DIR / ".sprite-cache"  # rendered atlas sheets, named by content key
+SPRITE_MAX_SIZE = 1024  # max atlas width/height in pixels
+SPRITE_VERSION = 1  # bump when the layout or rendering changes
+IMPORT_CHUNK_ROWS = 25000  # import-csv rows committed per catalog save
+IMPORT_REPORT_ROWS = 20  # per-row import warnings printed before only counting them
+PROGRESS_INTERVAL = 1.0  # seconds between progress lines
+EXPORT_LINK_MODES = ("copy", "hard", "reflink")
+FICLONE = 0x40049409  # Linux ioctl: share the source file's extents (btrfs, XFS, ...)
+DAEMON_SOCKET = Path(os.environ.get("ICONICS_SOCKET") or
+                     Path(os.environ.get("XDG_RUNTIME_DIR") or "/tmp") / f"iconics-{os.getuid()}.sock")
+
+# Sidecar header: magic, format version, python major/minor, JSON inode, mtime_ns and size
+CACHE_HEADER = struct.Struct("<4sHBBqqq")
+CACHE_MAGIC = b"ICSC"
+CACHE_VERSION = 4
+
+# IconManager attributes persisted in the sidecar alongside the catalog
+INDEX_ATTRS = ("_by_id", "_pos", "_by_tag", "_by_category", "_by_semantic", "_semantic_names",
+               "_by_size")
+# Search index attributes, stored as a nested marshal blob decoded on first use
+SEARCH_INDEX_ATTRS = ("_postings", "_doc_lens", "_field_totals", "_trigrams")
+# IconManager attributes that load the catalog when first read
+LAZY_ATTRS = frozenset(("catalog", "_semantic_sorted", *INDEX_ATTRS))
+
+# Ranked search: fields scored per icon, their BM25 weights and parameters
+SEARCH_FIELD_WEIGHTS = (3.0, 2.0, 1.0)  # semanticName, tags, description
+BM25_K1 = 1.2
+BM25_B = 0.75
+SEARCH_PREFIX_LIMIT = 64
+SEARCH_TYPO_MIN_SIMILARITY = 0.4
+SEARCH_STOPWORDS = frozenset({"a", "an", "and", "for", "icon", "in", "of", "or", "the", "to", "with"})
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_IHDR = struct.Struct(">4sIIBB")  # chunk type, width, height, bit depth, color type
+FILENAME_SIZE_RE = re.compile(r"[-_](\d+)x(\d+)$")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric search terms, dropping stopwords"""
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in SEARCH_STOPWORDS]
+
+
+def trigrams(term: str) -> set:
+    """Character trigrams of a term, padded so short terms still produce some"""
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def chunked(iterable: Iterable, size: int) -> Iterable[list]:
+    """Yield successive lists of up to size items from an iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Progress:
+    """Progress line for long row-by-row jobs, printed at a fixed rate
+
+    update() is cheap enough to call per row; it prints at most once per
+    PROGRESS_INTERVAL seconds, rewriting a single line on a terminal and
+    appending lines otherwise (logs, CI).
+    """
+
+    def __init__(self, label: str, interval: float = PROGRESS_INTERVAL):
+        self.label = label
+        self.interval = interval
+        self._tty = sys.stdout.isatty()
+        self._next = time.monotonic() + interval
+        self._shown = False
+
+    def update(self, done: int, detail: str = ""):
+        now = time.monotonic()
+        if now < self._next:
+            return
+        self._next = now + self.interval
+        line = f"  {self.label}: {done:,}" + (f" ({detail})" if detail else "")
+        if self._tty:
+            print(f"\r\033[K{line}", end="", flush=True)
+        else:
+            print(line, flush=True)
+        self._shown = True
+
+    def finish(self):
+        """End the progress line so normal output starts on a fresh one"""
+        if self._shown and self._tty:
+            print()
+        self._shown = False
+
+
+@contextmanager
+def gc_paused():
+    """Suspend the cyclic garbage collector while building large containers
+
+    Decoding the catalog allocates tens of thousands of dicts and lists,
+    none of them garbage; without this the collector runs repeatedly and
+    roughly doubles the load time.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+_tracer = None  # tracing.Tracer while --profile / ICONICS_TRACE is on
+
+
+def trace_phase(name: str, **args):
+    """Time a block as a profiling phase; does nothing unless profiling is on
+
+    Yields a dict the block may add figures to (see tracing.Tracer.phase).
+    """
+    if _tracer is None:
+        return nullcontext(args)
+    return _tracer.phase(name, **args)
+
+
+@contextmanager
+def atomic_write(path: Path, mode: str = 'w', durable: bool = False, **open_args):
+    """Open a temp file next to path and rename it over path on success
+
+    The replacement keeps the permissions of the file it replaces (or gets
+    the usual umask-derived ones for a new file). If the block raises, the
+    temp file is removed and path is left untouched.
+
+    Args:
+        durable: fsync the data before the rename and the directory after
+                 it, so the new contents survive a power loss
+        open_args: Passed on to open() (encoding, newline)
+    """
+    try:
+        perms = path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        perms = 0o666 & ~umask
+
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, perms)
+    try:
+        with os.fdopen(fd, mode, **open_args) as f:
+            yield f
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        if durable:
+            dir_fd = os.open(path.parent, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 hex digest of a file's contents"""
+    import hashlib
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_image_info(path: Path, st: Optional[os.stat_result] = None) -> Dict:
+    """Describe an icon file without decoding it
+
+    Width, height, bit depth and color type come straight from the PNG
+    IHDR chunk (the first 33 bytes); they are omitted for files that are
+    not PNGs. The whole file is read once for its SHA-256.
+    """
+    import hashlib
+
+    st = st or path.stat()
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    info = {}
+    if data[:8] == PNG_SIGNATURE and len(data) >= 26:
+        chunk, width, height, bit_depth, color_type = PNG_IHDR.unpack_from(data, 12)
+        if chunk == b"IHDR":
+            info = {"width": width, "height": height, "bitDepth": bit_depth, "colorType": color_type}
+    info.update({
+        "bytes": st.st_size,
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "mtime": st.st_mtime_ns,
+    })
+    return info
+
+
+def icon_size(icon: Dict) -> Optional[int]:
+    """Pixel size of an icon (its larger dimension), if it has been scanned"""
+    image = icon.get("image") or {}
+    if "width" not in image:
+        return None
+    return max(image["width"], image["height"])
+
+
+def count_raw_icons(previous: Optional[Dict] = None) -> Dict:
+    """Number of PNGs in raw/ and raw/blobs/, as {"mtime": [directory mtimes], "count": n}
+
+    Returns previous unchanged if the directories' mtimes still match it
+    (adding, removing or renaming a file updates the mtime).
+    """
+    mtime = []
+    for directory in (RAW_DIR, BLOB_DIR):
+        try:
+            mtime.append(directory.stat().st_mtime_ns)
+        except FileNotFoundError:
+            mtime.append(None)
+    if previous and previous.get("mtime") == mtime:
+        return previous
+    count = 0
+    for directory, directory_mtime in zip((RAW_DIR, BLOB_DIR), mtime):
+        if directory_mtime is not None:
+            with os.scandir(directory) as entries:
+                count += sum(1 for entry in entries if entry.name.endswith(".png") and not entry.name.startswith("."))
+    return {"mtime": mtime, "count": count}
+
+
+def size_spec(value: str) -> str:
+    """argparse type for --size: a pixel size like 24 or a scale like 2x"""
+    match = SIZE_SPEC_RE.fullmatch(value.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise argparse.ArgumentTypeError(f"invalid size '{value}' (use pixels like 24 or a scale like 2x)")
+    return match.group(0)
+
+
+def target_dimensions(spec: str, width: int, height: int) -> Tuple[int, int]:
+    """Dimensions an icon of width x height should have for a size spec
+
+    "2x" scales both sides; "24" scales the larger side to 24 pixels,
+    keeping the aspect ratio.
+    """
+    match = SIZE_SPEC_RE.fullmatch(spec)
+    value = int(match.group(1))
+    if match.group(2):
+        return width * value, height * value
+    scale = value / max(width, height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def pack_shelves(sizes: List[Tuple[int, int]], max_size: int = SPRITE_MAX_SIZE,
+                 padding: int = 1) -> Tuple[List[Tuple[int, int, int]], List[Tuple[int, int]]]:
+    """Pack rectangles into as few sheets as possible (shelf first-fit decreasing)
+
+    Rectangles are placed tallest first, left to right on horizontal
+    shelves; each goes on the first shelf with room, else on a new shelf,
+    else on a new sheet. Sheets are sized to be roughly square.
+
+    Args:
+        sizes: (width, height) of each rectangle
+        max_size: Max sheet width and height
+        padding: Empty pixels kept between neighbours
+
+    Returns:
+        ([(sheet, x, y) per rectangle, in input order], [(width, height) per sheet])
+    """
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0], i))
+    area = sum((w + padding) * (h + padding) for w, h in sizes)
+    widest = max((w for w, _ in sizes), default=0)
+    sheet_width = min(max_size, max(widest, math.ceil(math.sqrt(area) * 1.1)))
+
+    placements = [None] * len(sizes)
+    sheets = []  # per sheet: list of shelves [y, height, next x]
+    for i in order:
+        w, h = sizes[i]
+        for sheet, shelves in enumerate(sheets):
+            shelf = next((s for s in shelves if h <= s[1] and s[2] + w <= sheet_width), None)
+            if shelf is None:
+                top = shelves[-1][0] + shelves[-1][1] + padding if shelves else 0
+                if top + h > max_size:
+                    continue
+                shelf = [top, h, 0]
+                shelves.append(shelf)
+            break
+        else:
+            shelf = [0, h, 0]
+            sheets.append([shelf])
+            sheet = len(sheets) - 1
+        placements[i] = (sheet, shelf[2], shelf[0])
+        shelf[2] += w + padding
+
+    dimensions = []
+    for sheet, shelves in enumerate(sheets):
+        width = max(x + sizes[i][0] for i, (s, x, _) in enumerate(placements) if s == sheet)
+        height = max(y + sizes[i][1] for i, (s, _, y) in enumerate(placements) if s == sheet)
+        dimensions.append((width, height))
+    return placements, dimensions
+
+
+def export_file(source: Path, target: Path, link: str = "copy") -> str:
+    """Place source at target, skipping the write if target already matches
+
+    Args:
+        source: File in raw/
+        target: Destination path
+        link: "copy" (shutil.copy2), "hard" (hard link) or "reflink"
+              (copy-on-write clone); hard and reflink fall back to a copy
+              when the filesystem can't do them
+
+    Returns:
+        "unchanged", "linked", "reflinked", "copied" or "missing"
+    """
+    try:
+        src_stat = source.stat()
+    except FileNotFoundError:
+        return "missing"
+
+    try:
+        dst_stat = target.stat()
+    except FileNotFoundError:
+        dst_stat = None
+    if dst_stat is not None:
+        if (dst_stat.st_ino, dst_stat.st_dev) == (src_stat.st_ino, src_stat.st_dev):
+            return "unchanged"
+        if dst_stat.st_size == src_stat.st_size and file_digest(source) == file_digest(target):
+            return "unchanged"
+    if dst_stat is not None or target.is_symlink():
+        target.unlink()
+
+    if link == "hard":
+        try:
+            os.link(source, target)
+            return "linked"
+        except OSError:
+            pass  # cross-device or unsupported; copy instead
+    elif link == "reflink":
+        import fcntl
+
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                cloned = True
+            except OSError:
+                cloned = False
+        if cloned:
+            shutil.copystat(source, target)
+            return "reflinked"
+
+    shutil.copy2(source, target)
+    return "copied"
+
+
+def project_root(start: Path) -> Path:
+    """Root of the project containing start, as the icon wrapper finds it
+
+    The nearest directory with a .git entry, else the nearest with a
+    README.md, else start itself.
+    """
+    for marker in (".git", "README.md", "readme.md"):
+        for directory in (start, *start.parents):
+            if (directory / marker).exists():
+                return directory
+    return start
+
+
+def markdown_snippet(name: str, project: Path, cwd: Path, suffix: str = "") -> str:
+    """Markdown image for an icon exported to project, relative to cwd
+
+    suffix is the size suffix of resized exports ("-24px", "@2x").
+    """
+    path = os.path.relpath(project / ".github" / "assets" / "icons" / f"{name}{suffix}.png", cwd)
+    return f"![{name}]({path})"
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two perceptual hashes"""
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit perceptual hashes
+
+    Each node holds a hash, the keys (icon ids) stored under it and its
+    children keyed by their Hamming distance to the node. By the triangle
+    inequality a search within radius r of a query at distance d from a
+    node only needs the children with edges in [d - r, d + r], so most of
+    the tree is never visited.
+
+    Keys are removed lazily (the node stays, without the key), which is
+    all the catalog's update pattern needs.
+    """
 
-class IconManager:
     def __init__(self):
+        self.root = None  # [hash, keys, {distance: child}]
+        self.size = 0
+
+    def add(self, value: int, key: str):
+        if self.root is None:
+            self.root = [value, {key}, {}]
+            self.size = 1
+            return
+        node = self.root
+        while True:
+            d = hamming(value, node[0])
+            if d == 0:
+                node[1].add(key)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [value, {key}, {}]
+                self.size += 1
+                return
+            node = child
+
+    def remove(self, value: int, key: str):
+        node = self.root
+        while node is not None:
+            d = hamming(value, node[0])
+            if d == 0:
+                node[1].discard(key)
+                return
+            node = node[2].get(d)
+
+    def nearest(self, value: int, k: int, max_distance: int = 64,
+                accept: Optional[Callable[[str], bool]] = None) -> List[Tuple[int, str]]:
+        """Up to k (distance, key) pairs closest to value, nearest first
+
+        The search radius starts at max_distance and shrinks to the k-th
+        best distance found so far. accept filters keys (e.g. to skip the
+        query icon itself).
+        """
+        import heapq
+
+        if self.root is None or k <= 0:
+            return []
+        best = []  # max-heap of (-distance, -order, key)
+        order = 0
+        radius = max_distance
+        stack = [self.root]
+        while stack:
+            node_value, keys, children = stack.pop()
+            d = hamming(value, node_value)
+            if d <= radius:
+                for key in keys:
+                    if accept is not None and not accept(key):
+                        continue
+                    order += 1
+                    if len(best) < k:
+                        heapq.heappush(best, (-d, -order, key))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, -order, key))
+                    if len(best) == k:
+                        radius = min(radius, -best[0][0])
+            for edge, child in children.items():
+                if d - radius <= edge <= d + radius:
+                    stack.append(child)
+        return [(-neg_d, key) for neg_d, _, key in sorted(best, reverse=True)]
+
+
+class CatalogConflictError(RuntimeError):
+    """The stored catalog changed on disk after it was loaded"""
+
+
+class SQLiteCatalogStore:
+    """SQLite storage backend for the icon catalog
+
+    Icons, tags, categories and per-icon project usage live in ordinary
+    tables keyed by catalog position, so saving a change rewrites only the
+    affected rows. Every write bumps a revision counter in `meta`, which
+    lets a process detect that another one wrote since it loaded. An FTS5
+    table over semantic name, tags and description backs full-text search
+    when the sqlite3 build supports it; otherwise search falls back to LIKE
+    matching. Single icons can be read by id, name or position without
+    loading the whole catalog.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS categories (pos INTEGER PRIMARY KEY, name TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS icons (
+            pos INTEGER PRIMARY KEY,
+            id TEXT NOT NULL UNIQUE,
+            filename TEXT NOT NULL,
+            semantic_name TEXT NOT NULL,
+            category TEXT,
+            description TEXT,
+            extra TEXT
+        );
+        CREATE INDEX IF NOT EXISTS icons_semantic ON icons (semantic_name);
+        CREATE INDEX IF NOT EXISTS icons_semantic_nocase ON icons (semantic_name COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS icons_category ON icons (category);
+        CREATE TABLE IF NOT EXISTS icon_tags (
+            pos INTEGER NOT NULL, seq INTEGER NOT NULL, tag TEXT NOT NULL,
+            PRIMARY KEY (pos, seq)
+        );
+        CREATE INDEX IF NOT EXISTS icon_tags_tag ON icon_tags (tag COLLATE NOCASE);
+        CREATE TABLE IF NOT EXISTS icon_usage (
+            pos INTEGER NOT NULL, seq INTEGER NOT NULL, project TEXT NOT NULL,
+            PRIMARY KEY (pos, seq)
+        );
+    """
+
+    # Icon keys stored in dedicated columns; anything else goes to `extra`
+    ICON_KEYS = ("id", "filename", "semanticName", "tags", "category", "description", "usedIn")
+
+    def __init__(self, path: Path):
+        import sqlite3
+
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(self.SCHEMA)
+        try:
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS icons_fts "
+                "USING fts5(semantic_name, tags, description, tokenize='unicode61')")
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            self.has_fts = False
+
+    def is_empty(self) -> bool:
+        """True if the database has never been populated"""
+        return self.conn.execute("SELECT 1 FROM meta WHERE key = 'version'").fetchone() is None
+
+    def load(self) -> Dict:
+        """Read the whole catalog back in the icon-catalog.json layout"""
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        catalog = {"version": meta.get("version", "1.0"), "icons": list(self._read_icons().values()),
+                   "categories": self.categories()}
+        catalog.update(json.loads(meta.get("extra", "{}")))
+        return catalog
+
+    def _read_icons(self, where: str = "", params: Sequence = ()) -> Dict[int, Dict]:
+        """Icons whose rows match a WHERE clause on `icons`, by position, in catalog order"""
+        conn = self.conn
+        subset = f"WHERE pos IN (SELECT pos FROM icons {where})" if where else ""
+
+        tags = {}
+        for pos, tag in conn.execute(f"SELECT pos, tag FROM icon_tags {subset} ORDER BY pos, seq", params):
+            tags.setdefault(pos, []).append(tag)
+        usage = {}
+        for pos, project in conn.execute(f"SELECT pos, project FROM icon_usage {subset} ORDER BY pos, seq",
+                                         params):
+            usage.setdefault(pos, []).append(project)
+
+        icons = {}
+        for pos, icon_id, filename, semantic, category, description, extra in conn.execute(
+                "SELECT pos, id, filename, semantic_name, category, description, extra "
+                f"FROM icons {where} ORDER BY pos", params):
+            icon = {
+                "id": icon_id,
+                "filename": filename,
+                "semanticName": semantic,
+                "tags": tags.get(pos, []),
+                "category": category,
+                "description": description,
+                "usedIn": usage.get(pos, []),
+            }
+            if extra:
+                icon.update(json.loads(extra))
+            icons[pos] = icon
+        return icons
+
+    def icons_at(self, positions: List[int]) -> List[Dict]:
+        """The icons stored at these positions, in the order given"""
+        found = {}
+        for start in range(0, len(positions), 500):  # stay under the bound-parameter limit
+            chunk = positions[start:start + 500]
+            found.update(self._read_icons(f"WHERE pos IN ({', '.join('?' * len(chunk))})", chunk))
+        return [found[pos] for pos in positions if pos in found]
+
+    def icon_by_id(self, icon_id: str) -> Optional[Tuple[int, Dict]]:
+        """(position, icon) of the icon with this id, if stored"""
+        return next(iter(self._read_icons("WHERE id = ?", (icon_id,)).items()), None)
+
+    def resolve(self, name: str) -> Optional[Dict]:
+        """The icon a semantic name resolves to, as IconManager.resolve_icon does
+
+        An exact case-insensitive match wins over the first icon whose
+        semantic name contains name.
+        """
+        row = self.conn.execute(
+            "SELECT pos FROM icons WHERE semantic_name = ? COLLATE NOCASE ORDER BY pos LIMIT 1",
+            (name,)).fetchone()
+        if row is None:
+            row = self.conn.execute(
+                "SELECT pos FROM icons WHERE instr(lower(semantic_name), ?) ORDER BY pos LIMIT 1",
+                (name.lower(),)).fetchone()
+        return self.icons_at([row[0]])[0] if row else None
+
+    def next_position(self) -> int:
+        """Position the next new icon will be stored at"""
+        return self.conn.execute("SELECT COALESCE(MAX(pos) + 1, 0) FROM icons").fetchone()[0]
+
+    def categories(self) -> List[str]:
+        """The catalog's category list"""
+        return [name for (name,) in self.conn.execute("SELECT name FROM categories ORDER BY pos")]
+
+    def semantic_names(self) -> List[str]:
+        """Distinct lowercased semantic names, sorted (for the completion list)"""
+        names = {name.lower() for (name,) in self.conn.execute("SELECT DISTINCT semantic_name FROM icons")}
+        return sorted(names - {""})
+
+    def recorded_usage(self) -> Dict[str, List[str]]:
+        """usedIn lists stored with the icons, by semantic name"""
+        recorded = {}
+        for semantic, project in self.conn.execute(
+                "SELECT i.semantic_name, u.project FROM icon_usage u JOIN icons i ON i.pos = u.pos "
+                "ORDER BY u.pos, u.seq"):
+            recorded.setdefault(semantic, []).append(project)
+        return recorded
+
+    def revision(self) -> int:
+        """Number of writes made to the database so far"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _set_revision(self, revision: int):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('revision', ?)", (str(revision),))
+
+    def save_icons(self, icons: Iterable[Dict], revision: Optional[int] = None) -> int:
+        """Insert or update icons, matched by id, in one transaction
+
+        Stored icons keep their position; new ones go after the last
+        stored position.
+
+        Args:
+            revision: The revision the changes were made against; if the
+                      database has been written since, nothing is saved
+                      and CatalogConflictError is raised
+
+        Returns:
+            The database's new revision
+        """
+        conn = self.conn
+        with conn:
+            current = self.revision()
+            if revision is not None and current != revision:
+                raise CatalogConflictError(
+                    f"{self.path} was changed by another process since it was loaded; "
+                    f"not overwriting it. Re-run the command to apply it to the current catalog.")
+            for icon in icons:
+                row = conn.execute("SELECT pos FROM icons WHERE id = ?", (icon["id"],)).fetchone()
+                if row is not None:
+                    self._write_icon(row[0], icon)
+                else:
+                    self._write_icon(self.next_position(), icon, fresh=True)
+            self._set_revision(current + 1)
+        return current + 1
+
+    def replace_catalog(self, catalog: Dict):
+        """Replace the database contents with a full catalog"""
+        conn = self.conn
+        revision = self.revision()
+        with conn:
+            for table in ("meta", "categories", "icons", "icon_tags", "icon_usage"):
+                conn.execute(f"DELETE FROM {table}")
+            if self.has_fts:
+                conn.execute("DELETE FROM icons_fts")
+            extra = {k: v for k, v in catalog.items() if k not in ("version", "icons", "categories")}
+            conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                             [("version", catalog.get("version", "1.0")),
+                              ("extra", json.dumps(extra))])
+            conn.executemany("INSERT INTO categories (pos, name) VALUES (?, ?)",
+                             enumerate(catalog.get("categories", [])))
+            for pos, icon in enumerate(catalog["icons"]):
+                self._write_icon(pos, icon, fresh=True)
+            self._set_revision(revision + 1)
+
+    def _write_icon(self, pos: int, icon: Dict, fresh: bool = False):
+        """Write one icon's rows (caller holds the transaction)"""
+        conn = self.conn
+        if not fresh:
+            conn.execute("DELETE FROM icon_tags WHERE pos = ?", (pos,))
+            conn.execute("DELETE FROM icon_usage WHERE pos = ?", (pos,))
+            if self.has_fts:
+                conn.execute("DELETE FROM icons_fts WHERE rowid = ?", (pos,))
+
+        extra = {k: v for k, v in icon.items() if k not in self.ICON_KEYS}
+        tags = icon.get("tags", [])
+        conn.execute(
+            "INSERT OR REPLACE INTO icons "
+            "(pos, id, filename, semantic_name, category, description, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (pos, icon["id"], icon.get("filename", f"raw/{icon['id']}.png"),
+             icon.get("semanticName", ""), icon.get("category"), icon.get("description", ""),
+             json.dumps(extra) if extra else None))
+        conn.executemany("INSERT INTO icon_tags (pos, seq, tag) VALUES (?, ?, ?)",
+                         [(pos, seq, tag) for seq, tag in enumerate(tags)])
+        conn.executemany("INSERT INTO icon_usage (pos, seq, project) VALUES (?, ?, ?)",
+                         [(pos, seq, project) for seq, project in enumerate(icon.get("usedIn", []))])
+        if self.has_fts:
+            conn.execute(
+                "INSERT INTO icons_fts (rowid, semantic_name, tags, description) VALUES (?, ?, ?, ?)",
+                (pos, icon.get("semanticName", "").replace("-", " "), " ".join(tags),
+                 icon.get("description", "")))
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """Return catalog positions matching query, best first
+
+        Ranked like IconManager.search: icons matching more of the words
+        first, an exact semantic name match ahead of everything, and icons
+        whose semantic name merely contains the query after all matches.
+        With FTS5 each word is matched as a prefix and results are ranked
+        by bm25, weighting semantic name over tags over description;
+        otherwise words are LIKE-matched and ranked by how many match.
+        Misspelled words are not matched.
+        """
+        conn = self.conn
+        words = tokenize(query) or TOKEN_RE.findall(query.lower())
+        positions = []
+        if words and self.has_fts:
+            scores = dict(conn.execute(
+                "SELECT rowid, -bm25(icons_fts, 10.0, 5.0, 1.0) FROM icons_fts WHERE icons_fts MATCH ?",
+                (" OR ".join(f'"{w}"*' for w in words),)))
+            if len(words) > 1:  # scale by the fraction of words matched
+                matched = dict.fromkeys(scores, 0)
+                for w in words:
+                    for (pos,) in conn.execute("SELECT rowid FROM icons_fts WHERE icons_fts MATCH ?",
+                                               (f'"{w}"*',)):
+                        matched[pos] += 1
+                scores = {pos: score * matched[pos] / len(words) for pos, score in scores.items()}
+            positions = sorted(scores, key=lambda pos: (-scores[pos], pos))
+        elif words:
+            clause = ("(i.semantic_name LIKE ? OR i.description LIKE ? OR EXISTS "
+                      "(SELECT 1 FROM icon_tags t WHERE t.pos = i.pos AND t.tag LIKE ?))")
+            params = [p for w in words for p in (f"%{w}%",) * 3]
+            matched = " + ".join([clause] * len(words))
+            positions = [pos for (pos,) in conn.execute(
+                f"SELECT i.pos FROM icons i WHERE {matched} > 0 ORDER BY {matched} DESC, i.pos",
+                params + params)]
+
+        name = "-".join(TOKEN_RE.findall(query.lower()))
+        exact = {pos for (pos,) in conn.execute(
+            "SELECT pos FROM icons WHERE semantic_name = ? COLLATE NOCASE", (name,))} if name else set()
+        ranked = [pos for pos in positions if pos in exact] + sorted(exact - set(positions))
+        ranked += [pos for pos in positions if pos not in exact]
+        if limit is None or len(ranked) < limit:
+            seen = set(ranked)
+            ranked += [pos for (pos,) in conn.execute(
+                "SELECT pos FROM icons WHERE instr(lower(semantic_name), ?) ORDER BY pos", (query.lower(),))
+                if pos not in seen]
+        return ranked if limit is None else ranked[:limit]
+
+    def close(self):
+        self.conn.close()
+
+
+def shard_key(category) -> str:
+    """Name of the shard holding a category's icons
+
+    Plain category names are used as-is; anything else (no category, or
+    a name that isn't safe as a file name) goes to the "_other" shard.
+    """
+    if isinstance(category, str) and SHARD_NAME_RE.fullmatch(category):
+        return category
+    return "_other"
+
+
+class ShardedCatalogStore:
+    """Sharded JSON storage backend: one file per category plus a manifest
+
+    Each shard (icon-catalog.d/<category>.json) lists its icons in catalog
+    order, formatted like icon-catalog.json, so a change to one icon is a
+    small diff to one small file. The manifest holds the catalog's other
+    top-level fields, each shard's file and icon count, and the order of
+    icons across shards as runs ("ui:30"), from which load() reassembles
+    the monolithic catalog exactly. Saves rewrite only the affected shards
+    and then the manifest, which readers watch for changes.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.manifest_path = root / SHARD_MANIFEST
+
+    def exists(self) -> bool:
+        return self.manifest_path.exists()
+
+    def read_manifest(self) -> Dict:
+        with open(self.manifest_path, 'r') as f:
+            return json.load(f)
+
+    def load(self, keys: Optional[Iterable[str]] = None) -> Dict:
+        """Read the catalog back in the icon-catalog.json layout
+
+        Args:
+            keys: Only read these shards (see shard_key); the catalog then
+                  holds just their icons, still in catalog order
+        """
+        manifest = self.read_manifest()
+        shards = manifest["shards"]
+        icons_by_shard = {}
+        for key in (shards if keys is None else keys):
+            if key in shards:
+                with open(self.root / shards[key]["file"], 'r') as f, gc_paused():
+                    icons_by_shard[key] = iter(json.load(f))
+
+        icons = []
+        for run in manifest["order"]:
+            key, _, count = run.rpartition(":")
+            shard = icons_by_shard.get(key)
+            if shard is not None:
+                icons.extend(islice(shard, int(count)))
+        for shard in icons_by_shard.values():
+            icons.extend(shard)  # beyond the manifest's count: keep rather than drop them
+
+        catalog = dict(manifest["catalog"])
+        catalog["icons"] = icons
+        return catalog
+
+    def save(self, catalog: Dict, changed: Optional[Iterable[str]] = None) -> Tuple[int, int]:
+        """Write the shards that changed, then the manifest
+
+        Besides the shards named in changed, those whose icon count
+        differs from the manifest's are written, and shards that no
+        longer have icons are removed.
+
+        Args:
+            changed: Shards holding modified icons (default: all)
+
+        Returns:
+            (shards written, bytes written)
+        """
+        shards = {}
+        order = []
+        last, run = None, 0
+        for icon in catalog["icons"]:
+            key = shard_key(icon.get("category"))
+            shards.setdefault(key, []).append(icon)
+            if key == last:
+                run += 1
+            else:
+                if last is not None:
+                    order.append(f"{last}:{run}")
+                last, run = key, 1
+        if last is not None:
+            order.append(f"{last}:{run}")
+
+        try:
+            previous = self.read_manifest()["shards"]
+        except (OSError, ValueError, KeyError):
+            previous = {}
+        if changed is None:
+            dirty = set(shards)
+        else:
+            dirty = {key for key in changed if key in shards}
+            dirty.update(key for key, icons in shards.items()
+                         if previous.get(key, {}).get("icons") != len(icons))
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        written = 0
+        for key in sorted(dirty):
+            path = self.root / f"{key}.json"
+            with atomic_write(path, durable=True) as f:
+                json.dump(shards[key], f, indent=2)
+            written += path.stat().st_size
+        for key in previous.keys() - shards.keys():
+            (self.root / previous[key]["file"]).unlink(missing_ok=True)
+
+        manifest = {
+            "version": SHARD_VERSION,
+            "catalog": {k: (len(v) if k == "icons" else v) for k, v in catalog.items()},
+            "shards": {key: {"file": f"{key}.json", "icons": len(shards[key])} for key in sorted(shards)},
+            "order": order,
+        }
+        with atomic_write(self.manifest_path, durable=True) as f:
+            json.dump(manifest, f, indent=2)
+        return len(dirty), written + self.manifest_path.stat().st_size
+
+    def replace_catalog(self, catalog: Dict) -> int:
+        """Write every shard for a full catalog, removing stray shard files
+
+        Returns:
+            Number of shards
+        """
+        count, _ = self.save(catalog)
+        keep = {SHARD_MANIFEST, *(f"{shard_key(icon.get('category'))}.json" for icon in catalog["icons"])}
+        for path in self.root.glob("*.json"):
+            if path.name not in keep:
+                path.unlink()
+        return count
+
+
+class UsageLog:
+    """Append-only record of exports, folded into the history/analytics files
+
+    Each export appends one JSON line to .icon-usage.log while holding an
+    exclusive flock on it, so concurrent `icon use` runs never lose events.
+    .icon-history.json (last export per project) and .icon-analytics.json
+    (use count and projects per icon) hold the compacted aggregates; once
+    the log grows past USAGE_COMPACT_BYTES its events are folded into them
+    and it is truncated. Readers take a shared lock and apply any pending
+    events on top of the aggregates, so they always see every export.
+    """
+
+    def __init__(self, log_path: Path = USAGE_LOG_FILE, history_path: Path = HISTORY_FILE,
+                 analytics_path: Path = ANALYTICS_FILE):
+        self.log_path = log_path
+        self.history_path = history_path
+        self.analytics_path = analytics_path
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        import fcntl
+
+        with open(self.log_path, 'ab+') as log:
+            fcntl.flock(log, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield log
+            finally:
+                fcntl.flock(log, fcntl.LOCK_UN)
+
+    def append(self, project: Path, icon_names: List[str]):
+        """Record one export of icon_names to project"""
+        from datetime import datetime
+
+        line = json.dumps({
+            "timestamp": datetime.now().isoformat(),
+            "project": project.name,
+            "path": str(project),
+            "icons": icon_names,
+        }).encode() + b"\n"
+        with trace_phase("track usage", bytes=len(line)), self._locked(exclusive=True) as log:
+            end = log.seek(0, os.SEEK_END)
+            if end:
+                log.seek(end - 1)
+                if log.read(1) != b"\n":
+                    line = b"\n" + line  # end a line cut short by a crash, or this event joins it
+            log.write(line)
+            log.flush()
+            if log.tell() > USAGE_COMPACT_BYTES:
+                with trace_phase("compact usage log"):
+                    self._compact(log)
+
+    def _load_aggregates(self) -> Tuple[Dict, Dict]:
+        aggregates = []
+        for path in (self.history_path, self.analytics_path):
+            try:
+                with open(path, 'r') as f:
+                    aggregates.append(json.load(f))
+            except FileNotFoundError:
+                aggregates.append({})
+        return aggregates[0], aggregates[1]
+
+    @staticmethod
+    def _fold(history: Dict, analytics: Dict, log) -> int:
+        """Apply the log's events to the aggregates; returns how many were read"""
+        log.seek(0)
+        count = 0
+        for line in log:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by a crash mid-write
+            project_name = event["project"]
+            history[project_name] = {
+                "path": event["path"],
+                "icons": event["icons"],
+                "timestamp": event["timestamp"],
+            }
+            for icon_name in event["icons"]:
+                if icon_name not in analytics:
+                    analytics[icon_name] = {"count": 0, "projects": []}
+                analytics[icon_name]["count"] += 1
+                if project_name not in analytics[icon_name]["projects"]:
+                    analytics[icon_name]["projects"].append(project_name)
+            count += 1
+        return count
+
+    def _compact(self, log):
+        """Fold the log into the aggregate files and truncate it (caller holds LOCK_EX)"""
+        history, analytics = self._load_aggregates()
+        if self._fold(history, analytics, log):
+            with atomic_write(self.history_path) as f:
+                json.dump(history, f, indent=2)
+            with atomic_write(self.analytics_path) as f:
+                json.dump(analytics, f, indent=2)
+        log.truncate(0)
+
+    def compact(self):
+        """Fold pending events into the aggregates now"""
+        with self._locked(exclusive=True) as log:
+            self._compact(log)
+
+    def aggregates(self) -> Tuple[Dict, Dict]:
+        """Current (history, analytics): the compacted files plus pending events"""
+        if not self.log_path.exists():
+            return self._load_aggregates()
+        with self._locked(exclusive=False) as log:
+            history, analytics = self._load_aggregates()
+            self._fold(history, analytics, log)
+        return history, analytics
+
+
+class IconManager:
+    def __init__(self, store: Optional[str] = None):
+        self.store = store or os.environ.get("ICONICS_STORE", "json")
+        self._db = SQLiteCatalogStore(CATALOG_DB_FILE) if self.store == "sqlite" else None
+        self._shards = ShardedCatalogStore(SHARD_DIR) if self.store == "sharded" else None
+        self._catalog_path = STORE_FILES.get(self.store, CATALOG_FILE)
+        self._cache_path = SHARD_CACHE_FILE if self._shards is not None else CATALOG_CACHE_FILE
+        self._partial = False  # only some shards loaded (see load_categories)
+        self._dirty_ids = set()
+        self._batch = None
+        self._cached_indexes = None
+        self._search_blob = None
+        self._postings = None
+        self._phash_tree = None
+        self._stats = None  # stats summary, kept current across add_icon (see _update_stats)
+        self._stats_ids = set()  # dirty ids already applied to it
+        self.usage = UsageLog()
+        self._lock_file = None
+        self._lock_depth = 0
+        self._disk_stamp = None
+        self._db_revision = None  # sqlite revision the loaded catalog reflects
+        self._unsaved = {}  # icons changed without loading the catalog (sqlite), by id
+
+    def __getattr__(self, name: str):
+        # Only called for attributes not set yet: the catalog and its
+        # indexes are loaded on first access, so commands that never touch
+        # them (history, popular, md) don't pay for the load
+        if name in LAZY_ATTRS and "catalog" not in self.__dict__:
+            self._load()
+            return getattr(self, name)
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def _load(self):
+        """Load the catalog and build its indexes (see __getattr__)"""
         self.catalog = self.load_catalog()
+        self._build_indexes()
+        if not NAMES_FILE.exists():
+            self._write_completion_files()
+
+    def _db_only(self) -> bool:
+        """Whether to answer from the sqlite store without loading the catalog
+
+        True with the sqlite store until something loads the catalog, so
+        search, info and add touch only the rows they need. An empty
+        database is left to the full load, which seeds it.
+        """
+        return self._db is not None and "catalog" not in self.__dict__ and not self._db.is_empty()
 
     def load_catalog(self) -> Dict:
-        """Load icon catalog from JSON file"""
+        """Load icon catalog from the configured store
+
+        With the sqlite store the catalog is read from icon-catalog.db,
+        and with the sharded store from icon-catalog.d/; either is seeded
+        from icon-catalog.json the first time it is used.
+        """
+        if self._db is not None:
+            if self._db.is_empty():
+                self._db.replace_catalog(self._load_json_catalog())
+                print(f"✓ Created {CATALOG_DB_FILE} from {CATALOG_FILE}")
+            self._cached_indexes = None
+            with trace_phase("load catalog", source="sqlite"):
+                self._db_revision = self._db.revision()
+                return self._db.load()
+        if self._shards is not None:
+            if not self._shards.exists():
+                count = self._shards.replace_catalog(IconManager("json").load_catalog())
+                print(f"✓ Created {SHARD_DIR} ({count} shards) from {CATALOG_FILE}")
+            with trace_phase("load catalog", source="sharded"):
+                return self._load_sharded_catalog()
+        with trace_phase("load catalog"):
+            return self._load_json_catalog()
+
+    def _load_json_catalog(self) -> Dict:
+        """Load icon catalog from JSON file
+
+        Uses the marshal sidecar (.icon-catalog.cache) when it matches the
+        JSON file's inode, mtime and size, and regenerates it otherwise (see
+        _load_with_sidecar).
+        """
         if CATALOG_FILE.exists():
-            with open(CATALOG_FILE, 'r') as f:
-                return json.load(f)
+            st = CATALOG_FILE.stat()
+
+            def read():
+                with trace_phase("json.load", bytes=st.st_size), open(CATALOG_FILE, 'r') as f, gc_paused():
+                    return json.load(f)
+
+            return self._load_with_sidecar(st, read)
         return {
             "version": "1.0",
             "icons": [],
             "categories": ["files", "network", "security", "tools", "ui", "emoji", "development"]
         }
 
-    def save_catalog(self):
-        """Save catalog to JSON file"""
-        with open(CATALOG_FILE, 'w') as f:
-            json.dump(self.catalog, f, indent=2)
-        print(f"✓ Catalog saved to {CATALOG_FILE}")
+    def _load_sharded_catalog(self) -> Dict:
+        """Load icon catalog from the shards in icon-catalog.d/
+
+        Keeps its own marshal sidecar (.icon-shards.cache), matched
+        against the manifest, which every save rewrites.
+        """
+        st = self._catalog_path.stat()
+
+        def read():
+            with trace_phase("read shards"):
+                return self._shards.load()
+
+        return self._load_with_sidecar(st, read)
+
+    def _load_with_sidecar(self, st: os.stat_result, read: Callable[[], Dict]) -> Dict:
+        """Return the catalog from the sidecar if it matches st, else from read()
+
+        The sidecar also carries the prebuilt lookup indexes, which
+        _build_indexes picks up instead of rebuilding them, and the search
+        index, which stays encoded until the first search or mutation. On
+        a miss the sidecar and the completion lists are regenerated.
+        """
+        self._disk_stamp = self._catalog_file_stamp(st)
+        cached = self._read_catalog_cache(st)
+        if cached is not None:
+            catalog, self._cached_indexes, self._search_blob = cached
+            return catalog
+        self.catalog = read()
+        self._build_indexes()
+        self._load_search_index()
+        self._write_catalog_cache(st)
+        self._write_completion_files()  # the catalog changed outside save_catalog (edit, git pull)
+        self._cached_indexes = tuple(getattr(self, name) for name in INDEX_ATTRS)
+        return self.catalog
+
+    def load_categories(self, categories: Iterable[str]):
+        """Load only the shards holding these categories (sharded store)
+
+        For read-only commands scoped to categories (list, export-category):
+        the catalog then holds just those icons and can't be saved. Does
+        nothing with other stores, once the catalog is loaded, or before the
+        shards exist (the full load creates them).
+        """
+        if self._shards is None or "catalog" in self.__dict__ or not self._shards.exists():
+            return
+        keys = {shard_key(category) for category in categories}
+        self._disk_stamp = self._catalog_file_stamp()
+        with trace_phase("load catalog", source="sharded", shards=len(keys)):
+            self.catalog = self._shards.load(keys)
+        self._partial = True
+        self._build_indexes()
+
+    def _catalog_file_stamp(self, st: Optional[os.stat_result] = None) -> Optional[Tuple[int, int, int]]:
+        """Identity of the store's file on disk: inode, mtime and size
+
+        The file is the JSON catalog, or the manifest for the sharded
+        store. Every save renames a new file into place, so the inode alone
+        changes on each write even when mtime granularity is coarse.
+        """
+        if st is None:
+            try:
+                st = self._catalog_path.stat()
+            except FileNotFoundError:
+                return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    @contextmanager
+    def locked(self):
+        """Hold the catalog's advisory lock for a load-modify-save sequence
+
+        Takes an exclusive flock on .icon-catalog.lock, waiting for other
+        writers. If the catalog changed in its store since this manager
+        loaded it and nothing has been modified in memory yet, it is
+        reloaded first, so the changes made in the block apply to the
+        latest version. Re-entrant; save_catalog takes it too.
+        """
+        import fcntl
+
+        if self._lock_depth == 0:
+            self._lock_file = open(CATALOG_LOCK_FILE, 'a')
+            with trace_phase("wait for lock"):
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            if not self._dirty_ids and self._batch is None and self._store_changed():
+                self.reload()
+        self._lock_depth += 1
+        try:
+            yield
+        finally:
+            self._lock_depth -= 1
+            if self._lock_depth == 0:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                self._lock_file.close()
+                self._lock_file = None
+
+    def _store_changed(self) -> bool:
+        """Whether the store was written since the catalog was loaded from it"""
+        if self._db is not None:
+            return "catalog" in self.__dict__ and self._db.revision() != self._db_revision
+        return self._catalog_file_stamp() != self._disk_stamp
+
+    def reload(self):
+        """Discard the in-memory catalog and load it again from the store"""
+        self._dirty_ids.clear()
+        self._unsaved.clear()
+        self._cached_indexes = None
+        self._search_blob = None
+        self._postings = None
+        self._stats = None
+        self._partial = False
+        self.catalog = self.load_catalog()
+        self._build_indexes()
+
+    def _cache_header(self, st: os.stat_result) -> bytes:
+        """Sidecar header identifying the JSON file state it was built from
+
+        Includes the inode: every save renames a new file into place, so two
+        same-size saves within the mtime granularity still differ.
+        """
+        return CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, sys.version_info[0],
+                                 sys.version_info[1], st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _read_catalog_cache(self, st: os.stat_result) -> Optional[tuple]:
+        """Return (catalog, indexes, search blob) if the sidecar is current, else None"""
+        try:
+            with trace_phase("read sidecar") as phase, open(self._cache_path, 'rb') as f:
+                if f.read(CACHE_HEADER.size) != self._cache_header(st):
+                    phase["stale"] = True
+                    return None
+                data = f.read()
+                phase["bytes"] = CACHE_HEADER.size + len(data)
+                with gc_paused():
+                    catalog, indexes, search_blob = marshal.loads(data)
+                return catalog, indexes, search_blob
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+    def _write_catalog_cache(self, st: os.stat_result):
+        """Write the catalog and indexes to the sidecar for the JSON file described by st
+
+        Best effort: a read-only checkout simply keeps parsing the JSON.
+        """
+        if self._postings is None and self._search_blob is None:
+            self._load_search_index()
+        if self._postings is None:
+            search_blob = self._search_blob
+        else:
+            search_blob = marshal.dumps(tuple(getattr(self, name) for name in SEARCH_INDEX_ATTRS))
+        indexes = tuple(getattr(self, name) for name in INDEX_ATTRS)
+        try:
+            with trace_phase("write sidecar") as phase, atomic_write(self._cache_path, 'wb') as f:
+                data = marshal.dumps((self.catalog, indexes, search_blob))
+                f.write(self._cache_header(st))
+                f.write(data)
+                phase["bytes"] = CACHE_HEADER.size + len(data)
+        except OSError:
+            pass
+
+    def _write_completion_files(self):
+        """Write the sorted name list and category list used by shell completion
+
+        One entry per line, names in byte order so completion can prefix
+        filter them with look(1) without starting Python. Best effort,
+        like the sidecar.
+        """
+        if "catalog" in self.__dict__:
+            names = sorted(name for name, ids in self._by_semantic.items() if ids and name)
+            categories = self.catalog["categories"]
+        else:
+            names, categories = self._db.semantic_names(), self._db.categories()
+        try:
+            with trace_phase("completion files"):
+                with atomic_write(NAMES_FILE) as f:
+                    f.write("".join(f"{name}\n" for name in names))
+                with atomic_write(CATEGORIES_FILE) as f:
+                    f.write("".join(f"{category}\n" for category in categories))
+        except OSError:
+            pass
+
+    def save_catalog(self, quiet: bool = False):
+        """Save catalog to the configured store
+
+        The JSON store writes to a temp file in the same directory, fsyncs
+        it and renames it over the catalog, so an interrupted save never
+        leaves a truncated file behind. The save runs under the catalog
+        lock and raises CatalogConflictError instead of overwriting a
+        catalog that another process saved after this one loaded it (for
+        sqlite: wrote to the database since). The sqlite store writes only
+        the icons changed since the last save (without loading the catalog
+        if add_icon didn't need it), and the sharded store only their shards
+        (plus its manifest).
+        Inside a batch() the save is deferred until the batch commits.
+        Every save also refreshes the shell completion lists
+        (.icon-names, .icon-categories) and the stats summary
+        (.icon-stats.json), which is rewritten if add_icon kept it current
+        and removed otherwise.
+
+        Args:
+            quiet: Don't print the "Catalog saved" line (chunked imports)
+        """
+        if self._batch is not None:
+            self._batch["dirty"] = True
+            return
+        if self._partial:
+            raise RuntimeError("only some shards of the catalog are loaded; it can't be saved")
+
+        with self.locked(), trace_phase("save catalog") as phase:
+            if self._db is not None:
+                phase["source"] = "sqlite"
+                if "catalog" in self.__dict__:
+                    icons = [self._by_id[i] for i in self._dirty_ids]
+                else:
+                    icons = list(self._unsaved.values())
+                self._db_revision = self._db.save_icons(icons, self._db_revision)
+                self._save_stats()
+                self._dirty_ids.clear()
+                self._unsaved.clear()
+                self._write_completion_files()
+                if not quiet:
+                    print(f"✓ Catalog saved to {CATALOG_DB_FILE}")
+                return
+
+            if self._catalog_file_stamp() != self._disk_stamp:
+                raise CatalogConflictError(
+                    f"{self._catalog_path} was changed by another process since it was loaded; "
+                    f"not overwriting it. Re-run the command to apply it to the current catalog.")
+            if self._shards is not None:
+                phase["source"] = "sharded"
+                changed = {shard_key(self._by_id[i].get("category")) for i in self._dirty_ids if i in self._by_id}
+                with trace_phase("write shards"):
+                    shards, phase["bytes"] = self._shards.save(self.catalog, changed)
+            else:
+                with trace_phase("json.dump"), atomic_write(CATALOG_FILE, durable=True) as f:
+                    json.dump(self.catalog, f, indent=2)  # streamed: no full-size string in memory
+            st = self._catalog_path.stat()
+            phase.setdefault("bytes", st.st_size)
+            self._disk_stamp = self._catalog_file_stamp(st)
+            self._save_stats()
+            self._dirty_ids.clear()
+            self._write_catalog_cache(st)
+            self._write_completion_files()
+        if quiet:
+            return
+        if self._shards is not None:
+            print(f"✓ Catalog saved to {SHARD_DIR} ({shards} shard(s) written)")
+        else:
+            print(f"✓ Catalog saved to {CATALOG_FILE}")
+
+    @contextmanager
+    def batch(self):
+        """Group catalog mutations into a single transaction
+
+        While the batch is open, add_icon only updates the in-memory catalog
+        and queues its symlink. On a clean exit the symlinks are created and
+        the catalog is written once; if the block raises, the in-memory
+        catalog is restored and nothing is written to disk.
+
+        Nested batches join the outermost one.
+        """
+        import copy
+
+        if self._batch is not None:
+            yield
+            return
+
+        snapshot = copy.deepcopy(self.catalog)
+        self._batch = {"symlinks": {}, "dirty": False}
+        try:
+            yield
+        except BaseException:
+            self.catalog = snapshot
+            self._batch = None
+            self._dirty_ids.clear()
+            self._stats = None
+            self._build_indexes()
+            raise
+
+        pending, self._batch = self._batch, None
+        if pending["dirty"]:
+            for icon_id, semantic_name, category, filename in pending["symlinks"].values():
+                self.create_symlink(icon_id, semantic_name, category, filename)
+            self.save_catalog()
+
+    def _build_indexes(self):
+        """Build lookup indexes over catalog["icons"]
+
+        Icons are keyed by id; tags (lowercased), categories and semantic
+        names map to sets of ids. _pos records each id's list position so
+        multi-icon lookups can return results in catalog order.
+
+        Indexes loaded from the catalog sidecar are used as-is. A rebuild
+        drops the search index, which _load_search_index rebuilds on demand.
+        """
+        self._semantic_sorted = None
+        self._phash_tree = None  # built on first similar() query
+        if self._cached_indexes is not None:
+            for name, value in zip(INDEX_ATTRS, self._cached_indexes):
+                setattr(self, name, value)
+            self._cached_indexes = None
+            return
+        self._postings = None
+        self._search_blob = None
+
+        self._by_id = {}
+        self._pos = {}
+        self._by_tag = {}
+        self._by_category = {}
+        self._by_semantic = {}
+        self._semantic_names = []
+        self._by_size = {}
+
+        with trace_phase("build indexes"):
+            for pos, icon in enumerate(self.catalog["icons"]):
+                self._semantic_names.append("")
+                self._index_icon(icon, pos)
+
+    def _load_search_index(self):
+        """Make the ranked search index available
+
+        The index maps each term to {position: (tf in semanticName, tf in
+        tags, tf in description)}, with per-icon field lengths for BM25 and
+        a trigram index over the vocabulary for typo tolerance. It is
+        decoded from the sidecar blob if there is one and built from the
+        catalog otherwise.
+        """
+        if self._postings is not None:
+            return
+        if "catalog" not in self.__dict__:
+            self._load()  # a sidecar miss builds the search index while loading
+            if self._postings is not None:
+                return
+        self._search_terms = None
+        if self._search_blob is not None:
+            with trace_phase("decode search index", bytes=len(self._search_blob)), gc_paused():
+                values = marshal.loads(self._search_blob)
+            for name, value in zip(SEARCH_INDEX_ATTRS, values):
+                setattr(self, name, value)
+            self._search_blob = None
+            return
+
+        self._postings = {}
+        self._doc_lens = {}
+        self._field_totals = [0, 0, 0]
+        self._trigrams = {}
+        with trace_phase("build search index"), gc_paused():
+            for pos, icon in enumerate(self.catalog["icons"]):
+                if self._by_id.get(icon["id"]) is icon:
+                    self._search_add(icon, pos)
+
+    def _index_icon(self, icon: Dict, pos: int):
+        """Add a single icon (stored at catalog position pos) to the indexes"""
+        icon_id = icon["id"]
+        semantic = icon.get("semanticName", "").lower()
+        self._semantic_names[pos] = semantic
+        if icon_id in self._by_id:
+            return  # duplicate id: first entry wins, as with a linear scan
+        self._by_id[icon_id] = icon
+        self._pos[icon_id] = pos
+        for tag in icon.get("tags", []):
+            self._by_tag.setdefault(tag.lower(), set()).add(icon_id)
+        self._by_category.setdefault(icon.get("category"), set()).add(icon_id)
+        self._by_semantic.setdefault(semantic, set()).add(icon_id)
+        self._semantic_sorted = None
+        size = icon_size(icon)
+        if size is not None:
+            self._by_size.setdefault(size, set()).add(icon_id)
+        if self._phash_tree is not None:
+            phash = self._icon_phash(icon)
+            if phash is not None:
+                self._phash_tree.add(phash, icon_id)
+            elif "phash" not in (icon.get("image") or {}):
+                self._phash_tree = None  # similar() hashes the icon, then rebuilds the tree
+
+        if self._postings is not None:
+            self._search_add(icon, pos)
+        else:
+            self._search_blob = None  # stale; rebuilt on next use
+
+    def _search_add(self, icon: Dict, pos: int):
+        """Add a single icon to the search index"""
+        fields = self._search_fields(icon)
+        lens = tuple(len(tokens) for tokens in fields)
+        self._doc_lens[pos] = lens
+        for i, length in enumerate(lens):
+            self._field_totals[i] += length
+        counts = {}
+        for i, tokens in enumerate(fields):
+            for term in tokens:
+                counts.setdefault(term, [0, 0, 0])[i] += 1
+        for term, tfs in counts.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                for gram in trigrams(term):
+                    self._trigrams.setdefault(gram, set()).add(term)
+                self._search_terms = None
+            postings[pos] = tuple(tfs)
+
+    def _unindex_icon(self, icon: Dict):
+        """Remove a single icon from the indexes"""
+        icon_id = icon["id"]
+        pos = self._pos[icon_id]
+        for tag in icon.get("tags", []):
+            self._by_tag.get(tag.lower(), set()).discard(icon_id)
+        self._by_category.get(icon.get("category"), set()).discard(icon_id)
+        self._by_semantic.get(icon.get("semanticName", "").lower(), set()).discard(icon_id)
+        self._semantic_names[pos] = ""
+        del self._by_id[icon_id]
+        self._semantic_sorted = None
+        size = icon_size(icon)
+        if size is not None:
+            self._by_size.get(size, set()).discard(icon_id)
+        phash = self._icon_phash(icon)
+        if phash is not None and self._phash_tree is not None:
+            self._phash_tree.remove(phash, icon_id)
+
+        if self._postings is not None:
+            self._search_remove(icon, pos)
+        else:
+            self._search_blob = None
+
+    def _search_remove(self, icon: Dict, pos: int):
+        """Remove a single icon from the search index"""
+        for i, length in enumerate(self._doc_lens.pop(pos)):
+            self._field_totals[i] -= length
+        for term in set().union(*self._search_fields(icon)):
+            postings = self._postings[term]
+            del postings[pos]
+            if not postings:
+                del self._postings[term]
+                for gram in trigrams(term):
+                    self._trigrams[gram].discard(term)
+                self._search_terms = None
+
+    @staticmethod
+    def _search_fields(icon: Dict) -> Tuple[List[str], List[str], List[str]]:
+        """Tokenized semanticName, tags and description of an icon"""
+        return (tokenize(icon.get("semanticName", "")),
+                tokenize(" ".join(icon.get("tags", []))),
+                tokenize(icon.get("description", "")))
+
+    def _icons_for_ids(self, ids: Iterable[str]) -> List[Dict]:
+        """Return icons for the given ids in catalog order"""
+        icons = self.catalog["icons"]
+        return [icons[pos] for pos in sorted(self._pos[i] for i in ids)]
 
     def find_icon_by_id(self, icon_id: str) -> Optional[Dict]:
         """Find icon in catalog by numeric ID"""
-        for icon in self.catalog["icons"]:
-            if icon["id"] == icon_id:
-                return icon
-        return None
+        return self._by_id.get(icon_id)
 
     def find_icons_by_tag(self, tag: str) -> List[Dict]:
         """Find all icons matching a tag"""
-        tag_lower = tag.lower()
-        return [icon for icon in self.catalog["icons"]
-                if tag_lower in [t.lower() for t in icon.get("tags", [])]]
+        return self._icons_for_ids(self._by_tag.get(tag.lower(), ()))
+
+    def find_icons_by_category(self, category: str) -> List[Dict]:
+        """Find all icons in a category"""
+        return self._icons_for_ids(self._by_category.get(category, ()))
 
     def find_icons_by_semantic(self, name: str) -> List[Dict]:
         """Find icons by semantic name"""
         name_lower = name.lower()
-        return [icon for icon in self.catalog["icons"]
-                if name_lower in icon.get("semanticName", "").lower()]
-
-    def search(self, query: str) -> List[Dict]:
-        """Search icons by tag or semantic name"""
-        results = []
-        results.extend(self.find_icons_by_tag(query))
-        results.extend(self.find_icons_by_semantic(query))
-        # Remove duplicates
-        seen = set()
-        unique_results = []
-        for icon in results:
-            if icon["id"] not in seen:
-                seen.add(icon["id"])
-                unique_results.append(icon)
-        return unique_results
+        icons = self.catalog["icons"]
+        return [icons[pos] for pos, semantic in enumerate(self._semantic_names)
+                if name_lower in semantic]
+
+    def find_icons_by_prefix(self, prefix: str) -> List[Dict]:
+        """Find icons whose semantic name starts with prefix"""
+        if self._semantic_sorted is None:
+            self._semantic_sorted = sorted(self._by_semantic)
+        names = self._semantic_sorted
+        prefix = prefix.lower()
+        ids = set()
+        for i in range(bisect.bisect_left(names, prefix), len(names)):
+            if not names[i].startswith(prefix):
+                break
+            ids.update(self._by_semantic[names[i]])
+        return self._icons_for_ids(ids)
+
+    def resolve_icon(self, name: str) -> Optional[Dict]:
+        """Resolve a semantic name to one icon
+
+        An exact (case-insensitive) semantic name match wins; otherwise the
+        first icon whose semantic name contains name is returned.
+        """
+        return self.resolve_icons([name]).get(name)
+
+    def resolve_icons(self, names: List[str]) -> Dict[str, Dict]:
+        """Resolve several semantic names at once, as resolve_icon does
+
+        Exact matches are hash lookups; the names left over share a single
+        scan for substring matches. Names that match nothing are absent
+        from the result.
+        """
+        resolved = {}
+        pending = {}
+        for name in names:
+            exact = self._by_semantic.get(name.lower())
+            if exact:
+                resolved[name] = self._icons_for_ids(exact)[0]
+            else:
+                pending[name] = name.lower()
+
+        icons = self.catalog["icons"]
+        for pos, semantic in enumerate(self._semantic_names):
+            if not pending:
+                break
+            for name, name_lower in list(pending.items()):
+                if name_lower in semantic:
+                    resolved[name] = icons[pos]
+                    del pending[name]
+        return resolved
+
+    def find_icons_by_size(self, size: Optional[int] = None,
+                           min_size: Optional[int] = None) -> List[Dict]:
+        """Find scanned icons of an exact pixel size and/or at least min_size"""
+        return self._icons_for_ids(self._ids_with_size(size, min_size))
+
+    def _ids_with_size(self, size: Optional[int], min_size: Optional[int]) -> set:
+        """Ids of icons passing the size filters (sizes come from scan-images)"""
+        ids = set()
+        for icon_size_px, size_ids in self._by_size.items():
+            if (size is None or icon_size_px == size) and (min_size is None or icon_size_px >= min_size):
+                ids.update(size_ids)
+        return ids
+
+    def search(self, query: str, limit: Optional[int] = None,
+               size: Optional[int] = None, min_size: Optional[int] = None) -> List[Dict]:
+        """Search icons by tag, semantic name or description, best match first
+
+        Each query word matches index terms exactly, by prefix, or (when
+        neither matches) by trigram similarity to tolerate typos. Icons are
+        scored with BM25 over semanticName, tags and description, scaled by
+        the fraction of query words they match; an exact semantic name match
+        always ranks first. Icons whose semantic name merely contains the
+        query follow after all scored results.
+
+        With the sqlite store the words are matched by an FTS5 query
+        instead, answered without loading the catalog unless a size filter
+        needs it. It ranks the same way but doesn't match misspelled words.
+
+        Args:
+            query: One or more search words; may be empty when filtering by size
+            limit: Return only the top N results (default: all)
+            size: Only icons of exactly this many pixels (larger dimension)
+            min_size: Only icons at least this many pixels
+        """
+        import heapq
+
+        allowed = None
+        if size is not None or min_size is not None:
+            allowed = {self._pos[i] for i in self._ids_with_size(size, min_size)}
+            if not query.strip():
+                icons = self.catalog["icons"]
+                return [icons[pos] for pos in sorted(allowed)][:limit]
+
+        if self._db is not None:
+            icons = None if self._db_only() else self.catalog["icons"]  # loading seeds an empty database
+            positions = self._db.search(query, limit if allowed is None else None)
+            if allowed is not None:
+                positions = [pos for pos in positions if pos in allowed][:limit]
+            if icons is None:
+                return self._db.icons_at(positions)
+            return [icons[pos] for pos in positions]
+
+        self._load_search_index()
+        words = tokenize(query) or TOKEN_RE.findall(query.lower())
+        total_docs = len(self._doc_lens)
+        if not words or not total_docs:
+            return []
+        avg_lens = [total / total_docs or 1.0 for total in self._field_totals]
+
+        scores = {}
+        matched = {}
+        for word in words:
+            word_scores = {}
+            for term, weight in self._expand_search_term(word):
+                postings = self._postings[term]
+                df = len(postings)
+                idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5)) * weight
+                for pos, tfs in postings.items():
+                    score = 0.0
+                    for tf, length, avg_len, field_weight in zip(
+                            tfs, self._doc_lens[pos], avg_lens, SEARCH_FIELD_WEIGHTS):
+                        if tf:
+                            norm = 1 - BM25_B + BM25_B * length / avg_len
+                            score += field_weight * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+                    score *= idf
+                    if score > word_scores.get(pos, 0.0):
+                        word_scores[pos] = score
+            for pos, score in word_scores.items():
+                scores[pos] = scores.get(pos, 0.0) + score
+                matched[pos] = matched.get(pos, 0) + 1
+
+        for pos, score in scores.items():
+            scores[pos] = score * matched[pos] / len(words)
+
+        # Exact semantic name matches first, substring-only matches last
+        name = "-".join(TOKEN_RE.findall(query.lower()))
+        top = max(scores.values(), default=0.0) + 1.0
+        for icon_id in self._by_semantic.get(name, ()):
+            pos = self._pos[icon_id]
+            scores[pos] = top + scores.get(pos, 0.0)
+        query_lower = query.lower()
+        for pos, semantic in enumerate(self._semantic_names):
+            if query_lower in semantic and pos not in scores:
+                scores[pos] = 0.0
+        if allowed is not None:
+            scores = {pos: score for pos, score in scores.items() if pos in allowed}
+
+        count = len(scores) if limit is None else limit
+        ranked = heapq.nlargest(count, scores, key=lambda pos: (scores[pos], -pos))
+        icons = self.catalog["icons"]
+        return [icons[pos] for pos in ranked]
+
+    def _expand_search_term(self, word: str) -> List[Tuple[str, float]]:
+        """Index terms a query word should match, with a weight for each
+
+        The word itself scores fully and longer terms it prefixes score a
+        little less. If neither exists, terms sharing enough trigrams with
+        the word are used instead, weighted by their similarity.
+        """
+        expansions = []
+        if word in self._postings:
+            expansions.append((word, 1.0))
+
+        if len(word) >= 2:
+            if self._search_terms is None:
+                self._search_terms = sorted(self._postings)
+            terms = self._search_terms
+            start = bisect.bisect_left(terms, word)
+            for term in terms[start:start + SEARCH_PREFIX_LIMIT]:
+                if not term.startswith(word):
+                    break
+                if term != word:
+                    expansions.append((term, 0.5 + 0.4 * len(word) / len(term)))
+
+        if expansions or len(word) < 3:
+            return expansions
+
+        word_grams = trigrams(word)
+        shared = {}
+        for gram in word_grams:
+            for term in self._trigrams.get(gram, ()):
+                shared[term] = shared.get(term, 0) + 1
+        for term, count in shared.items():
+            similarity = count / (len(word_grams) + len(trigrams(term)) - count)
+            if similarity >= SEARCH_TYPO_MIN_SIMILARITY:
+                expansions.append((term, 0.8 * similarity))
+        return expansions
 
     def add_icon(self, icon_id: str, semantic_name: str, tags: List[str],
                  category: str, description: str = ""):
-        """Add or update icon in catalog"""
-        existing = self.find_icon_by_id(icon_id)
+        """Add or update icon in catalog
+
+        An update keeps the icon's file (which may be a shared blob after
+        dedupe --collapse) and its usage. With the sqlite store and no
+        catalog loaded yet, only the icon's own rows are read and written.
+        """
+        db_only = self._db_only()
+        if db_only:
+            existing_pos, existing = self._db.icon_by_id(icon_id) or (None, None)
+        else:
+            existing = self.find_icon_by_id(icon_id)
+            if self._search_blob is not None:
+                self._load_search_index()  # cheap to decode now, costly to rebuild later
+        stats = self._stats_for_update()
 
         icon_data = {
             "id": icon_id,
-            "filename": f"raw/{icon_id}.png",
+            "filename": existing.get("filename", f"raw/{icon_id}.png") if existing else f"raw/{icon_id}.png",
             "semanticName": semantic_name,
             "tags": tags,
             "category": category,
             "description": description,
             "usedIn": existing.get("usedIn", []) if existing else []
         }
-
-        if existing:
+        image = self._new_image_info(icon_data["filename"], existing and existing.get("image"))
+        if image is not None:
+            icon_data["image"] = image  # makes the icon findable by size
+
+        if db_only:
+            # Nothing in memory to index; save_catalog writes the rows
+            idx = existing_pos if existing else self._db.next_position()
+            self._unsaved[icon_id] = icon_data
+        elif existing:
             # Update existing
-            idx = self.catalog["icons"].index(existing)
+            idx = self._pos[icon_id]
+            self._unindex_icon(existing)
             self.catalog["icons"][idx] = icon_data
-            print(f"✓ Updated icon {icon_id} ({semantic_name})")
+            self._index_icon(icon_data, idx)
         else:
             # Add new
+            idx = len(self.catalog["icons"])
             self.catalog["icons"].append(icon_data)
-            print(f"✓ Added icon {icon_id} ({semantic_name})")
-
-        # Create symlink in catalog directory
-        self.create_symlink(icon_id, semantic_name, category)
+            self._semantic_names.append("")
+            self._index_icon(icon_data, idx)
+        print(f"✓ {'Updated' if existing else 'Added'} icon {icon_id} ({semantic_name})")
+        if stats is not None:
+            self._update_stats(existing, icon_data, idx)
+        self._dirty_ids.add(icon_id)
+        if self._stats is not None:
+            self._stats_ids.add(icon_id)
+
+        # Create symlink in catalog directory (deferred inside a batch)
+        if self._batch is not None:
+            self._batch["symlinks"][(category, semantic_name)] = (icon_id, semantic_name, category,
+                                                                  icon_data["filename"])
+        else:
+            self.create_symlink(icon_id, semantic_name, category, icon_data["filename"])
         self.save_catalog()
 
-    def create_symlink(self, icon_id: str, semantic_name: str, category: str):
-        """Create symlink in catalog/category/ directory"""
+    @staticmethod
+    def _new_image_info(filename: str, previous: Optional[Dict] = None) -> Optional[Dict]:
+        """Image info for an icon file being (re)added
+
+        Reuses the previous results (perceptual hash, optimize record) when
+        the file's contents are unchanged; otherwise the hash is left for
+        similar() to compute when it is first needed. Returns None if the
+        file doesn't exist.
+        """
+        path = ICON_DIR / filename
+        try:
+            image = read_image_info(path)
+        except OSError:
+            return None
+        if previous and previous.get("sha256") == image["sha256"]:
+            return {**previous, **image}
+        return image
+
+    def create_symlink(self, icon_id: str, semantic_name: str, category: str,
+                       filename: Optional[str] = None, quiet: bool = False):
+        """Create symlink in catalog/category/ directory
+
+        Args:
+            filename: Source path relative to the library root
+                      (default: raw/<icon_id>.png)
+            quiet: Don't print a line for the new symlink
+        """
         category_dir = CATALOG_DIR / category
         category_dir.mkdir(parents=True, exist_ok=True)
 
-        source = RAW_DIR / f"{icon_id}.png"
+        filename = filename or f"raw/{icon_id}.png"
+        source = ICON_DIR / filename
         target = category_dir / f"{semantic_name}.png"
 
         if target.exists() or target.is_symlink():
             target.unlink()
 
         if source.exists():
-            target.symlink_to(f"../../raw/{icon_id}.png")
-            print(f"  → Created symlink: catalog/{category}/{semantic_name}.png")
+            target.symlink_to(f"../../{filename}")
+            if not quiet:
+                print(f"  → Created symlink: catalog/{category}/{semantic_name}.png")
 
     def list_category(self, category: str):
         """List all icons in a category"""
-        icons = [icon for icon in self.catalog["icons"]
-                 if icon.get("category") == category]
+        icons = self.find_icons_by_category(category)
 
         if not icons:
             print(f"No icons found in category '{category}'")
@@ -135,105 +1915,377 @@ class IconManager:
             tags_str = ", ".join(icon.get("tags", []))
             print(f"  {icon['semanticName']:20} (#{icon['id']})  Tags: {tags_str}")
 
-    def export_to_project(self, project_path: str, icon_names: List[str]):
-        """Export icons to a project's .github/assets/icons/ directory"""
-        project = Path(project_path)
-        icon_dir = project / ".github" / "assets" / "icons"
-        icon_dir.mkdir(parents=True, exist_ok=True)
+    def export_to_project(self, project_path: str, icon_names: List[str], link: str = "copy",
+                          size: Optional[str] = None, markdown: bool = False):
+        """Export icons to a project's .github/assets/icons/ directory
 
-        exported = []
+        Args:
+            project_path: Project directory
+            icon_names: Semantic names (exact match, else first substring match)
+            link: How to place files: "copy", "hard" or "reflink"
+            size: Export resized copies, e.g. "24" or "2x" (see export_icons)
+            markdown: Also print markdown snippets for the exported icons
+        """
+        with trace_phase("resolve names", names=len(icon_names)):
+            resolved = self.resolve_icons(icon_names)
+        icons = []
         for name in icon_names:
-            # Find icon by semantic name
-            icons = self.find_icons_by_semantic(name)
-            if not icons:
+            if name in resolved:
+                icons.append(resolved[name])
+            else:
                 print(f"✗ Icon '{name}' not found in catalog")
-                continue
+        self.export_icons(project_path, icons, link, size, markdown)
+
+    def export_icons(self, project_path: str, icons: List[Dict], link: str = "copy",
+                     size: Optional[str] = None, markdown: bool = False):
+        """Export resolved catalog icons to a project
+
+        Files are placed by a thread pool; destinations whose contents
+        already match are left alone. Usage is recorded once for the whole
+        export, as a single append to the usage log; the catalog itself is
+        not rewritten.
 
-            icon = icons[0]  # Take first match
-            source = ICON_DIR / icon["filename"]
-            target = icon_dir / f"{icon['semanticName']}.png"
+        Args:
+            size: Export resized copies instead ("24" for 24px, "2x" for
+                  double size), named <name>-24px.png / <name>@2x.png;
+                  see derive()
+            markdown: Also print a markdown image snippet per exported icon,
+                      relative to the current directory
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        project = Path(project_path)
+        icon_dir = project / ".github" / "assets" / "icons"
+        icon_dir.mkdir(parents=True, exist_ok=True)
 
-            if source.exists():
-                shutil.copy2(source, target)
-                exported.append(icon['semanticName'])
+        # One job per destination file; the first icon claiming a name wins
+        jobs = {}
+        for icon in icons:
+            jobs.setdefault(icon['semanticName'], icon)
+        jobs = list(jobs.values())
+
+        suffix = ""
+        sources = [ICON_DIR / icon.get("filename", f"raw/{icon['id']}.png") for icon in jobs]
+        failed = []
+        if size:
+            suffix = f"@{size}" if size.endswith("x") else f"-{size}px"
+            kept = []
+            for icon, source, path in zip(jobs, sources, self.derive(jobs, size)):
+                if path is not None:
+                    kept.append((icon, path))
+                elif source.exists():
+                    failed.append(icon)  # present, but not a PNG that can be decoded
+                else:
+                    kept.append((icon, source))  # reported as missing below
+            jobs = [icon for icon, _ in kept]
+            sources = [path for _, path in kept]
+        targets = {icon['id']: (source, icon_dir / f"{icon['semanticName']}{suffix}.png")
+                   for icon, source in zip(jobs, sources)}
+
+        def place(chunk: List[Dict]) -> List[str]:
+            return [export_file(*targets[icon['id']], link) for icon in chunk]
+
+        # Hand each worker a few large chunks rather than one future per file
+        chunk_size = max(1, -(-len(jobs) // (IO_WORKERS * 4)))
+        chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+        with trace_phase("place files", files=len(jobs), link=link), \
+                ThreadPoolExecutor(max_workers=IO_WORKERS) as pool:
+            results = [status for statuses in pool.map(place, chunks) for status in statuses]
+
+        for icon in failed:
+            print(f"✗ Could not resize '{icon['semanticName']}' to {size}: "
+                  f"{icon.get('filename', 'raw/' + icon['id'] + '.png')} is not a readable PNG")
 
-                # Track usage
-                project_name = project.name
-                if project_name not in icon.get("usedIn", []):
-                    icon.setdefault("usedIn", []).append(project_name)
+        exported = []
+        for icon, status in zip(jobs, results):
+            if status == "missing":
+                print(f"✗ Source file missing for '{icon['semanticName']}': "
+                      f"{icon.get('filename', 'raw/' + icon['id'] + '.png')}")
+                continue
 
-                print(f"✓ Exported {icon['semanticName']}.png")
+            exported.append(icon['semanticName'])
+            if status == "unchanged":
+                print(f"✓ {icon['semanticName']}{suffix}.png already up to date")
+            else:
+                print(f"✓ Exported {icon['semanticName']}{suffix}.png ({status})")
 
         if exported:
-            self.save_catalog()
             self.track_usage(project_path, exported)
             print(f"\n✓ Exported {len(exported)} icons to {icon_dir}")
+            if markdown:
+                cwd = Path.cwd()
+                print("\nMarkdown snippets:")
+                for name in exported:
+                    print(f"  {markdown_snippet(name, project.resolve(), cwd, suffix)}")
 
-    def track_usage(self, project_path: str, icon_names: List[str]):
-        """Track icon usage for history and analytics"""
-        project = Path(project_path).resolve()
-        project_name = project.name
-        timestamp = datetime.now().isoformat()
-
-        # Update history (per-project)
-        history = {}
-        if HISTORY_FILE.exists():
-            with open(HISTORY_FILE, 'r') as f:
-                history = json.load(f)
-
-        history[project_name] = {
-            "path": str(project),
-            "icons": icon_names,
-            "timestamp": timestamp
-        }
+    def _current_image(self, icon: Dict) -> Optional[Dict]:
+        """The icon's image info, read from the file if the stored scan is stale
 
-        with open(HISTORY_FILE, 'w') as f:
-            json.dump(history, f, indent=2)
+        Doesn't modify the catalog. Returns None if the file is missing.
+        """
+        path = ICON_DIR / icon.get('filename', f"raw/{icon['id']}.png")
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        image = icon.get("image")
+        if not image or image.get("mtime") != st.st_mtime_ns or image.get("bytes") != st.st_size:
+            image = read_image_info(path, st)
+        return image
+
+    def _size_variants(self, icon: Dict) -> List[Tuple[Dict, Dict]]:
+        """The icon plus its -NxN siblings (e.g. lock, lock-16x16, lock-48x48) with image info"""
+        base = FILENAME_SIZE_RE.sub("", icon["semanticName"].lower())
+        pattern = re.compile(re.escape(base) + r"([-_]\d+x\d+)?")
+        candidates = [icon] + [other for other in self.find_icons_by_prefix(base)
+                               if other is not icon and pattern.fullmatch(other["semanticName"].lower())]
+        variants = []
+        for candidate in candidates:
+            image = self._current_image(candidate)
+            if image and "width" in image:
+                variants.append((candidate, image))
+        return variants
+
+    def derive(self, icons: List[Dict], size: str) -> List[Optional[Path]]:
+        """Paths of the icons' files at a requested size, generating them as needed
+
+        The target size is computed from each icon's own dimensions (see
+        target_dimensions). A catalog sibling that already has exactly that
+        size (lock-16x16 for lock at 16) is used as is. Otherwise the
+        smallest variant at least as large is resampled (Lanczos-3, or the
+        largest variant when upscaling) into .derivative-cache/, named by
+        the source's SHA-256 and the target size, so each derivative is
+        rendered once. Missing renders run on a process pool.
 
-        # Update analytics (global)
-        analytics = {}
-        if ANALYTICS_FILE.exists():
-            with open(ANALYTICS_FILE, 'r') as f:
-                analytics = json.load(f)
+        Args:
+            icons: Catalog icons
+            size: "24" for 24 pixels (larger side) or "2x" for a scale factor
 
-        for icon_name in icon_names:
-            if icon_name not in analytics:
-                analytics[icon_name] = {"count": 0, "projects": []}
-            analytics[icon_name]["count"] += 1
-            if project_name not in analytics[icon_name]["projects"]:
-                analytics[icon_name]["projects"].append(project_name)
+        Returns:
+            One path per icon, None where the icon's source file is missing
+            or can't be decoded
+        """
+        import pngtools
+        from concurrent.futures import ProcessPoolExecutor
+
+        paths = []
+        renders = {}
+        for icon in icons:
+            variants = self._size_variants(icon)
+            if not variants or variants[0][0] is not icon:
+                paths.append(None)
+                continue
+            own = variants[0][1]
+            width, height = target_dimensions(size, own["width"], own["height"])
 
-        with open(ANALYTICS_FILE, 'w') as f:
-            json.dump(analytics, f, indent=2)
+            exact = [c for c, image in variants if (image["width"], image["height"]) == (width, height)]
+            if exact:
+                paths.append(ICON_DIR / exact[0].get("filename", f"raw/{exact[0]['id']}.png"))
+                continue
+            larger = [v for v in variants if v[1]["width"] >= width and v[1]["height"] >= height]
+            source, image = (min(larger, key=lambda v: v[1]["width"] * v[1]["height"]) if larger else
+                             max(variants, key=lambda v: v[1]["width"] * v[1]["height"]))
+            cached = DERIVATIVE_CACHE_DIR / f"{image['sha256']}-{width}x{height}-v{RESIZE_VERSION}.png"
+            if not cached.exists():
+                source_path = ICON_DIR / source.get("filename", f"raw/{source['id']}.png")
+                renders[str(cached)] = (str(source_path), str(cached), width, height)
+            paths.append(cached)
+
+        if renders:
+            DERIVATIVE_CACHE_DIR.mkdir(exist_ok=True)
+            print(f"Resizing {len(renders)} icon(s) to {size}...")
+            jobs = list(renders.values())
+            if len(jobs) == 1:
+                results = [pngtools.resize_file(*jobs[0])]
+            else:
+                with ProcessPoolExecutor() as pool:
+                    results = list(pool.map(pngtools.resize_file, *zip(*jobs), chunksize=8))
+            failed = {target for target, result in zip(renders, results) if result is None}
+            paths = [None if path is not None and str(path) in failed else path for path in paths]
+        return paths
+
+    def sprite(self, output_dir: str, icon_names: Optional[List[str]] = None,
+               category: Optional[str] = None, name: str = "icons", prefix: str = "icon",
+               max_size: int = SPRITE_MAX_SIZE, padding: int = 1):
+        """Pack icons into sprite sheets with CSS and JSON coordinate maps
+
+        Icons are grouped by pixel size (so a 24px and a 48px icon never
+        share a sheet) and each group is shelf-packed into as few sheets of
+        at most max_size pixels as possible. Writes <name>-<size>px[-N].png
+        sheets, <name>.css (one .<prefix>-<semantic> class per icon) and
+        <name>.json to output_dir.
+
+        Rendered sheets are cached in .sprite-cache/ under a hash of their
+        members' contents and positions, so regenerating an unchanged set
+        only copies files (and skips those already up to date).
 
-    def get_project_history(self, project_path: str) -> Optional[Dict]:
-        """Get icon usage history for a specific project"""
-        if not HISTORY_FILE.exists():
-            return None
+        Args:
+            output_dir: Directory for the sheets and maps
+            icon_names: Semantic names to include
+            category: Include every icon in this category as well
+            name: Base name of the generated files
+            prefix: CSS class prefix
+            max_size: Max sheet width/height in pixels
+            padding: Transparent pixels between icons
+        """
+        import hashlib
+
+        icons = []
+        if icon_names:
+            resolved = self.resolve_icons(icon_names)
+            for icon_name in icon_names:
+                if icon_name in resolved:
+                    icons.append(resolved[icon_name])
+                else:
+                    print(f"✗ Icon '{icon_name}' not found in catalog")
+        if category:
+            icons.extend(self.find_icons_by_category(category))
 
-        project_name = Path(project_path).resolve().name
+        members = {}
+        for icon in icons:
+            if icon['semanticName'] in members:
+                continue
+            path = ICON_DIR / icon.get('filename', f"raw/{icon['id']}.png")
+            image = self._current_image(icon)
+            if image is None:
+                print(f"✗ Source file missing for '{icon['semanticName']}': {path.relative_to(ICON_DIR)}")
+                continue
+            if "width" not in image:
+                print(f"✗ Not a PNG, skipping '{icon['semanticName']}'")
+                continue
+            if max(image["width"], image["height"]) > max_size:
+                print(f"✗ '{icon['semanticName']}' is larger than --max-size {max_size}, skipping")
+                continue
+            members[icon['semanticName']] = (path, image)
 
-        with open(HISTORY_FILE, 'r') as f:
-            history = json.load(f)
+        if not members:
+            print("No icons to pack")
+            return
+
+        groups = {}
+        for semantic, (path, image) in members.items():
+            groups.setdefault(max(image["width"], image["height"]), []).append(semantic)
+
+        out = Path(output_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        SPRITE_CACHE_DIR.mkdir(exist_ok=True)
+
+        coordinates = {}
+        sheets = {}
+        css = [f".{prefix} {{ display: inline-block; background-repeat: no-repeat; }}"]
+        rendered = reused = 0
+        for size in sorted(groups):
+            semantics = sorted(groups[size])
+            sizes = [(members[n][1]["width"], members[n][1]["height"]) for n in semantics]
+            placements, dimensions = pack_shelves(sizes, max_size, padding)
+
+            for sheet, (width, height) in enumerate(dimensions):
+                sheet_file = f"{name}-{size}px.png" if len(dimensions) == 1 else f"{name}-{size}px-{sheet + 1}.png"
+                on_sheet = [(n, x, y) for n, (s, x, y) in zip(semantics, placements) if s == sheet]
+                key = hashlib.sha256(json.dumps(
+                    [SPRITE_VERSION, width, height] +
+                    [[members[n][1]["sha256"], x, y] for n, x, y in on_sheet]).encode()).hexdigest()
+                cached = SPRITE_CACHE_DIR / f"{key}.png"
+                if cached.exists():
+                    reused += 1
+                else:
+                    self._render_sheet(cached, width, height, [(members[n][0], x, y) for n, x, y in on_sheet])
+                    rendered += 1
+                export_file(cached, out / sheet_file)
+
+                sheets[sheet_file] = {"width": width, "height": height, "key": key}
+                for semantic, x, y in on_sheet:
+                    image = members[semantic][1]
+                    coordinates[semantic] = {"sheet": sheet_file, "x": x, "y": y,
+                                             "width": image["width"], "height": image["height"]}
+                    class_name = re.sub(r"([^A-Za-z0-9_-])", r"\\\1", semantic)
+                    css.append(f".{prefix}-{class_name} {{ background-image: url({sheet_file}); "
+                               f"background-position: {-x}px {-y}px; "
+                               f"width: {image['width']}px; height: {image['height']}px; }}")
+
+        with atomic_write(out / f"{name}.css") as f:
+            f.write("\n".join(css) + "\n")
+        with atomic_write(out / f"{name}.json") as f:
+            json.dump({"sheets": sheets, "icons": coordinates}, f, indent=2)
+
+        print(f"✓ Packed {len(coordinates)} icons into {len(sheets)} sheet(s) in {out}")
+        print(f"  Rendered {rendered}, reused {reused} from cache")
+        print(f"  Usage: <link rel=\"stylesheet\" href=\"{name}.css\"> "
+              f"<span class=\"{prefix} {prefix}-{next(iter(coordinates))}\"></span>")
+
+    @staticmethod
+    def _render_sheet(path: Path, width: int, height: int, members: List[Tuple[Path, int, int]]):
+        """Compose member PNGs at their offsets onto a transparent sheet and save it"""
+        import pngtools
+
+        canvas = bytearray(width * height * 4)
+        for source, x, y in members:
+            w, h, pixels = pngtools.decode(source.read_bytes())
+            row_bytes = w * 4
+            for row in range(h):
+                start = ((y + row) * width + x) * 4
+                canvas[start:start + row_bytes] = pixels[row * row_bytes:(row + 1) * row_bytes]
+        with atomic_write(path, 'wb') as f:
+            f.write(pngtools.encode(width, height, canvas))
 
+    def track_usage(self, project_path: str, icon_names: List[str]):
+        """Track icon usage for history and analytics (one usage log append)"""
+        self.usage.append(Path(project_path).resolve(), icon_names)
+
+    def get_project_history(self, project_path: str) -> Optional[Dict]:
+        """Get icon usage history for a specific project"""
+        project_name = Path(project_path).resolve().name
+        history, _ = self.usage.aggregates()
         return history.get(project_name)
 
     def get_popular_icons(self, limit: int = 10) -> List[tuple]:
         """Get most popular icons globally"""
-        if not ANALYTICS_FILE.exists():
-            return []
-
-        with open(ANALYTICS_FILE, 'r') as f:
-            analytics = json.load(f)
+        _, analytics = self.usage.aggregates()
 
         # Sort by usage count
         sorted_icons = sorted(analytics.items(), key=lambda x: x[1]["count"], reverse=True)
         return sorted_icons[:limit]
 
-    def show_history(self, project_path: str):
-        """Show icon usage history for project"""
+    def get_projects_using(self, recorded: Optional[Dict[str, List[str]]] = None) -> Dict[str, List[str]]:
+        """Projects each icon (by semantic name) has been exported to
+
+        Combines the usage analytics with usedIn lists recorded in the
+        catalog by older versions, which updated the catalog on export.
+
+        Args:
+            recorded: Those usedIn lists by semantic name, if already
+                      collected (default: read from the catalog)
+        """
+        _, analytics = self.usage.aggregates()
+        used_in = {name: list(data["projects"]) for name, data in analytics.items()}
+        if recorded is None and self._db_only():
+            recorded = self._db.recorded_usage()
+        elif recorded is None:
+            recorded = {}
+            for icon in self.catalog["icons"]:
+                if icon.get("usedIn"):
+                    recorded.setdefault(icon["semanticName"], []).extend(icon["usedIn"])
+        for name, recorded_projects in recorded.items():
+            projects = used_in.setdefault(name, [])
+            for project in recorded_projects:
+                if project not in projects:
+                    projects.append(project)
+        return used_in
+
+    def show_history(self, project_path: str, icons_only: bool = False):
+        """Show icon usage history for project
+
+        Args:
+            project_path: Project directory
+            icons_only: Print just the last exported icon names, space separated
+        """
         history = self.get_project_history(project_path)
 
+        if icons_only:
+            if history:
+                print(" ".join(history['icons']))
+            return
+
         if not history:
             print(f"No history found for project")
             return
@@ -257,148 +2309,384 @@ class IconManager:
             projects = len(data["projects"])
             print(f"{i:2}. {icon_name:20} - {count} uses across {projects} project(s)")
 
-    def stats(self):
-        """Show catalog statistics with enhanced category breakdowns"""
-        total = len(self.catalog["icons"])
-        by_category = {}
-        category_icons = {}
+    def stats(self, as_json: bool = False):
+        """Show catalog statistics with enhanced category breakdowns
 
-        for icon in self.catalog["icons"]:
-            cat = icon.get("category", "uncategorized")
-            by_category[cat] = by_category.get(cat, 0) + 1
-            category_icons.setdefault(cat, []).append(icon)
+        The catalog figures come from the stats summary (see
+        _current_stats), so repeated runs don't load the catalog.
 
-        # Count total icons in raw directory
-        raw_total = len(list(RAW_DIR.glob("*.png"))) if RAW_DIR.exists() else 0
+        Args:
+            as_json: Print the figures as JSON (for dashboards and badges)
+        """
+        summary = self._current_stats()
+        total = summary["icons"]
+        categories = summary["categories"]
+        raw_total = summary["raw"]["count"]
         uncataloged = raw_total - total
         coverage_pct = (total / raw_total * 100) if raw_total > 0 else 0
 
+        used_in = self.get_projects_using(summary["usedIn"])
+        most_used = sorted(used_in.items(), key=lambda x: len(x[1]), reverse=True)[:5]
+        projects_using = set()
+        for projects in used_in.values():
+            projects_using.update(projects)
+
+        if as_json:
+            print(json.dumps({
+                "library": raw_total,
+                "cataloged": total,
+                "uncataloged": uncataloged,
+                "coverage": round(coverage_pct, 1),
+                "categories": {cat: {"count": categories[cat]["count"],
+                                     "samples": [name for _, name in categories[cat]["samples"]]}
+                               for cat in sorted(categories)},
+                "mostUsed": [{"name": name, "projects": projects} for name, projects in most_used],
+                "projects": sorted(projects_using),
+            }, indent=2))
+            return
+
         print("\n=== Icon Library Statistics ===")
         print(f"Total icons in library: {raw_total:,}")
         print(f"Cataloged: {total} ({coverage_pct:.1f}%)")
         print(f"Uncataloged: {uncataloged:,}")
 
         print(f"\n=== Category Breakdown ===")
-        for cat in sorted(by_category.keys()):
-            count = by_category[cat]
-            icons = category_icons[cat]
+        for cat in sorted(categories.keys()):
+            count = categories[cat]["count"]
 
             # Show category with count
             print(f"\n{cat.upper()} ({count} icons):")
 
             # Show sample icons (first 10)
-            samples = icons[:10]
-            for icon in samples:
-                print(f"  • {icon['semanticName']}")
+            for _, name in categories[cat]["samples"]:
+                print(f"  • {name}")
 
-            if count > 10:
-                print(f"  ... and {count - 10} more")
+            if count > STATS_SAMPLES:
+                print(f"  ... and {count - STATS_SAMPLES} more")
 
         # Most used icons
-        used_icons = [(icon, len(icon.get("usedIn", [])))
-                      for icon in self.catalog["icons"]
-                      if icon.get("usedIn")]
-        if used_icons:
+        if most_used:
             print(f"\n=== Most Used Icons ===")
-            for icon, count in sorted(used_icons, key=lambda x: x[1], reverse=True)[:5]:
-                projects = ", ".join(icon["usedIn"])
-                print(f"  {icon['semanticName']:15} used in {count} project(s): {projects}")
+            for name, projects in most_used:
+                print(f"  {name:15} used in {len(projects)} project(s): {', '.join(projects)}")
 
         # Project usage
-        projects_using = set()
-        for icon in self.catalog["icons"]:
-            projects_using.update(icon.get("usedIn", []))
-
         if projects_using:
             print(f"\n=== Project Usage ===")
             print(f"Icons used in {len(projects_using)} project(s): {', '.join(sorted(projects_using))}")
 
-    def bulk_import(self, csv_file: str):
+    def _stats_stamp(self) -> Optional[List]:
+        """State of the store's file on disk, which a stats summary is valid for"""
+        try:
+            st = self._catalog_path.stat()
+        except FileNotFoundError:
+            return None
+        return [self.store, *self._catalog_file_stamp(st)]
+
+    def _current_stats(self) -> Dict:
+        """The stats summary for the catalog on disk
+
+        Taken from memory or .icon-stats.json if it was made for the
+        catalog's current state, and computed in one pass over the catalog
+        otherwise. The PNG count of raw/ is kept with it and recounted only
+        when the directory has changed.
+        """
+        stamp = self._stats_stamp()
+        summary = self._stats
+        changed = False
+        if summary is None or summary["stamp"] != stamp:
+            summary = self._read_stats()
+            if summary is None or summary["stamp"] != stamp:
+                summary = self._compute_stats()
+                summary["stamp"] = stamp
+                changed = True
+        raw = count_raw_icons(summary.get("raw"))
+        if raw is not summary.get("raw"):
+            summary["raw"] = raw
+            changed = True
+        if changed:
+            self._write_stats(summary)
+        self._stats = summary
+        return summary
+
+    def _compute_stats(self) -> Dict:
+        """Catalog figures for stats(), gathered in a single pass
+
+        Per category the icon count and the first STATS_SAMPLES icons as
+        [position, semantic name]; usedIn lists by semantic name.
+        """
+        categories = {}
+        used_in = {}
+        with trace_phase("compute stats"):
+            for pos, icon in enumerate(self.catalog["icons"]):
+                cat = icon.get("category", "uncategorized")
+                entry = categories.get(cat)
+                if entry is None:
+                    entry = categories[cat] = {"count": 0, "samples": []}
+                entry["count"] += 1
+                if len(entry["samples"]) < STATS_SAMPLES:
+                    entry["samples"].append([pos, icon["semanticName"]])
+                for project in icon.get("usedIn", ()):
+                    projects = used_in.setdefault(icon["semanticName"], [])
+                    if project not in projects:
+                        projects.append(project)
+        return {"version": STATS_VERSION, "icons": len(self.catalog["icons"]),
+                "categories": categories, "usedIn": used_in}
+
+    def _stats_for_update(self) -> Optional[Dict]:
+        """The stats summary, if a mutation of the loaded catalog can be applied to it"""
+        if self._dirty_ids:
+            return self._stats  # already applied to since the last save, or given up on
+        if self._stats is None:
+            self._stats = self._read_stats()
+        if self._stats is not None and self._stats["stamp"] != self._stats_stamp():
+            self._stats = None
+        return self._stats
+
+    def _update_stats(self, old: Optional[Dict], new: Dict, pos: int):
+        """Apply an added (old is None) or replaced icon at pos to the stats summary
+
+        Drops the summary instead if the change can't be applied exactly:
+        a listed icon moving out of a category with unlisted icons, or a
+        rename of an icon with usedIn entries.
+        """
+        summary = self._stats
+        categories = summary["categories"]
+        new_cat = new.get("category", "uncategorized")
+        if old is None:
+            summary["icons"] += 1
+        else:
+            old_cat = old.get("category", "uncategorized")
+            if old.get("usedIn") and old["semanticName"] != new["semanticName"]:
+                self._stats = None
+                return
+            entry = categories[old_cat]
+            entry["count"] -= 1
+            samples = entry["samples"]
+            listed = next((i for i, (p, _) in enumerate(samples) if p == pos), None)
+            if listed is not None:
+                if old_cat != new_cat and entry["count"] >= len(samples):
+                    self._stats = None  # the next icon in the category isn't known
+                    return
+                del samples[listed]
+            if not entry["count"]:
+                del categories[old_cat]
+
+        entry = categories.setdefault(new_cat, {"count": 0, "samples": []})
+        entry["count"] += 1
+        bisect.insort(entry["samples"], [pos, new["semanticName"]])
+        del entry["samples"][STATS_SAMPLES:]
+
+    def _save_stats(self):
+        """Bring .icon-stats.json in line with a catalog save (caller holds the lock)"""
+        if self._stats is not None and self._dirty_ids <= self._stats_ids:
+            self._stats["stamp"] = self._stats_stamp()
+            self._write_stats(self._stats)
+        else:
+            self._stats = None
+            try:
+                STATS_FILE.unlink()
+            except FileNotFoundError:
+                pass
+        self._stats_ids.clear()
+
+    @staticmethod
+    def _read_stats() -> Optional[Dict]:
+        try:
+            with open(STATS_FILE, 'r') as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return summary if summary.get("version") == STATS_VERSION else None
+
+    @staticmethod
+    def _write_stats(summary: Dict):
+        try:
+            with atomic_write(STATS_FILE) as f:
+                json.dump(summary, f)
+        except OSError:
+            pass  # the summary only speeds up stats
+
+    def bulk_import(self, csv_file: str, strict: bool = False, chunk_size: int = IMPORT_CHUNK_ROWS):
         """Import icons from CSV file
 
         CSV Format: id,semantic,tags,category,description
         Example: Lock,lock,"security,padlock,locked",security,Padlock icon for security
 
+        Rows are streamed through a generator pipeline (read → validate →
+        chunk) and committed chunk_size rows at a time: each chunk is
+        checked against the id index, its files are scanned for image info
+        (as add_icon does) on a thread pool, and it is appended and saved in
+        one write, so memory stays bounded by the catalog itself however
+        large the file is. Progress is reported at a fixed rate rather than
+        per row, and only the first IMPORT_REPORT_ROWS warnings are printed.
+
         Args:
             csv_file: Path to CSV file
+            strict: Abort and roll back the whole import on the first invalid row
+                    (the catalog is then saved once, at the end)
+            chunk_size: Rows per catalog save
         """
+        import csv
+        from concurrent.futures import ThreadPoolExecutor
+
         csv_path = Path(csv_file)
         if not csv_path.exists():
             print(f"✗ Error: CSV file not found: {csv_file}")
             return
 
-        success_count = 0
-        error_count = 0
+        counts = {"rows": 0, "imported": 0, "skipped": 0, "errors": 0}
 
-        with open(csv_path, 'r', encoding='utf-8') as f:
+        def warn(message: str, kind: str = "errors"):
+            counts[kind] += 1
+            if kind == "errors" and strict:
+                raise ValueError(message)
+            if counts["errors"] + counts["skipped"] <= IMPORT_REPORT_ROWS:
+                print(f"  {'✗' if kind == 'errors' else '⚠'} {message}, skipping")
+
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
             reader = csv.DictReader(f)
 
             # Validate headers
             required_headers = {'id', 'semantic', 'tags', 'category'}
-            if not required_headers.issubset(reader.fieldnames):
+            if not required_headers.issubset(reader.fieldnames or ()):
                 print(f"✗ Error: CSV must have headers: id, semantic, tags, category, description")
-                print(f"  Found: {', '.join(reader.fieldnames)}")
+                print(f"  Found: {', '.join(reader.fieldnames or ())}")
                 return
 
             print(f"Importing icons from {csv_file}...")
-
-            for row_num, row in enumerate(reader, start=2):  # Start at 2 (header is row 1)
+            progress = Progress("rows read")
+            icons = self.catalog["icons"]
+            import_start = len(icons)
+            entries = self._parse_import_rows(reader, counts, warn, progress)
+            with ThreadPoolExecutor(max_workers=IO_WORKERS) as pool:
                 try:
-                    # Parse tags (handle comma-separated or space-separated)
-                    tags_str = row['tags'].strip()
-                    if ',' in tags_str:
-                        tags = [t.strip() for t in tags_str.split(',') if t.strip()]
-                    else:
-                        tags = [t.strip() for t in tags_str.split() if t.strip()]
-
-                    # Validate category
-                    category = row['category'].strip()
-                    if category not in self.catalog["categories"]:
-                        print(f"  ✗ Row {row_num}: Invalid category '{category}', skipping")
-                        error_count += 1
-                        continue
-
-                    # Add icon
-                    icon_id = row['id'].strip()
-                    semantic = row['semantic'].strip()
-                    description = row.get('description', '').strip()
-
-                    if not icon_id or not semantic:
-                        print(f"  ✗ Row {row_num}: Missing id or semantic name, skipping")
-                        error_count += 1
-                        continue
-
-                    # Check if already exists
-                    existing = self.find_icon_by_id(icon_id)
-                    if existing:
-                        print(f"  ⚠ Row {row_num}: Icon '{icon_id}' already exists, skipping")
-                        continue
-
-                    self.add_icon(icon_id, semantic, tags, category, description)
-                    success_count += 1
-
+                    for chunk in chunked(entries, chunk_size):
+                        chunk_start = len(icons)
+                        try:
+                            accepted = {}
+                            for row_num, icon in chunk:
+                                if icon["id"] in self._by_id or icon["id"] in accepted:
+                                    warn(f"Row {row_num}: Icon '{icon['id']}' already exists", "skipped")
+                                    continue
+                                accepted[icon["id"]] = icon
+                            stats = self._stats_for_update()
+                            filenames = [icon["filename"] for icon in accepted.values()]
+                            for icon, image in zip(accepted.values(), pool.map(self._new_image_info, filenames)):
+                                if image is not None:
+                                    icon["image"] = image
+                                icons.append(icon)
+                                self._semantic_names.append("")
+                                self._index_icon(icon, len(icons) - 1)
+                                self._dirty_ids.add(icon["id"])
+                                if stats is not None:
+                                    self._update_stats(None, icon, len(icons) - 1)
+                                    self._stats_ids.add(icon["id"])
+                            if not strict and len(icons) > chunk_start:
+                                self.save_catalog(quiet=True)
+                        except BaseException:
+                            self._truncate_icons(chunk_start)
+                            raise
+                        if not strict:
+                            self._link_icons(icons[chunk_start:])
+                            counts["imported"] += len(icons) - chunk_start
+                    if strict and len(icons) > import_start:
+                        self.save_catalog(quiet=True)
+                        self._link_icons(icons[import_start:])
+                        counts["imported"] = len(icons) - import_start
                 except Exception as e:
-                    print(f"  ✗ Row {row_num}: Error processing row: {e}")
-                    error_count += 1
+                    progress.finish()
+                    pending = len(icons) - import_start if strict else 0
+                    self._truncate_icons(len(icons) - pending)
+                    print(f"\n✗ Import aborted: {e}")
+                    if strict:
+                        print(f"✗ Rolled back {pending} pending icon(s), catalog unchanged")
+                    else:
+                        print(f"✓ {counts['imported']} icon(s) from earlier chunks were saved")
+                    return
+            progress.finish()
 
-        # Final summary (catalog already saved by add_icon calls)
         print(f"\n=== Import Summary ===")
-        print(f"✓ Successfully imported: {success_count} icons")
-        if error_count > 0:
-            print(f"✗ Errors/Skipped: {error_count}")
-        print(f"Total cataloged icons: {len(self.catalog['icons'])}")
+        print(f"✓ Successfully imported: {counts['imported']:,} icons")
+        if counts["skipped"]:
+            print(f"⚠ Already cataloged (skipped): {counts['skipped']:,}")
+        if counts["errors"]:
+            print(f"✗ Errors/Skipped: {counts['errors']:,}")
+        if counts["skipped"] + counts["errors"] > IMPORT_REPORT_ROWS:
+            print(f"  (only the first {IMPORT_REPORT_ROWS} were listed)")
+        print(f"Total cataloged icons: {len(icons):,}")
+
+    def _parse_import_rows(self, reader: Iterable[Dict], counts: Dict,
+                           warn: Callable[..., None], progress: Progress):
+        """Yield (row number, icon entry) for each valid import-csv row
+
+        Invalid rows are passed to warn() and dropped. Duplicate ids are
+        left for the caller, which checks each chunk against the id index.
+        """
+        categories = self.catalog["categories"]
+        for row_num, row in enumerate(reader, start=2):  # Start at 2 (header is row 1)
+            counts["rows"] += 1
+            progress.update(counts["rows"], f"{counts['imported']:,} imported")
+
+            # Parse tags (handle comma-separated or space-separated)
+            tags_str = (row['tags'] or '').strip()
+            if ',' in tags_str:
+                tags = [t.strip() for t in tags_str.split(',') if t.strip()]
+            else:
+                tags = tags_str.split()
+
+            # Validate category
+            category = (row['category'] or '').strip()
+            if category not in categories:
+                warn(f"Row {row_num}: Invalid category '{category}'")
+                continue
 
-    def suggest_from_filename(self, filename: str) -> dict:
+            icon_id = (row['id'] or '').strip()
+            semantic = (row['semantic'] or '').strip()
+            if not icon_id or not semantic:
+                warn(f"Row {row_num}: Missing id or semantic name")
+                continue
+
+            yield row_num, {
+                "id": icon_id,
+                "filename": f"raw/{icon_id}.png",
+                "semanticName": semantic,
+                "tags": tags,
+                "category": category,
+                "description": (row.get('description') or '').strip(),
+                "usedIn": []
+            }
+
+    def _truncate_icons(self, length: int):
+        """Drop icons appended after position length, undoing their indexing"""
+        icons = self.catalog["icons"]
+        if len(icons) > length:
+            self._stats = None  # their stats updates can't be undone
+        for icon in icons[length:]:
+            icon_id = icon["id"]
+            if self._by_id.get(icon_id) is icon:
+                self._unindex_icon(icon)
+                del self._pos[icon_id]
+            self._dirty_ids.discard(icon_id)
+        del icons[length:]
+        del self._semantic_names[length:]
+
+    def _link_icons(self, icons: List[Dict]):
+        """Create the catalog/<category>/ symlinks for newly added icons"""
+        for icon in icons:
+            self.create_symlink(icon["id"], icon["semanticName"], icon["category"], quiet=True)
+
+    def suggest_from_filename(self, filename: str, category: Optional[str] = None) -> dict:
         """Generate semantic name and tags from filename
 
         Args:
             filename: Icon filename (without extension)
+            category: Category if already known (e.g. from a batched
+                      Classifier.classify_many call); classified otherwise
 
         Returns:
             dict with suggested semantic, tags, category
         """
-        import re
-
         # Clean filename: lowercase, replace separators with spaces
         name = filename.replace('_', ' ').replace('-', ' ')
         name = re.sub(r'\s+', ' ', name).strip().lower()
@@ -408,27 +2696,11 @@ class IconManager:
 
         # Generate tags from words
         words = name.split()
-        tags = list(set(words))  # Remove duplicates
-
-        # Guess category based on common keywords
-        category_keywords = {
-            'files': ['file', 'document', 'folder', 'pdf', 'doc', 'text', 'page', 'book', 'paper'],
-            'network': ['network', 'wifi', 'cloud', 'internet', 'connection', 'globe', 'web', 'server', 'router'],
-            'security': ['lock', 'key', 'shield', 'security', 'secure', 'certificate', 'password', 'protection'],
-            'tools': ['tool', 'wrench', 'gear', 'settings', 'config', 'hammer', 'screwdriver', 'toolbox'],
-            'ui': ['button', 'icon', 'arrow', 'close', 'open', 'menu', 'navigation', 'pointer', 'cursor'],
-            'development': ['code', 'bug', 'database', 'api', 'console', 'terminal', 'git', 'debug', 'test'],
-            'emoji': ['smile', 'happy', 'sad', 'face', 'emotion', 'laugh', 'cry']
-        }
+        tags = list(dict.fromkeys(words))  # Remove duplicates, keep order
 
-        # Find matching category
-        category = 'ui'  # Default
-        max_matches = 0
-        for cat, keywords in category_keywords.items():
-            matches = sum(1 for word in words if any(kw in word for kw in keywords))
-            if matches > max_matches:
-                max_matches = matches
-                category = cat
+        if category is None:
+            from classifier import default_classifier
+            category = default_classifier().classify(filename)
 
         return {
             'semantic': semantic,
@@ -436,59 +2708,215 @@ class IconManager:
             'category': category
         }
 
-    def generate_csv_from_filenames(self, output_file: str, limit: int = None):
+    def generate_csv_from_filenames(self, output_file: str, limit: int = None,
+                                    visual: bool = False, neighbors: int = FEATURE_NEIGHBORS):
         """Generate CSV file with suggestions from icon filenames
 
+        raw/ is scanned lazily and suggestions are written as they are
+        generated, IMPORT_CHUNK_ROWS rows at a time, so nothing
+        proportional to the directory size is held in memory.
+
         Args:
             output_file: Path to output CSV file
             limit: Maximum number of icons to process (None = all)
+            visual: Also propose tags, and a category where the filename
+                    has no keyword, from similar-looking cataloged icons
+                    (see visual_suggestions; needs NumPy)
+            neighbors: Cataloged icons consulted per visual suggestion
         """
-        print(f"Scanning {RAW_DIR} for uncataloged icons...")
+        import csv
 
-        # Get all PNG files in raw directory
-        all_icons = [f.stem for f in RAW_DIR.glob("*.png")]
+        if visual:
+            try:
+                import features  # noqa: F401 (fail early without NumPy)
+            except ImportError:
+                print("✗ Error: --visual needs NumPy (pip install numpy)")
+                return
 
-        # Filter out already cataloged icons
-        cataloged_ids = {icon['id'] for icon in self.catalog['icons']}
-        uncataloged = [icon for icon in all_icons if icon not in cataloged_ids]
+        print(f"Scanning {RAW_DIR} for uncataloged icons...")
 
-        if not uncataloged:
+        def uncataloged() -> Iterable[str]:
+            with os.scandir(RAW_DIR) as entries:
+                for entry in entries:
+                    stem, ext = os.path.splitext(entry.name)
+                    if ext == ".png" and stem not in self._by_id:
+                        yield stem
+
+        def suggestions(icon_ids: Iterable[str]) -> Iterable[tuple]:
+            from classifier import DEFAULT_CATEGORY, Classifier, default_classifier
+            # Without a keyword match, a visual proposal decides the category
+            classifier = Classifier(default=None) if visual else default_classifier()
+            for chunk in chunked(icon_ids, IMPORT_CHUNK_ROWS):
+                proposals = self.visual_suggestions(chunk, neighbors) if visual else {}
+                for icon_id, category in zip(chunk, classifier.classify_many(chunk)):
+                    proposal = proposals.get(icon_id)
+                    if category is None:
+                        category = proposal["category"] if proposal else DEFAULT_CATEGORY
+                    suggestion = self.suggest_from_filename(icon_id, category)
+                    tags = suggestion['tags'][:5]  # Limit to 5 tags
+                    if proposal:
+                        tags = [t for t in tags if not t.isdigit()]
+                        tags += [t for t in proposal["tags"] if t not in tags][:max(0, 5 - len(tags))]
+                    yield (icon_id, suggestion['semantic'], ','.join(tags),
+                           suggestion['category'],
+                           f"{suggestion['semantic'].replace('-', ' ').title()} icon")
+
+        rows = suggestions(islice(uncataloged(), limit))
+        first = next(rows, None)
+        if first is None:
             print("✓ All icons are already cataloged!")
             return
-
-        print(f"Found {len(uncataloged)} uncataloged icons")
-
         if limit:
-            uncataloged = uncataloged[:limit]
             print(f"Limiting to {limit} icons for CSV generation")
 
-        # Generate suggestions
-        suggestions = []
-        for icon_id in uncataloged:
-            suggestion = self.suggest_from_filename(icon_id)
-            suggestions.append({
-                'id': icon_id,
-                'semantic': suggestion['semantic'],
-                'tags': ','.join(suggestion['tags'][:5]),  # Limit to 5 tags
-                'category': suggestion['category'],
-                'description': f"{suggestion['semantic'].replace('-', ' ').title()} icon"
-            })
-
-        # Write to CSV
         output_path = Path(output_file)
+        written = 0
+        progress = Progress("rows written")
         with open(output_path, 'w', newline='', encoding='utf-8') as f:
-            fieldnames = ['id', 'semantic', 'tags', 'category', 'description']
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(suggestions)
-
-        print(f"\n✓ Generated {len(suggestions)} icon suggestions")
+            writer = csv.writer(f)
+            writer.writerow(['id', 'semantic', 'tags', 'category', 'description'])
+            for chunk in chunked(chain([first], rows), IMPORT_CHUNK_ROWS):
+                writer.writerows(chunk)
+                written += len(chunk)
+                progress.update(written)
+        progress.finish()
+
+        print(f"\n✓ Generated {written:,} icon suggestions")
         print(f"✓ Saved to: {output_path}")
         print(f"\nNext steps:")
         print(f"1. Review and edit {output_path} in a spreadsheet")
         print(f"2. Improve tags and descriptions as needed")
         print(f"3. Import with: python3 icon-manager.py import-csv {output_path}")
 
+    def visual_suggestions(self, icon_ids: List[str],
+                           neighbors: int = FEATURE_NEIGHBORS) -> Dict[str, Dict]:
+        """Propose a category and tags for raw/ icons from what they look like
+
+        Pixel feature vectors (features.py) for the given icons and for
+        every cataloged icon are kept up to date in FEATURE_FILE, decoding
+        only new or changed files on a process pool. Each icon then takes
+        a similarity-weighted vote among its nearest cataloged neighbours:
+        the category with the most weight wins, and the tags of the
+        neighbours in that category are proposed, most supported first.
+
+        Args:
+            icon_ids: Icons in raw/ (by file stem) to make proposals for
+            neighbors: Cataloged icons consulted per proposal
+
+        Returns:
+            {icon_id: {"category", "tags", "confidence"}} for every icon that
+            could be decoded (confidence: the winning category's share of
+            the vote). Raises ImportError without NumPy.
+        """
+        import features
+        from concurrent.futures import ProcessPoolExecutor
+        from functools import partial
+
+        labelled = [icon for icon in self.catalog["icons"]
+                    if self._by_id.get(icon["id"]) is icon and icon.get("category")]
+        label_files = [icon.get("filename", f"raw/{icon['id']}.png") for icon in labelled]
+        query_files = {icon_id: f"raw/{icon_id}.png" for icon_id in icon_ids}
+
+        store = features.FeatureStore(FEATURE_FILE)
+        with ProcessPoolExecutor() as pool:
+            computed, failed = store.update(ICON_DIR, [*label_files, *query_files.values()],
+                                            partial(pool.map, chunksize=16))
+        if computed:
+            print(f"✓ Computed pixel features for {computed} file(s)")
+        if failed:
+            print(f"⚠ Could not decode {len(failed)} file(s)")
+
+        known = [i for i, filename in enumerate(label_files) if filename in store.rows]
+        queries = [(icon_id, filename) for icon_id, filename in query_files.items()
+                   if filename in store.rows]
+        if not known or not queries:
+            return {}
+        labelled = [labelled[i] for i in known]
+        base = store.matrix([label_files[i] for i in known])
+        indices, similarities = features.nearest(
+            store.matrix([filename for _, filename in queries]), base, neighbors)
+
+        proposals = {}
+        for (icon_id, _), rows, sims in zip(queries, indices, similarities):
+            votes = [(labelled[row], max(weight, 0.0)) for row, weight in zip(rows.tolist(), sims.tolist())]
+            category_votes = {}
+            for icon, weight in votes:
+                category_votes[icon["category"]] = category_votes.get(icon["category"], 0.0) + weight
+            total = sum(category_votes.values())
+            if not total:
+                continue
+            category = max(category_votes, key=category_votes.get)
+            tag_votes = {}
+            for icon, weight in votes:
+                if icon["category"] == category:
+                    for tag in dict.fromkeys(t.lower() for t in icon.get("tags", [])):
+                        tag_votes[tag] = tag_votes.get(tag, 0.0) + weight
+            proposals[icon_id] = {"category": category,
+                                  "tags": sorted(tag_votes, key=lambda t: -tag_votes[t]),
+                                  "confidence": category_votes[category] / total}
+        return proposals
+
+    def classify_csv(self, csv_file: str, output_file: Optional[str] = None, dry_run: bool = False):
+        """Re-categorize the rows of an icon CSV with the shared classifier
+
+        Each row's category is recomputed from its semantic name (or its
+        id when that is empty). Rows are streamed and classified
+        IMPORT_CHUNK_ROWS at a time, one regex scan per chunk (see
+        classifier.py).
+
+        Args:
+            csv_file: CSV with at least id/semantic and category columns
+            output_file: Where to write the result (default: update csv_file in place)
+            dry_run: Only report what would change
+        """
+        import csv
+        from classifier import default_classifier
+
+        csv_path = Path(csv_file)
+        if not csv_path.exists():
+            print(f"✗ Error: CSV file not found: {csv_file}")
+            return
+        output_path = Path(output_file) if output_file else csv_path
+        classifier = default_classifier()
+
+        total = changed = 0
+        distribution = {}
+        progress = Progress("rows classified")
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            fields = reader.fieldnames or []
+            if 'category' not in fields or not {'semantic', 'id'} & set(fields):
+                print(f"✗ Error: CSV must have a category column and a semantic or id column")
+                print(f"  Found: {', '.join(fields)}")
+                return
+
+            with (nullcontext() if dry_run else
+                  atomic_write(output_path, encoding='utf-8', newline='')) as out:
+                writer = None if dry_run else csv.DictWriter(out, fieldnames=fields)
+                if writer:
+                    writer.writeheader()
+                for chunk in chunked(reader, IMPORT_CHUNK_ROWS):
+                    names = [row.get('semantic') or row.get('id') or '' for row in chunk]
+                    for row, category in zip(chunk, classifier.classify_many(names)):
+                        if row['category'] != category:
+                            row['category'] = category
+                            changed += 1
+                        distribution[category] = distribution.get(category, 0) + 1
+                    if writer:
+                        writer.writerows(chunk)
+                    total += len(chunk)
+                    progress.update(total)
+        progress.finish()
+
+        verb = "would change" if dry_run else "changed"
+        print(f"✓ Classified {total:,} row(s), {changed:,} {verb} category")
+        if not dry_run:
+            print(f"✓ Saved to: {output_path}")
+        if distribution:
+            print("\nCategory distribution:")
+            for category, count in sorted(distribution.items()):
+                print(f"  {category}: {count:,}")
+
     def create_template(self, template_name: str, tags: List[str], category: str):
         """Create a reusable template for icon families
 
@@ -542,37 +2970,149 @@ class IconManager:
 
         print(f"Applying template '{template_name}' to {len(icon_specs)} icons...")
 
-        for spec in icon_specs:
-            icon_id = spec['id']
-            semantic = spec['semantic']
-            extra_tags = spec.get('extra_tags', [])
-            description = spec.get('description', f"{semantic.replace('-', ' ').title()} icon")
+        with self.batch():
+            for spec in icon_specs:
+                icon_id = spec['id']
+                semantic = spec['semantic']
+                extra_tags = spec.get('extra_tags', [])
+                description = spec.get('description', f"{semantic.replace('-', ' ').title()} icon")
 
-            # Combine template tags with any extra tags
-            all_tags = template['tags'] + extra_tags
+                # Combine template tags with any extra tags
+                all_tags = template['tags'] + extra_tags
 
-            # Check if already exists
-            if self.find_icon_by_id(icon_id):
-                print(f"  ⚠ '{icon_id}' already exists, skipping")
-                continue
+                # Check if already exists
+                if self.find_icon_by_id(icon_id):
+                    print(f"  ⚠ '{icon_id}' already exists, skipping")
+                    continue
 
-            self.add_icon(icon_id, semantic, all_tags, template['category'], description)
-            success_count += 1
+                self.add_icon(icon_id, semantic, all_tags, template['category'], description)
+                success_count += 1
 
         print(f"\n✓ Applied template to {success_count} icons")
 
-    def validate(self):
-        """Validate catalog integrity - check for missing files, broken symlinks, etc."""
-        print("\n=== Validating Icon Catalog ===\n")
+    def _directory_listings(self, dirs: Iterable[str], previous: Dict) -> Dict[str, Optional[Dict]]:
+        """List directories under the library root on a thread pool
+
+        Each listing maps entry names to their symlink target, or None for
+        anything that isn't a symlink; a missing directory lists as None.
+        Directories whose mtime matches a listing in `previous` (the
+        saved validate state) reuse it instead of being read again.
+
+        Returns:
+            {relative dir: {"mtime": mtime_ns, "entries": {...}} or None}
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        def list_dir(rel_dir: str) -> Optional[Dict]:
+            try:
+                mtime = os.stat(ICON_DIR / rel_dir).st_mtime_ns
+            except (FileNotFoundError, NotADirectoryError):
+                return None
+            cached = previous.get(rel_dir)
+            if cached and cached["mtime"] == mtime:
+                return cached
+            entries = {}
+            with os.scandir(ICON_DIR / rel_dir) as it:
+                for entry in it:
+                    entries[entry.name] = os.readlink(entry.path) if entry.is_symlink() else None
+            return {"mtime": mtime, "entries": entries}
+
+        dirs = list(dirs)
+        with ThreadPoolExecutor(max_workers=IO_WORKERS) as pool:
+            return dict(zip(dirs, pool.map(list_dir, dirs)))
+
+    def validate(self, incremental: bool = False, as_json: bool = False, baseline: bool = False) -> bool:
+        """Validate catalog integrity - check for missing files, broken symlinks, etc.
+
+        Works from one scandir listing per directory (read in parallel)
+        rather than stat-ing every path, and resolves symlink targets
+        against those listings. The listings are saved to
+        .icon-validate.json; with incremental, directories that haven't
+        changed since then are not read again, so a re-run costs one stat
+        per directory.
+
+        The issues found are recorded in the same file as a baseline. With
+        baseline, that record is left alone and only issues missing from it
+        count: each issue gets a "new" flag, and the result is False only
+        if some issue is new. Without a recorded baseline every issue is new.
+
+        Args:
+            incremental: Reuse listings of unchanged directories
+            as_json: Print a machine-readable report instead of text
+            baseline: Compare against the recorded issues instead of replacing them
+
+        Returns:
+            True if no issues (or no new ones, with baseline) were found;
+            warnings don't count
+        """
+        previous = {}
+        known = None
+        if (incremental or baseline) and VALIDATE_STATE_FILE.exists():
+            try:
+                with open(VALIDATE_STATE_FILE, 'r') as f:
+                    state = json.load(f)
+                if state.get("version") == VALIDATE_STATE_VERSION:
+                    previous = state["dirs"] if incremental else {}
+                    known = state.get("issues")
+            except (OSError, ValueError, KeyError):
+                previous = {}
 
         issues = []
         warnings = []
 
+        def report(level: list, kind: str, message: str, **details):
+            level.append({"type": kind, "message": message, **details})
+
+        raw_rel = str(RAW_DIR.relative_to(ICON_DIR))
+        catalog_rel = str(CATALOG_DIR.relative_to(ICON_DIR))
+        source_dirs = {os.path.dirname(icon.get('filename', f"raw/{icon['id']}.png"))
+                       for icon in self.catalog["icons"]}
+        listings = self._directory_listings(source_dirs | {raw_rel, catalog_rel}, previous)
+        category_root = listings[catalog_rel]
+        if category_root is not None:
+            category_dirs = [f"{catalog_rel}/{name}" for name in category_root["entries"]
+                             if (ICON_DIR / catalog_rel / name).is_dir()]
+            listings.update(self._directory_listings(category_dirs, previous))
+        else:
+            category_dirs = []
+
+        def exists(rel_path: str) -> bool:
+            """Whether a path relative to the library root exists, via the listings"""
+            rel_dir, name = os.path.split(rel_path)
+            if rel_dir not in listings:
+                listings.update(self._directory_listings([rel_dir], previous))
+            listing = listings[rel_dir]
+            if listing is None or name not in listing["entries"]:
+                return False
+            if listing["entries"][name] is not None:
+                return (ICON_DIR / rel_path).exists()  # a symlink itself; follow it
+            return True
+
+        def link_target(rel_dir: str, target: str) -> Optional[str]:
+            """A symlink's target relative to the library root, if it points inside it"""
+            if os.path.isabs(target):
+                rel = os.path.relpath(target, ICON_DIR)
+            else:
+                rel = os.path.normpath(f"{rel_dir}/{target}")
+            return None if rel.startswith("..") else rel
+
+        link_status = {}
+
+        def link_ok(rel_dir: str, target: str) -> bool:
+            key = (rel_dir, target)
+            if key not in link_status:
+                rel = link_target(rel_dir, target)
+                if rel is None:
+                    link_status[key] = os.path.exists(os.path.join(ICON_DIR, rel_dir, target))
+                else:
+                    link_status[key] = exists(rel)
+            return link_status[key]
+
         # Check if required directories exist
-        if not RAW_DIR.exists():
-            issues.append(f"✗ RAW directory missing: {RAW_DIR}")
-        if not CATALOG_DIR.exists():
-            issues.append(f"✗ CATALOG directory missing: {CATALOG_DIR}")
+        if listings[raw_rel] is None:
+            report(issues, "missing-directory", f"✗ RAW directory missing: {RAW_DIR}", path=str(RAW_DIR))
+        if category_root is None:
+            report(issues, "missing-directory", f"✗ CATALOG directory missing: {CATALOG_DIR}", path=str(CATALOG_DIR))
 
         # Check each icon in catalog
         for icon in self.catalog["icons"]:
@@ -581,27 +3121,64 @@ class IconManager:
             filename = icon.get('filename', f"raw/{icon_id}.png")
 
             # Check if source file exists
-            source_path = ICON_DIR / filename
-            if not source_path.exists():
-                issues.append(f"✗ Missing source file for '{semantic}' (#{icon_id}): {filename}")
+            if not exists(filename):
+                report(issues, "missing-source", f"✗ Missing source file for '{semantic}' (#{icon_id}): {filename}",
+                       id=icon_id, semanticName=semantic, path=filename)
 
             # Check if symlink exists in catalog
             category = icon.get('category', 'uncategorized')
-            symlink_path = CATALOG_DIR / category / f"{semantic}.png"
-            if not symlink_path.exists():
-                warnings.append(f"⚠ Missing catalog symlink for '{semantic}' at: {symlink_path}")
-            elif not symlink_path.is_symlink():
-                warnings.append(f"⚠ Not a symlink: {symlink_path}")
+            rel_dir = f"{catalog_rel}/{category}"
+            listing = listings.get(rel_dir)
+            target = listing["entries"].get(f"{semantic}.png", False) if listing else False
+            if target is False or (target is not None and not link_ok(rel_dir, target)):
+                symlink_path = CATALOG_DIR / category / f"{semantic}.png"
+                report(warnings, "missing-symlink", f"⚠ Missing catalog symlink for '{semantic}' at: {symlink_path}",
+                       id=icon_id, semanticName=semantic, path=str(symlink_path))
+            elif target is None:
+                symlink_path = CATALOG_DIR / category / f"{semantic}.png"
+                report(warnings, "not-symlink", f"⚠ Not a symlink: {symlink_path}",
+                       id=icon_id, semanticName=semantic, path=str(symlink_path))
 
         # Check for orphaned symlinks (symlinks pointing to non-existent files)
-        if CATALOG_DIR.exists():
-            for category_dir in CATALOG_DIR.iterdir():
-                if category_dir.is_dir():
-                    for symlink in category_dir.glob("*.png"):
-                        if symlink.is_symlink():
-                            target = symlink.resolve()
-                            if not target.exists():
-                                issues.append(f"✗ Broken symlink: {symlink} → {target}")
+        for rel_dir in category_dirs:
+            listing = listings[rel_dir]
+            if listing is None:
+                continue
+            for name, target in listing["entries"].items():
+                if name.endswith(".png") and target is not None and not link_ok(rel_dir, target):
+                    symlink = ICON_DIR / rel_dir / name
+                    resolved = ICON_DIR / (link_target(rel_dir, target) or target)
+                    report(issues, "broken-symlink", f"✗ Broken symlink: {symlink} → {resolved}",
+                           path=str(symlink), target=str(resolved))
+
+        if baseline:
+            recorded = set(known or ())
+            for issue in issues:
+                issue["new"] = self._issue_key(issue) not in recorded
+            failing = [issue for issue in issues if issue["new"]]
+        else:
+            known = sorted({self._issue_key(issue) for issue in issues})
+            failing = issues
+
+        try:
+            with atomic_write(VALIDATE_STATE_FILE) as f:
+                json.dump({"version": VALIDATE_STATE_VERSION,
+                           "dirs": {d: l for d, l in listings.items() if l is not None},
+                           "issues": known}, f)
+        except OSError:
+            pass  # the state only speeds up --incremental and keeps the baseline
+
+        if as_json:
+            print(json.dumps({
+                "ok": not failing,
+                "icons": len(self.catalog["icons"]),
+                "baseline": baseline and known is not None,
+                "issues": issues,
+                "warnings": warnings,
+            }, indent=2))
+            return not failing
+
+        print("\n=== Validating Icon Catalog ===\n")
 
         # Report results
         if not issues and not warnings:
@@ -610,27 +3187,454 @@ class IconManager:
             if issues:
                 print(f"Found {len(issues)} issue(s):")
                 for issue in issues:
-                    print(f"  {issue}")
+                    print(f"  {issue['message']}" + (" (new)" if issue.get("new") else ""))
             if warnings:
                 print(f"\nFound {len(warnings)} warning(s):")
                 for warning in warnings:
-                    print(f"  {warning}")
+                    print(f"  {warning['message']}")
 
         print(f"\nSummary:")
         print(f"  Total icons in catalog: {len(self.catalog['icons'])}")
-        print(f"  Issues: {len(issues)}")
+        print(f"  Issues: {len(issues)}" + (f" ({len(failing)} new)" if baseline else ""))
         print(f"  Warnings: {len(warnings)}")
+        return not failing
+
+    @staticmethod
+    def _issue_key(issue: Dict) -> str:
+        """Identity of a validate issue across runs: its type and library-relative path"""
+        path = issue.get("path", "")
+        if os.path.isabs(path):
+            path = os.path.relpath(path, ICON_DIR)
+        return f"{issue['type']}:{path}"
+
+    def _refresh_image_info(self, force: bool = False) -> Tuple[List[Dict], Dict[str, int]]:
+        """Bring every icon's "image" field up to date with its source file
+
+        Files are probed on a thread pool; those whose mtime and size match
+        the stored values are not re-read unless force is set. Changed
+        icons are re-indexed and marked dirty but not saved.
+
+        Returns:
+            (icons considered, counts of "scanned"/"unchanged"/"missing")
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        def probe(icon: Dict) -> Tuple[str, Optional[Dict]]:
+            path = ICON_DIR / icon.get("filename", f"raw/{icon['id']}.png")
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                return "missing", None
+            image = icon.get("image")
+            if not force and image and image.get("mtime") == st.st_mtime_ns \
+                    and image.get("bytes") == st.st_size:
+                return "unchanged", image
+            scanned = read_image_info(path, st)
+            if image and image.get("sha256") == scanned["sha256"]:
+                scanned = {**image, **scanned}  # same contents: keep phash/optimized results
+            return "scanned", scanned
+
+        icons = [icon for icon in self.catalog["icons"] if self._by_id.get(icon["id"]) is icon]
+        with ThreadPoolExecutor(max_workers=IO_WORKERS) as pool:
+            results = list(pool.map(probe, icons, chunksize=64))
+
+        counts = {"scanned": 0, "unchanged": 0, "missing": 0}
+        for icon, (status, image) in zip(icons, results):
+            counts[status] += 1
+            if status == "scanned" and image != icon.get("image"):
+                self._unindex_icon(icon)
+                icon["image"] = image
+                self._index_icon(icon, self._pos[icon["id"]])
+                self._dirty_ids.add(icon["id"])
+        return icons, counts
+
+    def scan_images(self, force: bool = False):
+        """Record dimensions, byte size and SHA-256 of every icon's source file
+
+        Results are stored in each icon's "image" field. Files whose mtime
+        and size match the stored values are skipped unless force is set,
+        so re-runs only read files that changed. Also reports icons whose
+        name carries a size suffix (e.g. -16x16) that disagrees with the
+        actual pixels.
+
+        Args:
+            force: Re-read every file
+        """
+        print(f"Scanning {len(self.catalog['icons'])} icon files...")
+        icons, counts = self._refresh_image_info(force)
+
+        mismatches = []
+        for icon in icons:
+            image = icon.get("image")
+            match = FILENAME_SIZE_RE.search(icon["semanticName"])
+            if image and "width" in image and match:
+                named = (int(match.group(1)), int(match.group(2)))
+                if named != (image["width"], image["height"]):
+                    mismatches.append((icon, named))
+
+        if self._dirty_ids:
+            self.save_catalog()
+
+        print(f"\n=== Image Scan Summary ===")
+        print(f"✓ Scanned: {counts['scanned']}")
+        print(f"  Unchanged (skipped): {counts['unchanged']}")
+        if counts["missing"]:
+            print(f"✗ Missing source files: {counts['missing']}")
+        sizes = sorted(self._by_size.items(), key=lambda item: -len(item[1]))
+        if sizes:
+            print("Sizes: " + ", ".join(f"{px}px: {len(ids)}" for px, ids in sizes[:8] if ids))
+        if mismatches:
+            print(f"\n⚠ {len(mismatches)} icon(s) named with a size that doesn't match the file:")
+            for icon, (width, height) in mismatches[:10]:
+                image = icon["image"]
+                print(f"  {icon['semanticName']:30} named {width}x{height}, actually {image['width']}x{image['height']}")
+            if len(mismatches) > 10:
+                print(f"  ... and {len(mismatches) - 10} more")
+
+    def dedupe(self, distance: int = DEDUPE_DISTANCE, near: bool = True, collapse: bool = False):
+        """Report duplicate icon files and optionally merge exact copies
+
+        Exact duplicates are icons whose source files have the same SHA-256
+        (from the scan-images data, refreshed incrementally). Near-duplicates
+        are icons whose perceptual hashes differ in at most `distance` bits,
+        typically the same artwork at another size or with small edits.
+        Perceptual hashes need the pixels decoded, so they are computed on a
+        process pool and kept in each icon's "image" field for next time.
+
+        Args:
+            distance: Max Hamming distance between perceptual hashes
+            near: Also look for near-duplicates
+            collapse: Move each exact-duplicate group into one file under
+                      raw/blobs/<sha256>.png and point every entry at it
+        """
+        print("Hashing icon files...")
+        icons, counts = self._refresh_image_info()
+        hashed = [icon for icon in icons if icon.get("image")]
+        for icon in hashed:
+            icon.setdefault("filename", f"raw/{icon['id']}.png")
+
+        exact = {}
+        for icon in hashed:
+            exact.setdefault(icon["image"]["sha256"], []).append(icon)
+        exact_groups = {sha: group for sha, group in exact.items() if len(group) > 1}
+
+        print(f"\n=== Duplicate Report ({len(hashed)} files) ===")
+        if exact_groups:
+            wasted = sum(group[0]["image"]["bytes"] * (len({i["filename"] for i in group}) - 1)
+                         for group in exact_groups.values())
+            print(f"\nExact duplicates: {len(exact_groups)} group(s), {wasted:,} bytes reclaimable")
+            for sha, group in exact_groups.items():
+                print(f"  {sha[:12]}: " + ", ".join(f"{i['semanticName']} ({i['filename']})" for i in group))
+        else:
+            print("\n✓ No exact duplicates")
+
+        if near:
+            self._compute_perceptual_hashes(hashed)
+            near_groups = self._near_duplicate_groups(hashed, distance)
+            if near_groups:
+                print(f"\nNear duplicates (≤{distance} bits apart): {len(near_groups)} group(s)")
+                for group in near_groups:
+                    print("  " + ", ".join(f"{i['semanticName']} #{i['id']}" for i in group))
+            else:
+                print(f"\n✓ No near duplicates within {distance} bits")
+
+        if collapse and exact_groups:
+            self._collapse_duplicates(exact_groups)
+        elif self._dirty_ids:
+            self.save_catalog()
+
+    def _compute_perceptual_hashes(self, icons: List[Dict]):
+        """Fill in image["phash"] for icons that don't have one yet"""
+        pending = {}
+        for icon in icons:
+            if "phash" not in icon["image"]:
+                pending.setdefault(icon["image"]["sha256"], []).append(icon)
+        if not pending:
+            return
+
+        print(f"Computing perceptual hashes for {len(pending)} file(s)...")
+        hashes = self._perceptual_hashes([group[0]["filename"] for group in pending.values()])
+        for group, phash in zip(pending.values(), hashes):
+            for icon in group:
+                icon["image"]["phash"] = phash
+                self._dirty_ids.add(icon["id"])
+        self._phash_tree = None  # rebuilt with the new hashes on next use
+
+    @staticmethod
+    def _perceptual_hashes(filenames: List[str]) -> List[Optional[str]]:
+        """pngtools.perceptual_hash of each file under ICON_DIR, computed on a process pool"""
+        import pngtools
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor() as pool:
+            return list(pool.map(pngtools.perceptual_hash, [str(ICON_DIR / f) for f in filenames],
+                                 chunksize=32))
+
+    @staticmethod
+    def _icon_phash(icon: Dict) -> Optional[int]:
+        """An icon's perceptual hash as an int, if it has been computed"""
+        phash = (icon.get("image") or {}).get("phash")
+        return int(phash, 16) if phash else None
+
+    def _phash_index(self) -> BKTree:
+        """BK-tree of every indexed icon's perceptual hash, keyed by id
+
+        Built on first use; afterwards _index_icon/_unindex_icon keep it
+        current, so icons added with add_icon are found straight away.
+        """
+        if self._phash_tree is None:
+            tree = BKTree()
+            for icon in self.catalog["icons"]:
+                phash = self._icon_phash(icon)
+                if phash is not None and self._by_id.get(icon["id"]) is icon:
+                    tree.add(phash, icon["id"])
+            self._phash_tree = tree
+        return self._phash_tree
+
+    def similar(self, name: str, limit: int = 10,
+                max_distance: int = 64) -> Optional[List[Tuple[int, Dict]]]:
+        """Icons that look most like the named one
+
+        Icons are ranked by the Hamming distance between perceptual hashes
+        (see pngtools.perceptual_hash), looked up in a BK-tree over the catalog.
+        Icons sharing the query's file are left out, and of several icons
+        sharing one file only the first is listed. Icons never hashed
+        (not yet seen by dedupe/similar) are hashed first, without the
+        catalog lock; it is only taken to store the new hashes. Icons whose
+        files are missing are skipped.
+
+        Args:
+            name: Semantic name or id of the icon to match
+            limit: Maximum number of results
+            max_distance: Ignore icons more than this many bits apart
+
+        Returns:
+            [(distance, icon)] nearest first, or None if name is unknown
+        """
+        icon = self.resolve_icon(name)
+        if icon is None:
+            return None
+
+        # Checked once per index build; indexing an unhashed icon drops the tree
+        unhashed = [] if self._phash_tree is not None else \
+            [i for i in self.catalog["icons"]
+             if "phash" not in (i.get("image") or {}) and self._by_id.get(i["id"]) is i]
+        stamps = {}
+        for i in unhashed:
+            filename = i.get("filename", f"raw/{i['id']}.png")
+            try:
+                st = (ICON_DIR / filename).stat()
+            except FileNotFoundError:
+                continue
+            stamps[filename] = (st.st_mtime_ns, st.st_size)
+        if stamps:
+            self._store_perceptual_hashes(stamps)
+            icon = self.resolve_icon(name)  # the lock may have reloaded the catalog
+            if icon is None:
+                return None
+
+        query = self._icon_phash(icon)
+        if query is None:
+            return []
+        seen_files = {icon.get("filename", f"raw/{icon['id']}.png")}
+
+        def accept(icon_id: str) -> bool:
+            other = self._by_id.get(icon_id)
+            filename = other.get("filename", f"raw/{icon_id}.png")
+            if filename in seen_files:
+                return False
+            seen_files.add(filename)  # same file, same distance: one entry is enough
+            return True
+
+        matches = self._phash_index().nearest(query, limit, max_distance, accept)
+        return [(distance, self._by_id[icon_id]) for distance, icon_id in matches]
+
+    def _store_perceptual_hashes(self, stamps: Dict[str, Tuple[int, int]]):
+        """Hash the given files, then save the hashes under the catalog lock
+
+        stamps maps each filename to its (mtime_ns, size) when it was
+        picked; a hash is only stored for icons whose scanned image still
+        matches that stamp, so a file replaced meanwhile isn't mislabelled.
+        """
+        print(f"Computing perceptual hashes for {len(stamps)} file(s)...")
+        hashes = dict(zip(stamps, self._perceptual_hashes(list(stamps))))
+        with self.locked():
+            icons, _ = self._refresh_image_info()
+            for icon in icons:
+                image = icon.get("image")
+                filename = icon.get("filename", f"raw/{icon['id']}.png")
+                if image and "phash" not in image and filename in hashes \
+                        and (image["mtime"], image["bytes"]) == stamps[filename]:
+                    image["phash"] = hashes[filename]
+                    self._dirty_ids.add(icon["id"])
+            self._phash_tree = None
+            if self._dirty_ids:
+                self.save_catalog()
+
+    @staticmethod
+    def _near_duplicate_groups(icons: List[Dict], distance: int) -> List[List[Dict]]:
+        """Cluster icons whose perceptual hashes are within distance bits
+
+        Byte-identical files count as one member, so a group is only
+        reported if it contains at least two different files.
+        """
+        by_hash = {}
+        for icon in icons:
+            phash = icon["image"].get("phash")
+            if phash is not None:
+                by_hash.setdefault(int(phash, 16), []).append(icon)
+        values = list(by_hash)
+
+        parent = list(range(len(values)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, a in enumerate(values):
+            for j in range(i + 1, len(values)):
+                if hamming(a, values[j]) <= distance:
+                    parent[find(j)] = find(i)
+
+        clusters = {}
+        for i, value in enumerate(values):
+            clusters.setdefault(find(i), []).extend(by_hash[value])
+        groups = []
+        for members in clusters.values():
+            if len({icon["image"]["sha256"] for icon in members}) > 1:
+                groups.append(members)
+        return groups
+
+    def _collapse_duplicates(self, groups: Dict[str, List[Dict]]):
+        """Store each exact-duplicate group once, as raw/blobs/<sha256>.png
+
+        Blobs are hard-linked (or copied) into place and the catalog is
+        saved pointing at them before any original file is removed, so if
+        anything fails part-way every path the catalog refers to still
+        exists.
+        """
+        BLOB_DIR.mkdir(parents=True, exist_ok=True)
+        freed = 0
+        obsolete = []
+        links = []
+        with self.batch():
+            for sha, group in groups.items():
+                blob = BLOB_DIR / f"{sha}.png"
+                blob_name = str(blob.relative_to(ICON_DIR))
+                sources = sorted({ICON_DIR / icon["filename"] for icon in group} - {blob})
+                obsolete.extend(sources)
+                if not blob.exists():
+                    partial = blob.with_suffix(".tmp")
+                    export_file(sources.pop(0), partial, "hard")
+                    os.replace(partial, blob)
+                freed += sum(source.stat().st_size for source in sources)
+
+                blob_stat = blob.stat()
+                for icon in group:
+                    icon["filename"] = blob_name
+                    icon["image"]["mtime"] = blob_stat.st_mtime_ns
+                    self._dirty_ids.add(icon["id"])
+                    links.append((icon["id"], icon["semanticName"], icon.get("category", "uncategorized"),
+                                  blob_name))
+            self.save_catalog()
+
+        for icon_id, semantic_name, category, filename in links:
+            self.create_symlink(icon_id, semantic_name, category, filename)
+        for source in obsolete:
+            source.unlink(missing_ok=True)
+        print(f"✓ Collapsed {len(groups)} group(s) into raw/blobs/, freed {freed:,} bytes")
+
+    def optimize(self, dry_run: bool = False):
+        """Losslessly recompress every icon PNG and remove macOS ._* files
+
+        Files are recompressed on a process pool (see pngtools.optimize)
+        and replaced only when smaller. Each icon records the result in
+        image["optimized"] ({"before", "after", "sha256"}); files whose
+        current SHA-256 matches the recorded one are skipped, so re-runs
+        only touch new or changed files.
+
+        Args:
+            dry_run: Report the savings without changing any file
+        """
+        import pngtools
+        from concurrent.futures import ProcessPoolExecutor
+
+        junk = [path for directory in (ICON_DIR, RAW_DIR) if directory.is_dir()
+                for path in directory.glob("._*") if path.is_file()]
+        junk += [path for path in CATALOG_DIR.glob("*/._*") if path.is_file()]
+        for path in junk:
+            if not dry_run:
+                path.unlink()
+        if junk:
+            verb = "Would remove" if dry_run else "Removed"
+            print(f"✓ {verb} {len(junk)} macOS resource-fork file(s) (._*)")
+
+        print("Checking icon files...")
+        icons, _ = self._refresh_image_info()
+        pending = {}
+        skipped = 0
+        for icon in icons:
+            image = icon.get("image")
+            if not image or "width" not in image:
+                continue
+            if image.get("optimized", {}).get("sha256") == image["sha256"]:
+                skipped += 1
+                continue
+            pending.setdefault(icon.get("filename", f"raw/{icon['id']}.png"), []).append(icon)
+
+        if not pending:
+            print(f"✓ All {skipped} icon files already optimized")
+            if self._dirty_ids and not dry_run:
+                self.save_catalog()
+            return
+
+        print(f"Optimizing {len(pending)} file(s)...")
+        paths = [str(ICON_DIR / filename) for filename in pending]
+        with ProcessPoolExecutor() as pool:
+            results = list(pool.map(pngtools.optimize_file, paths, [dry_run] * len(paths), chunksize=16))
+
+        total_before = total_after = failed = 0
+        for (filename, group), result in zip(pending.items(), results):
+            if result is None:
+                failed += 1
+                continue
+            before, after = result
+            total_before += before
+            total_after += min(before, after)
+            if dry_run:
+                continue
+            path = ICON_DIR / filename
+            image = read_image_info(path)
+            old = group[0]["image"]
+            if "phash" in old:
+                image["phash"] = old["phash"]  # pixels are unchanged
+            image["optimized"] = {"before": old.get("optimized", {}).get("before", before),
+                                  "after": image["bytes"], "sha256": image["sha256"]}
+            for icon in group:
+                icon["image"] = dict(image)
+                self._dirty_ids.add(icon["id"])
+
+        saved = total_before - total_after
+        percent = saved / total_before * 100 if total_before else 0
+        verb = "Would save" if dry_run else "Saved"
+        print(f"\n✓ {verb} {saved:,} bytes ({percent:.1f}%) across {len(pending) - failed} file(s)")
+        if skipped:
+            print(f"  Already optimized (skipped): {skipped}")
+        if failed:
+            print(f"✗ Could not decode {failed} file(s)")
+        if self._dirty_ids and not dry_run:
+            self.save_catalog()
 
     def info(self, semantic_name: str):
         """Show detailed information about a specific icon"""
-        icons = self.find_icons_by_semantic(semantic_name)
+        icon = self._db.resolve(semantic_name) if self._db_only() else self.resolve_icon(semantic_name)
 
-        if not icons:
+        if not icon:
             print(f"✗ Icon '{semantic_name}' not found")
             return
 
-        icon = icons[0]
-
         print(f"\n=== Icon Information ===")
         print(f"Semantic Name: {icon['semanticName']}")
         print(f"Icon ID: #{icon['id']}")
@@ -641,12 +3645,20 @@ class IconManager:
         tags = icon.get('tags', [])
         print(f"Tags: {', '.join(tags) if tags else 'none'}")
 
-        used_in = icon.get('usedIn', [])
+        used_in = self.get_projects_using().get(icon['semanticName'], [])
         if used_in:
             print(f"Used in projects: {', '.join(used_in)}")
         else:
             print(f"Used in projects: none")
 
+        image = icon.get('image')
+        if image:
+            dimensions = f"{image['width']}x{image['height']}, " if 'width' in image else ""
+            print(f"Image: {dimensions}{image['bytes']:,} bytes, sha256 {image['sha256'][:12]}")
+            optimized = image.get('optimized')
+            if optimized:
+                print(f"Optimized: {optimized['before']:,} → {optimized['after']:,} bytes")
+
         # Check if files exist
         source_path = ICON_DIR / icon.get('filename', f"raw/{icon['id']}.png")
         symlink_path = CATALOG_DIR / icon.get('category', 'uncategorized') / f"{icon['semanticName']}.png"
@@ -663,9 +3675,9 @@ class IconManager:
             print("No icons in catalog")
             return
 
-        # Icons are appended to the list, so last ones are most recent
-        recent_icons = icons[-limit:] if len(icons) > limit else icons
-        recent_icons.reverse()  # Show newest first
+        # Icons are appended to the list, so last ones are most recent;
+        # newest first (a reversed copy: the catalog's order must not change)
+        recent_icons = icons[-limit:][::-1]
 
         print(f"\n=== Recently Cataloged Icons (last {len(recent_icons)}) ===\n")
 
@@ -675,7 +3687,8 @@ class IconManager:
                 tags += ", ..."
             print(f"  {icon['semanticName']:20} #{icon['id']:4}  [{icon['category']:12}]  {tags}")
 
-    def export_category(self, project_path: str, category: str):
+    def export_category(self, project_path: str, category: str, link: str = "copy",
+                        size: Optional[str] = None):
         """Export all icons from a specific category to a project"""
         if category not in self.catalog["categories"]:
             print(f"✗ Invalid category: {category}")
@@ -683,8 +3696,7 @@ class IconManager:
             return
 
         # Find all icons in this category
-        category_icons = [icon for icon in self.catalog["icons"]
-                         if icon.get("category") == category]
+        category_icons = self.find_icons_by_category(category)
 
         if not category_icons:
             print(f"No icons found in category '{category}'")
@@ -693,12 +3705,276 @@ class IconManager:
         print(f"Found {len(category_icons)} icons in '{category}' category")
 
         # Export them
-        icon_names = [icon['semanticName'] for icon in category_icons]
-        self.export_to_project(project_path, icon_names)
+        self.export_icons(project_path, category_icons, link, size)
+
+    def db_import(self, json_file: Optional[str] = None):
+        """Rebuild icon-catalog.db from a JSON catalog
+
+        Args:
+            json_file: JSON catalog to import (default: icon-catalog.json)
+        """
+        json_path = Path(json_file) if json_file else CATALOG_FILE
+        if not json_path.exists():
+            print(f"✗ Error: JSON catalog not found: {json_path}")
+            return
+
+        with open(json_path, 'r') as f:
+            catalog = json.load(f)
+
+        db = SQLiteCatalogStore(CATALOG_DB_FILE)
+        db.replace_catalog(catalog)
+        db.close()
+
+        print(f"✓ Imported {len(catalog['icons'])} icons from {json_path}")
+        print(f"✓ Database saved to {CATALOG_DB_FILE}")
+        if not db.has_fts:
+            print("⚠ sqlite3 was built without FTS5; search will use LIKE matching")
+
+    def db_export(self, json_file: Optional[str] = None):
+        """Write icon-catalog.db back out in the icon-catalog.json format
+
+        Args:
+            json_file: Output path (default: icon-catalog.json)
+        """
+        if not CATALOG_DB_FILE.exists():
+            print(f"✗ Error: No database at {CATALOG_DB_FILE}. Run 'db-import' first")
+            return
+
+        db = SQLiteCatalogStore(CATALOG_DB_FILE)
+        catalog = db.load()
+        db.close()
+
+        json_path = Path(json_file) if json_file else CATALOG_FILE
+        with atomic_write(json_path, durable=True) as f:
+            json.dump(catalog, f, indent=2)
+
+        print(f"✓ Exported {len(catalog['icons'])} icons to {json_path}")
+
+    def shard_import(self, json_file: Optional[str] = None):
+        """Split a JSON catalog into the per-category shards of icon-catalog.d/
+
+        Args:
+            json_file: JSON catalog to import (default: icon-catalog.json)
+        """
+        json_path = Path(json_file) if json_file else CATALOG_FILE
+        if not json_path.exists():
+            print(f"✗ Error: JSON catalog not found: {json_path}")
+            return
+
+        with open(json_path, 'r') as f:
+            catalog = json.load(f)
+
+        count = ShardedCatalogStore(SHARD_DIR).replace_catalog(catalog)
+
+        print(f"✓ Imported {len(catalog['icons'])} icons from {json_path}")
+        print(f"✓ Wrote {count} shard(s) to {SHARD_DIR}")
+
+    def shard_export(self, json_file: Optional[str] = None):
+        """Join the shards of icon-catalog.d/ back into the icon-catalog.json format
+
+        Args:
+            json_file: Output path (default: icon-catalog.json)
+        """
+        shards = ShardedCatalogStore(SHARD_DIR)
+        if not shards.exists():
+            print(f"✗ Error: No shards in {SHARD_DIR}. Run 'shard-import' first")
+            return
+
+        catalog = shards.load()
+        json_path = Path(json_file) if json_file else CATALOG_FILE
+        with atomic_write(json_path, durable=True) as f:
+            json.dump(catalog, f, indent=2)
+
+        print(f"✓ Exported {len(catalog['icons'])} icons to {json_path}")
+
+class IconDaemon:
+    """Warm server that runs icon-manager commands over a Unix domain socket
+
+    Keeps one IconManager (catalog plus indexes) per storage backend in
+    memory and reloads it when its store changes underneath it (the same
+    check locked() makes), so edits made by other processes are picked up
+    on the next request.
+
+    Protocol: the client sends its working directory followed by each
+    argument, every field terminated by a NUL byte, then shuts down its
+    write side. The daemon replies with the command's combined output,
+    an ASCII record separator (0x1e) and the exit status. The icon wrapper
+    speaks this with socat; daemon_request() is the Python client.
+    """
+
+    def __init__(self, socket_path: Path, parser: argparse.ArgumentParser):
+        self.socket_path = socket_path
+        self.parser = parser
+        self.managers = {}
+        self.running = False
+
+    def manager_for(self, store: Optional[str]) -> IconManager:
+        """Return the warm manager for a store, reloading it if the store changed"""
+        store = store or os.environ.get("ICONICS_STORE", "json")
+        manager = self.managers.get(store)
+        if manager is None or manager._store_changed():
+            manager = IconManager(store)
+            manager._load()  # the point of the daemon: load once, up front
+            if manager._db is None:
+                manager._load_search_index()  # decode now rather than on the first search
+            self.managers[store] = manager
+        return manager
+
+    def handle(self, cwd: str, argv: List[str]) -> Tuple[str, int]:
+        """Run one command in-process and return (output, exit status)"""
+        import io
+        import traceback
+        from contextlib import redirect_stdout, redirect_stderr
+
+        out = io.StringIO()
+        status = 0
+        old_cwd = os.getcwd()
+        try:
+            os.chdir(cwd)
+            with redirect_stdout(out), redirect_stderr(out):
+                args = self.parser.parse_args(argv)
+                if args.command == "serve":
+                    if args.stop:
+                        self.running = False
+                        print(f"✓ Daemon on {self.socket_path} stopped")
+                    else:
+                        print(f"✓ Daemon running on {self.socket_path} (pid {os.getpid()})")
+                else:
+                    with profiling(profile_targets(args), args.command):
+                        manager = self.manager_for(args.store)
+                        try:
+                            run_command(manager, args, self.parser)
+                        except BaseException:
+                            # Don't keep serving a half-mutated catalog
+                            self.managers.pop(manager.store, None)
+                            raise
+        except SystemExit as e:
+            status = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except CatalogConflictError as e:
+            out.write(f"✗ {e}\n")
+            status = 1
+        except Exception:
+            out.write(traceback.format_exc())
+            status = 1
+        finally:
+            os.chdir(old_cwd)
+        return out.getvalue(), status
+
+    def serve_forever(self):
+        """Bind the socket and answer requests until stopped"""
+        import socket
+
+        if daemon_request(self.socket_path, ["serve", "--status"]) is not None:
+            print(f"✗ A daemon is already running on {self.socket_path}")
+            sys.exit(1)
+        if self.socket_path.exists() or self.socket_path.is_symlink():
+            self.socket_path.unlink()  # stale socket from a daemon that died
+
+        self.manager_for(None)  # warm up before accepting connections
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            server.bind(str(self.socket_path))
+        finally:
+            os.umask(old_umask)
+        server.listen(16)
+        print(f"✓ Serving {CATALOG_FILE} on {self.socket_path} (pid {os.getpid()})")
+        sys.stdout.flush()
+
+        self.running = True
+        try:
+            while self.running:
+                conn, _ = server.accept()
+                with conn:
+                    chunks = []
+                    while True:
+                        chunk = conn.recv(65536)
+                        if not chunk:
+                            break
+                        chunks.append(chunk)
+                    fields = b"".join(chunks).split(b"\0")
+                    if len(fields) < 2:
+                        continue
+                    cwd, *argv = [field.decode("utf-8", "surrogateescape") for field in fields[:-1]]
+                    output, status = self.handle(cwd, argv)
+                    try:
+                        conn.sendall(output.encode("utf-8", "surrogateescape") + b"\x1e" + str(status).encode())
+                    except OSError:
+                        pass  # client went away
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+
+
+def daemon_request(socket_path: Path, argv: List[str], timeout: float = 5.0) -> Optional[Tuple[str, int]]:
+    """Send one command to a running daemon; None if no daemon answers"""
+    import socket
+
+    request = b"".join(field.encode("utf-8", "surrogateescape") + b"\0" for field in [os.getcwd(), *argv])
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.settimeout(timeout)
+            conn.connect(str(socket_path))
+            conn.sendall(request)
+            conn.shutdown(socket.SHUT_WR)
+            chunks = []
+            while True:
+                chunk = conn.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+    except OSError:
+        return None
+    output, _, status = b"".join(chunks).rpartition(b"\x1e")
+    return output.decode("utf-8", "surrogateescape"), int(status or 1)
+
+
+class DeferredArgumentParser(argparse.ArgumentParser):
+    """Subcommand parser that registers its arguments when it is first used
+
+    Only one subcommand is parsed per run, and adding arguments (each one
+    is checked with a help formatter) is most of the cost of building the
+    parser, so build_parser's add_argument calls on subcommands are
+    recorded and replayed only for the subcommand on the command line.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._deferred = []
+        super().__init__(*args, **kwargs)
+
+    def add_argument(self, *args, **kwargs):
+        self._deferred.append((args, kwargs))
 
-def main():
+    def _add_deferred(self):
+        deferred, self._deferred = self._deferred, []
+        for args, kwargs in deferred:
+            super().add_argument(*args, **kwargs)
+
+    def add_mutually_exclusive_group(self, **kwargs):
+        self._add_deferred()  # groups add their arguments directly; keep them in order
+        return super().add_mutually_exclusive_group(**kwargs)
+
+    def parse_known_args(self, args=None, namespace=None):
+        self._add_deferred()
+        return super().parse_known_args(args, namespace)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser for all subcommands"""
     parser = argparse.ArgumentParser(description="Icon library management system")
-    subparsers = parser.add_subparsers(dest="command", help="Commands")
+    parser.add_argument("--store", choices=["json", "sqlite", "sharded"],
+                        help="Catalog storage backend (default: $ICONICS_STORE or json); "
+                             "sqlite search doesn't match misspelled words")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print time and I/O per phase to stderr (also: ICONICS_TRACE=1)")
+    parser.add_argument("--profile-output", action="append", metavar="FILE",
+                        help="Write a Chrome trace (*.json) or a cProfile dump (other names); repeatable")
+    subparsers = parser.add_subparsers(dest="command", help="Commands", parser_class=DeferredArgumentParser)
 
     # Add command
     add_parser = subparsers.add_parser("add", help="Add icon to catalog")
@@ -710,7 +3986,11 @@ def main():
 
     # Search command
     search_parser = subparsers.add_parser("search", help="Search icons")
-    search_parser.add_argument("query", help="Search query (tag or semantic name)")
+    search_parser.add_argument("query", nargs="*", help="Search query (tags, semantic name or description words)")
+    search_parser.add_argument("--size", type=int, help="Only icons of this pixel size (requires scan-images)")
+    search_parser.add_argument("--min-size", type=int, help="Only icons at least this many pixels (requires scan-images)")
+    search_parser.add_argument("--limit", type=int, help="Show only the top N results")
+    search_parser.add_argument("--names", action="store_true", help="Print only semantic names, one per line")
 
     # List command
     list_parser = subparsers.add_parser("list", help="List icons in category")
@@ -720,18 +4000,46 @@ def main():
     export_parser = subparsers.add_parser("export", help="Export icons to project")
     export_parser.add_argument("project_path", help="Path to project directory")
     export_parser.add_argument("icons", nargs="+", help="Icon semantic names to export")
+    export_parser.add_argument("--link", choices=EXPORT_LINK_MODES, default=os.environ.get("ICONICS_LINK", "copy"),
+                               help="Copy files, hard-link them, or reflink (copy-on-write) them (default: $ICONICS_LINK or copy)")
+    export_parser.add_argument("--size", type=size_spec,
+                               help="Export resized copies: pixels (24) or a scale (2x), e.g. lock-24px.png / lock@2x.png")
+    export_parser.add_argument("--markdown", action="store_true",
+                               help="Also print markdown snippets for the exported icons")
+
+    # Similar command
+    similar_parser = subparsers.add_parser("similar", help="Find icons that look like a given icon")
+    similar_parser.add_argument("name", help="Icon semantic name or id")
+    similar_parser.add_argument("--limit", type=int, default=10, help="Maximum results (default: 10)")
+    similar_parser.add_argument("--max-distance", type=int, default=64, metavar="BITS",
+                                help="Ignore icons whose perceptual hashes differ in more bits (0-64)")
+    similar_parser.add_argument("--names", action="store_true", help="Print only semantic names, one per line")
 
     # Stats command
-    subparsers.add_parser("stats", help="Show catalog statistics")
+    stats_parser = subparsers.add_parser("stats", help="Show catalog statistics")
+    stats_parser.add_argument("--json", action="store_true", help="Print the statistics as JSON")
 
     # Import CSV command
     import_parser = subparsers.add_parser("import-csv", help="Bulk import icons from CSV file")
     import_parser.add_argument("csv_file", help="Path to CSV file (id,semantic,tags,category,description)")
+    import_parser.add_argument("--strict", action="store_true", help="Roll back the whole import if any row is invalid")
+    import_parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_ROWS, metavar="ROWS",
+                               help=f"Rows committed per catalog save (default: {IMPORT_CHUNK_ROWS})")
 
     # Generate CSV command
     generate_parser = subparsers.add_parser("generate-csv", help="Auto-generate CSV from uncataloged icon filenames")
     generate_parser.add_argument("output_file", help="Path to output CSV file")
     generate_parser.add_argument("--limit", type=int, help="Maximum number of icons to process (default: all)")
+    generate_parser.add_argument("--visual", action="store_true",
+                                 help="Propose tags/categories from similar-looking cataloged icons (needs NumPy)")
+    generate_parser.add_argument("--neighbors", type=int, default=FEATURE_NEIGHBORS, metavar="K",
+                                 help=f"Cataloged icons consulted per visual suggestion (default: {FEATURE_NEIGHBORS})")
+
+    # Classify command
+    classify_parser = subparsers.add_parser("classify", help="Re-categorize the rows of an icon CSV from their names")
+    classify_parser.add_argument("csv_file", help="CSV with id/semantic and category columns")
+    classify_parser.add_argument("-o", "--output", help="Write the result here (default: update the CSV in place)")
+    classify_parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
 
     # Template commands
     template_create_parser = subparsers.add_parser("create-template", help="Create reusable template for icon families")
@@ -744,7 +4052,40 @@ def main():
     template_apply_parser.add_argument("csv_file", help="CSV file with id,semantic,extra_tags,description columns")
 
     # Validate command
-    subparsers.add_parser("validate", help="Validate catalog integrity (check for missing files, broken symlinks)")
+    validate_parser = subparsers.add_parser("validate", help="Validate catalog integrity (check for missing files, broken symlinks)")
+    validate_parser.add_argument("--incremental", action="store_true",
+                                 help="Only re-read directories that changed since the last validate")
+    validate_parser.add_argument("--json", action="store_true", help="Print a machine-readable report")
+    validate_parser.add_argument("--baseline", action="store_true",
+                                 help="Only fail on issues not recorded by the last plain validate")
+
+    # Scan images command
+    scan_parser = subparsers.add_parser("scan-images", help="Record pixel size, byte size and hash of each icon file")
+    scan_parser.add_argument("--force", action="store_true", help="Re-read files even if unchanged since the last scan")
+
+    # Sprite command
+    sprite_parser = subparsers.add_parser("sprite", help="Pack icons into sprite sheets with CSS/JSON maps")
+    sprite_parser.add_argument("output_dir", help="Directory for the sheets, CSS and JSON")
+    sprite_parser.add_argument("icons", nargs="*", help="Icon semantic names to include")
+    sprite_parser.add_argument("--category", choices=["files", "network", "security", "tools", "ui", "emoji", "development"],
+                               help="Include every icon in this category")
+    sprite_parser.add_argument("--name", default="icons", help="Base name of the generated files (default: icons)")
+    sprite_parser.add_argument("--prefix", default="icon", help="CSS class prefix (default: icon)")
+    sprite_parser.add_argument("--max-size", type=int, default=SPRITE_MAX_SIZE,
+                               help=f"Max sheet width/height in pixels (default: {SPRITE_MAX_SIZE})")
+    sprite_parser.add_argument("--padding", type=int, default=1, help="Pixels between icons (default: 1)")
+
+    # Optimize command
+    optimize_parser = subparsers.add_parser("optimize", help="Losslessly recompress icon PNGs and strip metadata chunks")
+    optimize_parser.add_argument("--dry-run", action="store_true", help="Report savings without changing files")
+
+    # Dedupe command
+    dedupe_parser = subparsers.add_parser("dedupe", help="Find duplicate and near-duplicate icon files")
+    dedupe_parser.add_argument("--distance", type=int, default=DEDUPE_DISTANCE,
+                               help=f"Max differing perceptual-hash bits for near-duplicates (default: {DEDUPE_DISTANCE})")
+    dedupe_parser.add_argument("--exact", action="store_true", help="Only report byte-identical files")
+    dedupe_parser.add_argument("--collapse", action="store_true",
+                               help="Replace exact duplicates with one shared file in raw/blobs/")
 
     # Info command
     info_parser = subparsers.add_parser("info", help="Show detailed information about a specific icon")
@@ -758,51 +4099,198 @@ def main():
     export_cat_parser = subparsers.add_parser("export-category", help="Export all icons from a category to a project")
     export_cat_parser.add_argument("project_path", help="Path to project directory")
     export_cat_parser.add_argument("category", choices=["files", "network", "security", "tools", "ui", "emoji", "development"])
+    export_cat_parser.add_argument("--link", choices=EXPORT_LINK_MODES, default=os.environ.get("ICONICS_LINK", "copy"),
+                                   help="Copy files, hard-link them, or reflink (copy-on-write) them (default: $ICONICS_LINK or copy)")
+    export_cat_parser.add_argument("--size", type=size_spec,
+                                   help="Export resized copies: pixels (24) or a scale (2x)")
+
+    # Markdown command (needs no catalog)
+    md_parser = subparsers.add_parser("md", help="Print markdown image snippets for exported icons")
+    md_parser.add_argument("names", nargs="+", help="Icon semantic names")
+    md_parser.add_argument("--project", help="Project the icons were exported to (default: the one containing the current directory)")
 
     # History command
     history_parser = subparsers.add_parser("history", help="Show icon usage history for project")
     history_parser.add_argument("project_path", help="Path to project directory")
+    history_parser.add_argument("--icons", action="store_true", help="Print only the last exported icon names")
 
     # Popular command
     popular_parser = subparsers.add_parser("popular", help="Show most popular icons")
     popular_parser.add_argument("--limit", type=int, default=10, help="Number of popular icons to show (default: 10)")
 
-    args = parser.parse_args()
-    manager = IconManager()
+    # Database commands
+    db_import_parser = subparsers.add_parser("db-import", help="Rebuild icon-catalog.db from the JSON catalog")
+    db_import_parser.add_argument("json_file", nargs="?", help="JSON catalog to import (default: icon-catalog.json)")
 
+    db_export_parser = subparsers.add_parser("db-export", help="Write icon-catalog.db back to the JSON catalog format")
+    db_export_parser.add_argument("json_file", nargs="?", help="Output JSON file (default: icon-catalog.json)")
+
+    shard_import_parser = subparsers.add_parser("shard-import",
+                                                help="Split the JSON catalog into per-category files in icon-catalog.d/")
+    shard_import_parser.add_argument("json_file", nargs="?", help="JSON catalog to import (default: icon-catalog.json)")
+
+    shard_export_parser = subparsers.add_parser("shard-export",
+                                                help="Join icon-catalog.d/ back into a single JSON catalog")
+    shard_export_parser.add_argument("json_file", nargs="?", help="Output JSON file (default: icon-catalog.json)")
+
+    # Daemon command
+    serve_parser = subparsers.add_parser("serve", help="Run a warm daemon that answers commands over a Unix socket")
+    serve_parser.add_argument("--socket", default=str(DAEMON_SOCKET), help=f"Socket path (default: {DAEMON_SOCKET})")
+    serve_group = serve_parser.add_mutually_exclusive_group()
+    serve_group.add_argument("--stop", action="store_true", help="Stop a running daemon")
+    serve_group.add_argument("--status", action="store_true", help="Report whether a daemon is running")
+
+    return parser
+
+
+# Commands that modify the catalog (or files next to it) and so run under its lock
+MUTATING_COMMANDS = frozenset({"add", "import-csv", "create-template", "apply-template", "scan-images",
+                               "dedupe", "optimize", "db-import", "db-export",
+                               "shard-import", "shard-export"})
+
+
+def run_command(manager: IconManager, args: argparse.Namespace, parser: argparse.ArgumentParser):
+    """Dispatch parsed arguments to the manager
+
+    Mutating commands hold the catalog lock from (re)load to save, so
+    concurrent runs apply their changes one after another.
+    """
+    with trace_phase(args.command or "help"):
+        if args.command in MUTATING_COMMANDS:
+            with manager.locked():
+                dispatch_command(manager, args, parser)
+        else:
+            dispatch_command(manager, args, parser)
+
+
+def profile_targets(args: argparse.Namespace) -> List[str]:
+    """Profiling outputs asked for by --profile/--profile-output, else by ICONICS_TRACE
+
+    ICONICS_TRACE is a comma-separated list of the same targets: "1" for
+    the summary, a *.json file for a Chrome trace, any other file name for
+    a cProfile dump.
+    """
+    targets = (["summary"] if args.profile else []) + (args.profile_output or [])
+    if not targets:
+        targets = [target for target in os.environ.get("ICONICS_TRACE", "").split(",")
+                   if target and target != "0"]
+    return targets
+
+
+@contextmanager
+def profiling(targets: List[str], title: str, entered: Optional[float] = None,
+              parsed: Optional[float] = None):
+    """Trace the phases run in the block and report them to targets afterwards
+
+    Does nothing when targets is empty. Phases are marked with
+    trace_phase() throughout the manager; see tracing.py.
+
+    Args:
+        targets: Outputs, as returned by profile_targets
+        title: Heading for the summary (the command)
+        entered: perf_counter() when main() started, to also record
+                 process start-up and module setup
+        parsed: perf_counter() when the arguments had been parsed
+    """
+    global _tracer
+    if not targets:
+        yield
+        return
+
+    import tracing
+
+    tracer = tracing.Tracer(tracing.process_start() if entered is not None else None)
+    if entered is not None:
+        if tracer.started is not None:
+            tracer.add("start-up", tracer.started, max(tracer.started, _MODULE_START))
+        tracer.add("module setup", _MODULE_START, entered)
+        if parsed is not None:
+            tracer.add("parse arguments", entered, parsed)
+    profiler = None
+    if tracing.needs_profiler(targets):
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    _tracer = tracer
+    try:
+        yield
+    finally:
+        _tracer = None
+        if profiler is not None:
+            profiler.disable()
+        tracer.report(targets, title, profiler)
+
+
+def dispatch_command(manager: IconManager, args: argparse.Namespace, parser: argparse.ArgumentParser):
+    """Run the manager method for one parsed command"""
     if args.command == "add":
         manager.add_icon(args.icon_id, args.semantic_name, args.tags,
                         args.category, args.description)
 
     elif args.command == "search":
-        results = manager.search(args.query)
-        if results:
-            print(f"\nFound {len(results)} icon(s) matching '{args.query}':")
+        query = " ".join(args.query)
+        if not query and args.size is None and args.min_size is None:
+            parser.error("search needs a query or --size/--min-size")
+        results = manager.search(query, args.limit, args.size, args.min_size)
+        described = f"'{query}'" if query else "size filter"
+        if args.size is not None:
+            described += f" at {args.size}px"
+        if args.min_size is not None:
+            described += f" at {args.min_size}px or larger"
+        if args.names:
+            for icon in results:
+                print(icon['semanticName'])
+        elif results:
+            print(f"\nFound {len(results)} icon(s) matching {described}:")
             for icon in results:
                 tags = ", ".join(icon.get("tags", []))
                 print(f"  {icon['semanticName']:20} #{icon['id']:4}  [{icon['category']}]  Tags: {tags}")
         else:
-            print(f"No icons found matching '{args.query}'")
+            print(f"No icons found matching {described}")
 
     elif args.command == "list":
+        manager.load_categories([args.category])
         manager.list_category(args.category)
 
     elif args.command == "export":
-        manager.export_to_project(args.project_path, args.icons)
+        manager.export_to_project(args.project_path, args.icons, args.link, args.size, args.markdown)
+
+    elif args.command == "similar":
+        results = manager.similar(args.name, args.limit, args.max_distance)
+        if results is None:
+            print(f"✗ Icon '{args.name}' not found")
+        elif args.names:
+            for _, icon in results:
+                print(icon['semanticName'])
+        elif results:
+            print(f"\nIcons that look like '{args.name}':")
+            for distance, icon in results:
+                print(f"  {icon['semanticName']:20} #{icon['id']:4}  [{icon['category']}]  {distance} bit(s) apart")
+        else:
+            print(f"No similar icons found for '{args.name}'")
 
     elif args.command == "stats":
-        manager.stats()
+        manager.stats(as_json=args.json)
 
     elif args.command == "import-csv":
-        manager.bulk_import(args.csv_file)
+        if args.chunk_size < 1:
+            parser.error("--chunk-size must be at least 1")
+        manager.bulk_import(args.csv_file, args.strict, args.chunk_size)
 
     elif args.command == "generate-csv":
-        manager.generate_csv_from_filenames(args.output_file, args.limit)
+        if args.neighbors < 1:
+            parser.error("--neighbors must be at least 1")
+        manager.generate_csv_from_filenames(args.output_file, args.limit, args.visual, args.neighbors)
+
+    elif args.command == "classify":
+        manager.classify_csv(args.csv_file, args.output, args.dry_run)
 
     elif args.command == "create-template":
         manager.create_template(args.name, args.tags, args.category)
 
     elif args.command == "apply-template":
+        import csv
+
         # Load CSV and apply template
         icon_specs = []
         with open(args.csv_file, 'r', encoding='utf-8') as f:
@@ -822,7 +4310,23 @@ def main():
         manager.apply_template(args.template, icon_specs)
 
     elif args.command == "validate":
-        manager.validate()
+        if not manager.validate(args.incremental, args.json, args.baseline):
+            sys.exit(1)
+
+    elif args.command == "scan-images":
+        manager.scan_images(args.force)
+
+    elif args.command == "sprite":
+        if not args.icons and not args.category:
+            parser.error("sprite needs icon names or --category")
+        manager.sprite(args.output_dir, args.icons, args.category, args.name, args.prefix,
+                       args.max_size, args.padding)
+
+    elif args.command == "optimize":
+        manager.optimize(args.dry_run)
+
+    elif args.command == "dedupe":
+        manager.dedupe(args.distance, not args.exact, args.collapse)
 
     elif args.command == "info":
         manager.info(args.semantic_name)
@@ -831,16 +4335,62 @@ def main():
         manager.recent(args.limit)
 
     elif args.command == "export-category":
-        manager.export_category(args.project_path, args.category)
+        manager.load_categories([args.category])
+        manager.export_category(args.project_path, args.category, args.link, args.size)
+
+    elif args.command == "md":
+        cwd = Path.cwd()
+        project = Path(args.project).resolve() if args.project else project_root(cwd)
+        for name in args.names:
+            print(markdown_snippet(name, project, cwd))
 
     elif args.command == "history":
-        manager.show_history(args.project_path)
+        manager.show_history(args.project_path, args.icons)
 
     elif args.command == "popular":
         manager.show_popular(args.limit)
 
+    elif args.command == "db-import":
+        manager.db_import(args.json_file)
+
+    elif args.command == "db-export":
+        manager.db_export(args.json_file)
+
+    elif args.command == "shard-import":
+        manager.shard_import(args.json_file)
+
+    elif args.command == "shard-export":
+        manager.shard_export(args.json_file)
+
     else:
         parser.print_help()
 
+
+def main(argv: Optional[List[str]] = None):
+    entered = time.perf_counter()
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    parsed = time.perf_counter()
+
+    if args.command == "serve":
+        socket_path = Path(args.socket)
+        if args.stop or args.status:
+            reply = daemon_request(socket_path, ["serve", "--stop" if args.stop else "--status"])
+            if reply is None:
+                print(f"No daemon running on {socket_path}")
+                sys.exit(1)
+            print(reply[0], end="")
+            return
+        IconDaemon(socket_path, parser).serve_forever()
+        return
+
+    with profiling(profile_targets(args), args.command or "help", entered, parsed):
+        manager = IconManager(args.store)
+        try:
+            run_command(manager, args, parser)
+        except CatalogConflictError as e:
+            print(f"✗ {e}")
+            sys.exit(1)
+
 if __name__ == "__main__":
     main()
@@ -1,48 +1,56 @@
 #!/usr/bin/env python3
+"""
+Re-categorize a generated CSV and trim generic " icon" descriptions
+
+Usage: improve_batch3.py INPUT.csv [OUTPUT.csv]
+       (default output: INPUT_improved.csv)
+"""
 import csv
+import sys
+from collections import Counter
+from pathlib import Path
+
+from classifier import default_classifier
 
-# Valid categories only
-VALID_CATEGORIES = {'files', 'network', 'security', 'tools', 'ui', 'emoji', 'development'}
 
-def improve_row(row):
+def improve_row(row, category):
     """Improve a single icon row"""
-    semantic = row['semantic'].lower()
-    
-    # Improve categorization
-    if any(x in semantic for x in ['doc', 'folder', 'page', 'file', 'book', 'pdf']):
-        row['category'] = 'files'
-    elif any(x in semantic for x in ['twitter', 'facebook', 'gmail', 'web', 'internet', 'mail', 'linkedin']):
-        row['category'] = 'network'
-    elif any(x in semantic for x in ['lock', 'key', 'secure', 'password', 'shield']):
-        row['category'] = 'security'
-    elif any(x in semantic for x in ['gear', 'hammer', 'wrench', 'settings', 'config', 'tool']):
-        row['category'] = 'tools'
-    elif any(x in semantic for x in ['code', 'develop', 'debug', 'compile', 'git', 'terminal']):
-        row['category'] = 'development'
-    elif any(x in semantic for x in ['smile', 'happy', 'sad', 'emoji', 'emotion', 'face']):
-        row['category'] = 'emoji'
-    else:
-        row['category'] = 'ui'
-    
+    row['category'] = category
+
     # Improve descriptions - remove "icon" suffix and make more descriptive
     if row['description'].endswith(' icon'):
         row['description'] = row['description'][:-5]
-    
+
     return row
 
-with open('batch3.csv', 'r', encoding='utf-8') as infile:
-    reader = csv.DictReader(infile)
-    rows = [improve_row(row) for row in reader]
 
-with open('batch3_improved.csv', 'w', encoding='utf-8', newline='') as outfile:
-    fieldnames = ['id', 'semantic', 'tags', 'category', 'description']
-    writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-    writer.writeheader()
-    writer.writerows(rows)
+def main():
+    if len(sys.argv) not in (2, 3):
+        print("Usage: improve_batch3.py INPUT.csv [OUTPUT.csv]")
+        sys.exit(2)
+    input_file = Path(sys.argv[1])
+    output_file = Path(sys.argv[2]) if len(sys.argv) == 3 else \
+        input_file.with_name(f"{input_file.stem}_improved.csv")
 
-from collections import Counter
-cat_dist = Counter(row['category'] for row in rows)
-print(f"Improved {len(rows)} icons -> batch3_improved.csv")
-print("\nCategory distribution:")
-for cat, count in sorted(cat_dist.items()):
-    print(f"  {cat}: {count}")
+    with open(input_file, 'r', encoding='utf-8', newline='') as infile:
+        rows = list(csv.DictReader(infile))
+
+    # One pass over the shared keyword automaton for the whole file
+    categories = default_classifier().classify_many(row['semantic'] for row in rows)
+    rows = [improve_row(row, category) for row, category in zip(rows, categories)]
+
+    with open(output_file, 'w', encoding='utf-8', newline='') as outfile:
+        fieldnames = ['id', 'semantic', 'tags', 'category', 'description']
+        writer = csv.DictWriter(outfile, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    cat_dist = Counter(row['category'] for row in rows)
+    print(f"Improved {len(rows)} icons -> {output_file}")
+    print("\nCategory distribution:")
+    for cat, count in sorted(cat_dist.items()):
+        print(f"  {cat}: {count}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,38 +1,43 @@
 #!/usr/bin/env python3
 """
-Quick script to improve icon metadata in bulk for batch2.csv
+Quick script to improve icon metadata in bulk for a generated CSV
+
+Usage: improve_metadata.py INPUT.csv [OUTPUT.csv]
+       (default output: INPUT_improved.csv)
 """
 
 import csv
 import re
+import sys
+from pathlib import Path
+
+from classifier import Classifier
+
+# Shared keyword table; rows without a keyword match keep their category
+classifier = Classifier(default=None)
 
-# Category mapping patterns
-category_patterns = {
-    'tools': ['camera', 'canon', 'powerbook', 'powermac', 'ipod', 'nano', 'scanner', 'printer', 'screwdriver', 'ruler', 'pen-tool', 'paint', 'editor', 'player', 'browser'],
-    'network': ['network', 'rss', 'reddit', 'pinterest', 'safari', 'opera'],
-    'emoji': ['owl', 'piggy', 'peace', 'smile', 'poo', 'pirate', 'pets'],
-    'files': ['file', 'folder', 'document', 'book', 'picture', 'image', 'save'],
-    'security': ['safe', 'no-entry'],
-    'development': ['pixel', 'rgb'],
-}
 
-def improve_row(row):
-    """Improve a single row of icon metadata"""
-    icon_id, semantic, tags, category, description = row
+def clean_semantic(semantic):
+    """Lowercase, hyphenated semantic name without parentheses"""
+    semantic_clean = semantic.lower().replace(' ', '-').replace('_', '-')
+    return re.sub(r'[()]', '', semantic_clean)
+
+
+def improve_row(row, category=None):
+    """Improve a single row of icon metadata
+
+    Args:
+        row: [id, semantic, tags, category, description]
+        category: Category from the classifier (None keeps the row's own)
+    """
+    icon_id, semantic, tags, original_category, description = row
 
     # Skip header
     if icon_id == 'id':
         return row
 
-    # Clean up semantic name
-    semantic_clean = semantic.lower().replace(' ', '-').replace('_', '-')
-    semantic_clean = re.sub(r'[()]', '', semantic_clean)
-
-    # Improve category based on semantic name
-    for cat, patterns in category_patterns.items():
-        if any(pattern in semantic_clean for pattern in patterns):
-            category = cat
-            break
+    semantic_clean = clean_semantic(semantic)
+    category = category or original_category
 
     # Add more descriptive tags based on semantic name
     tag_list = [t.strip() for t in tags.split(',') if t.strip()]
@@ -67,16 +72,19 @@ def improve_row(row):
     return [icon_id, semantic_clean, tags_clean, category, description]
 
 def main():
-    input_file = '/home/zack/dev/iconics/batch2.csv'
-    output_file = '/home/zack/dev/iconics/batch2_improved.csv'
-
-    rows = []
-    with open(input_file, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        for row in reader:
-            if len(row) == 5:
-                improved = improve_row(row)
-                rows.append(improved)
+    if len(sys.argv) not in (2, 3):
+        print("Usage: improve_metadata.py INPUT.csv [OUTPUT.csv]")
+        sys.exit(2)
+    input_file = Path(sys.argv[1])
+    output_file = Path(sys.argv[2]) if len(sys.argv) == 3 else \
+        input_file.with_name(f"{input_file.stem}_improved.csv")
+
+    with open(input_file, 'r', encoding='utf-8', newline='') as f:
+        rows = [row for row in csv.reader(f) if len(row) == 5]
+
+    # Classify every row in one pass over the shared keyword automaton
+    categories = classifier.classify_many(clean_semantic(row[1]) for row in rows)
+    rows = [improve_row(row, category) for row, category in zip(rows, categories)]
 
     with open(output_file, 'w', encoding='utf-8', newline='') as f:
         writer = csv.writer(f)
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Minimal PNG reading and writing for Iconics
+
+Decodes icons from raw/ into 8-bit RGBA pixels and encodes RGBA back to
+PNG using only the standard library (zlib), so image features work without
+Pillow. Handles every non-interlaced color type and bit depth.
+
+The file-level functions at the end are what icon-manager.py runs on its
+process pools; they live here so worker processes can import them under
+any multiprocessing start method.
+"""
+
+import math
+import os
+import struct
+import zlib
+from itertools import accumulate
+from operator import add, sub
+from typing import Optional, Tuple
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+CHUNK_HEADER = struct.Struct(">I4s")
+IHDR = struct.Struct(">IIBBBBB")
+
+# Samples per pixel for each PNG color type
+CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+_byte = (0xFF).__and__  # wrap sums to a byte without a Python-level loop
+
+
+class PNGError(ValueError):
+    """Raised for files this module can't decode"""
+
+
+def read_chunks(data: bytes):
+    """Yield (type, body) for each chunk of a PNG file"""
+    if data[:8] != PNG_SIGNATURE:
+        raise PNGError("not a PNG file")
+    offset = 8
+    while offset + 8 <= len(data):
+        length, chunk_type = CHUNK_HEADER.unpack_from(data, offset)
+        body = data[offset + 8:offset + 8 + length]
+        if len(body) != length:
+            raise PNGError("truncated chunk")
+        yield chunk_type, body
+        offset += 12 + length
+        if chunk_type == b"IEND":
+            break
+
+
+def unfilter(raw: bytes, height: int, stride: int, bpp: int) -> bytearray:
+    """Undo PNG scanline filtering, returning the concatenated scanlines"""
+    out = bytearray(height * stride)
+    prev = bytearray(stride)
+    pos = 0
+    for y in range(height):
+        kind = raw[pos]
+        row = bytearray(raw[pos + 1:pos + 1 + stride])
+        pos += 1 + stride
+        # Sub and Up (most rows in practice) run as C-level map/accumulate
+        if kind == 1:
+            for channel in range(bpp):
+                row[channel::bpp] = bytes(map(_byte, accumulate(row[channel::bpp])))
+        elif kind == 2:
+            row = bytearray(map(_byte, map(add, row, prev)))
+        elif kind == 3:
+            for i in range(stride):
+                left = row[i - bpp] if i >= bpp else 0
+                row[i] = (row[i] + ((left + prev[i]) >> 1)) & 0xFF
+        elif kind == 4:
+            # Paeth predictor, inlined: this loop dominates decode time
+            for i in range(min(bpp, stride)):
+                row[i] = (row[i] + prev[i]) & 0xFF
+            for i in range(bpp, stride):
+                a = row[i - bpp]
+                b = prev[i]
+                c = prev[i - bpp]
+                pa = b - c
+                pb = a - c
+                pc = pa + pb
+                if pa < 0:
+                    pa = -pa
+                if pb < 0:
+                    pb = -pb
+                if pc < 0:
+                    pc = -pc
+                if pa <= pb and pa <= pc:
+                    row[i] = (row[i] + a) & 0xFF
+                elif pb <= pc:
+                    row[i] = (row[i] + b) & 0xFF
+                else:
+                    row[i] = (row[i] + c) & 0xFF
+        elif kind != 0:
+            raise PNGError(f"bad filter type {kind}")
+        out[y * stride:(y + 1) * stride] = row
+        prev = row
+    return out
+
+
+def _unpack_samples(rows: bytearray, width: int, height: int, stride: int,
+                    bit_depth: int, channels: int) -> list:
+    """Expand packed scanlines into one int per sample"""
+    if bit_depth == 8:
+        return rows
+    samples = []
+    count = width * channels
+    if bit_depth == 16:
+        for y in range(height):
+            row = rows[y * stride:(y + 1) * stride]
+            samples.extend(row[0::2][:count])
+        return samples
+    mask = (1 << bit_depth) - 1
+    for y in range(height):
+        row = rows[y * stride:(y + 1) * stride]
+        line = []
+        for byte in row:
+            for shift in range(8 - bit_depth, -1, -bit_depth):
+                line.append((byte >> shift) & mask)
+        samples.extend(line[:count])
+    return samples
+
+
+def decode(data: bytes) -> Tuple[int, int, bytearray]:
+    """Decode PNG data to (width, height, RGBA bytes)
+
+    16-bit samples are reduced to 8 bits; low bit depths are scaled up
+    to the full 0-255 range (except palette indices).
+    """
+    header = None
+    palette = b""
+    transparency = None
+    idat = []
+    for chunk_type, body in read_chunks(data):
+        if chunk_type == b"IHDR":
+            header = IHDR.unpack(body)
+        elif chunk_type == b"PLTE":
+            palette = body
+        elif chunk_type == b"tRNS":
+            transparency = body
+        elif chunk_type == b"IDAT":
+            idat.append(body)
+    if header is None:
+        raise PNGError("missing IHDR")
+
+    width, height, bit_depth, color_type, _, _, interlace = header
+    if interlace:
+        raise PNGError("interlaced PNGs are not supported")
+    if color_type not in CHANNELS:
+        raise PNGError(f"bad color type {color_type}")
+
+    channels = CHANNELS[color_type]
+    bits_per_pixel = bit_depth * channels
+    stride = (width * bits_per_pixel + 7) // 8
+    bpp = max(1, bits_per_pixel // 8)
+    try:
+        raw = zlib.decompress(b"".join(idat))
+    except zlib.error as e:
+        raise PNGError(f"corrupt image data: {e}") from e
+    if len(raw) < height * (stride + 1):
+        raise PNGError("truncated image data")
+
+    rows = unfilter(raw, height, stride, bpp)
+    samples = _unpack_samples(rows, width, height, stride, bit_depth, channels)
+
+    pixels = bytearray(width * height * 4)
+    if color_type == 6:
+        pixels[:] = samples
+    elif color_type == 2:
+        key = struct.unpack(">HHH", transparency) if transparency and len(transparency) == 6 else None
+        pixels[3::4] = b"\xff" * (width * height)
+        for i in range(3):
+            pixels[i::4] = bytes(samples[i::3])
+        if key is not None and bit_depth == 8:
+            for p in range(width * height):
+                if tuple(samples[p * 3:p * 3 + 3]) == key:
+                    pixels[p * 4 + 3] = 0
+    elif color_type == 3:
+        alpha = transparency or b""
+        lut = []
+        for index in range(256):
+            rgb = palette[index * 3:index * 3 + 3] or b"\0\0\0"
+            lut.append(bytes(rgb) + bytes([alpha[index] if index < len(alpha) else 255]))
+        pixels[:] = b"".join(lut[s] for s in samples)
+    else:
+        scale = 255 // ((1 << min(bit_depth, 8)) - 1)
+        grays = bytes(s * scale for s in samples[::channels])
+        for i in range(3):
+            pixels[i::4] = grays
+        if color_type == 4:
+            pixels[3::4] = bytes(samples[1::2])
+        else:
+            pixels[3::4] = b"\xff" * (width * height)
+            if transparency and len(transparency) == 2:
+                key = struct.unpack(">H", transparency)[0]
+                for p, s in enumerate(samples):
+                    if s == key:
+                        pixels[p * 4 + 3] = 0
+    return width, height, pixels
+
+
+def chunk(chunk_type: bytes, body: bytes) -> bytes:
+    """Serialize one PNG chunk with its length and CRC"""
+    return (CHUNK_HEADER.pack(len(body), chunk_type) + body +
+            struct.pack(">I", zlib.crc32(chunk_type + body) & 0xFFFFFFFF))
+
+
+def encode(width: int, height: int, pixels: bytes, level: int = 9) -> bytes:
+    """Encode RGBA bytes as an 8-bit RGBA PNG (filter type 0 on every row)"""
+    stride = width * 4
+    raw = b"".join(b"\0" + bytes(pixels[y * stride:(y + 1) * stride]) for y in range(height))
+    return (PNG_SIGNATURE +
+            chunk(b"IHDR", IHDR.pack(width, height, 8, 6, 0, 0, 0)) +
+            chunk(b"IDAT", zlib.compress(raw, level)) +
+            chunk(b"IEND", b""))
+
+
+def difference_hash(width: int, height: int, pixels: bytes, size: int = 8) -> int:
+    """64-bit perceptual hash (dHash) of RGBA pixels
+
+    The image is composited onto white, reduced to a (size+1) x size
+    grayscale thumbnail by box averaging, and each bit records whether a
+    cell is brighter than its right-hand neighbour. Visually similar icons
+    (including the same artwork at different sizes) get hashes a small
+    Hamming distance apart.
+    """
+    cols, rows = size + 1, size
+    red, green, blue, alpha = (pixels[i::4] for i in range(4))
+    # Luma composited over white, scaled by 255 * 1000 to stay in integers
+    gray = [(r * 299 + g * 587 + b * 114) * a + 255000 * (255 - a)
+            for r, g, b, a in zip(red, green, blue, alpha)]
+
+    spans = [(x * width // cols, max((x + 1) * width // cols, x * width // cols + 1)) for x in range(cols)]
+    cells = [0] * (cols * rows)
+    counts = [0] * (cols * rows)
+    for y in range(height):
+        cell_row = (y * rows // height) * cols
+        offset = y * width
+        for x, (start, end) in enumerate(spans):
+            cells[cell_row + x] += sum(gray[offset + start:offset + end])
+            counts[cell_row + x] += end - start
+    cells = [c / n if n else 0 for c, n in zip(cells, counts)]
+
+    value = 0
+    for y in range(rows):
+        for x in range(size):
+            value = (value << 1) | (cells[y * cols + x] > cells[y * cols + x + 1])
+    return value
+
+
+def _lanczos(x: float, a: int = 3) -> float:
+    if x == 0:
+        return 1.0
+    if -a < x < a:
+        px = math.pi * x
+        return a * math.sin(px) * math.sin(px / a) / (px * px)
+    return 0.0
+
+
+def _resample_weights(src: int, dst: int, a: int = 3) -> list:
+    """Per output index: (first source index, normalized Lanczos weights)
+
+    When shrinking, the kernel is stretched by the scale factor so every
+    source pixel contributes (antialiasing), as in Pillow's resampler.
+    """
+    scale = src / dst
+    support = a * max(scale, 1.0)
+    stretch = max(scale, 1.0)
+    weights = []
+    for i in range(dst):
+        center = (i + 0.5) * scale
+        start = max(0, int(center - support + 0.5))
+        stop = min(src, int(center + support + 0.5))
+        taps = [_lanczos((j + 0.5 - center) / stretch, a) for j in range(start, stop)]
+        total = sum(taps) or 1.0
+        weights.append((start, [t / total for t in taps]))
+    return weights
+
+
+def resize(width: int, height: int, pixels: bytes, new_width: int, new_height: int) -> bytearray:
+    """Resample RGBA pixels with a Lanczos-3 filter
+
+    Color is weighted by alpha (premultiplied) during filtering so
+    transparent pixels don't bleed dark fringes into the edges.
+    """
+    # Premultiplied float planes, one list per row
+    rows = []
+    for y in range(height):
+        row = pixels[y * width * 4:(y + 1) * width * 4]
+        alpha = row[3::4]
+        rows.append([[c * a / 255 for c, a in zip(row[i::4], alpha)] for i in range(3)] + [list(alpha)])
+
+    # Horizontal pass: height x new_width
+    x_weights = _resample_weights(width, new_width)
+    horizontal = []
+    for planes in rows:
+        out = []
+        for plane in planes:
+            out.append([sum(w * v for w, v in zip(taps, plane[start:start + len(taps)]))
+                        for start, taps in x_weights])
+        horizontal.append(out)
+
+    # Vertical pass, then un-premultiply and clamp
+    y_weights = _resample_weights(height, new_height)
+    result = bytearray(new_width * new_height * 4)
+    for y, (start, taps) in enumerate(y_weights):
+        source_rows = horizontal[start:start + len(taps)]
+        planes = []
+        for i in range(4):
+            columns = [r[i] for r in source_rows]
+            planes.append([sum(w * col[x] for w, col in zip(taps, columns)) for x in range(new_width)])
+        offset = y * new_width * 4
+        for x in range(new_width):
+            a = min(255.0, max(0.0, planes[3][x]))
+            if a > 0:
+                for i in range(3):
+                    result[offset + i] = min(255, max(0, round(planes[i][x] * 255 / a)))
+            result[offset + 3] = round(a)
+            offset += 4
+    return result
+
+
+# Chunks optimize() keeps: the critical ones plus tRNS, which carries transparency
+KEEP_CHUNKS = (b"IHDR", b"PLTE", b"tRNS")
+# Maps a filtered byte to its magnitude as a signed value, for the adaptive filter cost
+_SIGNED_MAGNITUDE = bytes(b if b < 128 else 256 - b for b in range(256))
+
+
+def filter_row(kind: int, row: bytes, prev: bytes, bpp: int) -> bytes:
+    """Apply one PNG filter type to a scanline (inverse of unfilter)"""
+    if kind == 0:
+        return bytes(row)
+    left = bytes(bpp) + bytes(row[:-bpp])
+    if kind == 1:
+        return bytes(map(_byte, map(sub, row, left)))
+    if kind == 2:
+        return bytes(map(_byte, map(sub, row, prev)))
+    if kind == 3:
+        return bytes((x - ((a + b) >> 1)) & 0xFF for x, a, b in zip(row, left, prev))
+    upper_left = bytes(bpp) + bytes(prev[:-bpp])
+    out = bytearray(len(row))
+    for i, (x, a, b, c) in enumerate(zip(row, left, prev, upper_left)):
+        pa = b - c
+        pb = a - c
+        pc = pa + pb
+        if pa < 0:
+            pa = -pa
+        if pb < 0:
+            pb = -pb
+        if pc < 0:
+            pc = -pc
+        if pa <= pb and pa <= pc:
+            out[i] = (x - a) & 0xFF
+        elif pb <= pc:
+            out[i] = (x - b) & 0xFF
+        else:
+            out[i] = (x - c) & 0xFF
+    return bytes(out)
+
+
+def _filtered_variants(rows: bytes, height: int, stride: int, bpp: int) -> dict:
+    """Filtered image data with no filtering and with the adaptive choice
+
+    The adaptive variant picks, per row, the filter with the smallest sum
+    of absolute signed bytes (the heuristic libpng uses). Between them
+    these two nearly always compress best: on this library, trying the
+    other fixed filters as well saved ~0.1% more for 3x the time.
+    """
+    unfiltered = []
+    adaptive = []
+    prev = bytes(stride)
+    for y in range(height):
+        row = rows[y * stride:(y + 1) * stride]
+        best = None
+        for kind in range(5):
+            filtered = filter_row(kind, row, prev, bpp)
+            cost = sum(filtered.translate(_SIGNED_MAGNITUDE))
+            if best is None or cost < best[0]:
+                best = (cost, kind, filtered)
+        unfiltered.append(b"\0" + row)
+        adaptive.append(bytes([best[1]]) + best[2])
+        prev = row
+    return {"none": b"".join(unfiltered), "adaptive": b"".join(adaptive)}
+
+
+def optimize(data: bytes) -> bytes:
+    """Losslessly recompress a PNG, returning the smaller of the result and data
+
+    Keeps the pixel data, color type and bit depth unchanged. Tries no
+    filtering and the adaptive per-row filter choice, each with zlib
+    level 9 and the default and filtered strategies, and drops ancillary
+    chunks other than tRNS (text, timestamps, color profiles, pHYs).
+    Interlaced images are returned unchanged.
+    """
+    header = None
+    kept = []
+    idat = []
+    for chunk_type, body in read_chunks(data):
+        if chunk_type == b"IHDR":
+            header = IHDR.unpack(body)
+        if chunk_type in KEEP_CHUNKS:
+            kept.append(chunk(chunk_type, body))
+        elif chunk_type == b"IDAT":
+            idat.append(body)
+    if header is None:
+        raise PNGError("missing IHDR")
+
+    width, height, bit_depth, color_type, _, _, interlace = header
+    if interlace or color_type not in CHANNELS:
+        return data
+    bits_per_pixel = bit_depth * CHANNELS[color_type]
+    stride = (width * bits_per_pixel + 7) // 8
+    bpp = max(1, bits_per_pixel // 8)
+    try:
+        raw = zlib.decompress(b"".join(idat))
+    except zlib.error as e:
+        raise PNGError(f"corrupt image data: {e}") from e
+    rows = bytes(unfilter(raw, height, stride, bpp))
+
+    best = None
+    for filtered in _filtered_variants(rows, height, stride, bpp).values():
+        for strategy in (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED):
+            compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+            compressed = compressor.compress(filtered) + compressor.flush()
+            if best is None or len(compressed) < len(best):
+                best = compressed
+
+    result = PNG_SIGNATURE + b"".join(kept) + chunk(b"IDAT", best) + chunk(b"IEND", b"")
+    return result if len(result) < len(data) else data
+
+
+def _replace_file(path: str, data: bytes):
+    """Write data to a temp file next to path and rename it over path
+
+    The new file keeps the permissions of the one it replaces.
+    """
+    try:
+        perms = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        perms = 0o666  # less the umask
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, perms)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def perceptual_hash(path: str) -> Optional[str]:
+    """Hex dHash of an image file, or None if it can't be decoded"""
+    try:
+        with open(path, 'rb') as f:
+            width, height, pixels = decode(f.read())
+    except (OSError, PNGError):
+        return None
+    return f"{difference_hash(width, height, pixels):016x}"
+
+
+def optimize_file(path: str, dry_run: bool = False) -> Optional[Tuple[int, int]]:
+    """Losslessly recompress a PNG in place (see optimize)
+
+    The file is only replaced when the result is smaller.
+
+    Returns:
+        (bytes before, bytes after), or None if the file can't be decoded
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        optimized = optimize(data)
+    except PNGError:
+        return None
+    if len(optimized) < len(data) and not dry_run:
+        _replace_file(path, optimized)
+    return len(data), len(optimized)
+
+
+def resize_file(source: str, target: str, width: int, height: int) -> Optional[str]:
+    """Write source resized to width x height as target (see resize)
+
+    Returns target, or None if the source can't be read or decoded.
+    """
+    try:
+        with open(source, 'rb') as f:
+            src_width, src_height, pixels = decode(f.read())
+    except (OSError, ValueError):
+        return None
+    _replace_file(target, encode(width, height, resize(src_width, src_height, pixels, width, height)))
+    return target
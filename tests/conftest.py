@@ -0,0 +1,91 @@
+"""Shared fixtures: icon-manager.py loaded against a throwaway library"""
+
+import importlib.util
+import json
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))  # pngtools, tracing
+
+ICONS = [
+    {"id": "1", "semanticName": "lock", "tags": ["security"], "category": "security",
+     "description": "Closed padlock"},
+    {"id": "2", "semanticName": "lock-open", "tags": ["security"], "category": "security",
+     "description": "Open padlock"},
+    {"id": "3", "semanticName": "door", "tags": ["lock", "home"], "category": "ui",
+     "description": "Front door"},
+    {"id": "4", "semanticName": "key", "tags": ["access"], "category": "security",
+     "description": "Opens a lock"},
+    {"id": "5", "semanticName": "clock", "tags": ["time"], "category": "ui",
+     "description": "Wall clock"},
+    {"id": "6", "semanticName": "folder", "tags": ["files"], "category": "files",
+     "description": "Closed folder"},
+]
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    """A small catalog in tmp_path, with ICONICS_DIR pointing at it"""
+    catalog = {"version": "1.0", "categories": ["files", "security", "ui"],
+               "icons": [{**icon, "filename": f"raw/{icon['id']}.png", "usedIn": []} for icon in ICONS]}
+    (tmp_path / "raw").mkdir()
+    (tmp_path / "catalog").mkdir()
+    (tmp_path / "icon-catalog.json").write_text(json.dumps(catalog, indent=2))
+    monkeypatch.setenv("ICONICS_DIR", str(tmp_path))
+    monkeypatch.delenv("ICONICS_STORE", raising=False)
+    return tmp_path
+
+
+@pytest.fixture
+def im(library, monkeypatch):
+    """The icon-manager module, imported fresh so its paths point at the library"""
+    spec = importlib.util.spec_from_file_location("icon_manager", REPO_DIR / "icon-manager.py")
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, "icon_manager", module)  # as icon-launcher.py registers it
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def write_png(library):
+    """Write a random RGBA PNG under the library: write_png("raw/1.png", size, seed, level)
+
+    level is the zlib level; the default 0 leaves room for optimize.
+    Returns the file's path.
+    """
+    import pngtools
+
+    def write(filename, size=16, seed=0, level=0):
+        rng = random.Random(seed)
+        pixels = bytes(rng.randrange(4) * 85 for _ in range(size * size * 4))
+        path = library / filename
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(pngtools.encode(size, size, pixels, level))
+        return path
+
+    return write
+
+
+@pytest.fixture
+def edit_in_place(library):
+    """Rewrite icon-catalog.json as another process would, keeping its size and mtime
+
+    edit_in_place(old, new) replaces text of the same length and renames
+    the result over the catalog, so only the inode tells the versions apart.
+    """
+    def edit(old, new):
+        assert len(old) == len(new)
+        path = library / "icon-catalog.json"
+        st = path.stat()
+        tmp = library / "icon-catalog.json.tmp"
+        tmp.write_text(path.read_text().replace(old, new))
+        os.replace(tmp, path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        assert (path.stat().st_size, path.stat().st_mtime_ns) == (st.st_size, st.st_mtime_ns)
+
+    return edit
@@ -0,0 +1,63 @@
+"""classifier.py: keyword categories and the classify command"""
+
+import csv
+import re
+
+import pytest
+
+from classifier import CATEGORY_KEYWORDS, Classifier, default_classifier, trie_pattern
+
+
+@pytest.mark.parametrize("name,category", [
+    ("file-folder", "files"),
+    ("Lock_Key", "security"),
+    ("powerbook", "tools"),  # longest keyword wins over "book"
+    ("file-lock", "files"),  # tie: the category listed first
+    ("lock-key-file", "security"),
+    ("zzz", "ui"),
+])
+def test_classify(name, category):
+    assert default_classifier().classify(name) == category
+
+
+def test_classify_many_matches_classify():
+    names = ["lo", "ck", "folder", "", "Smile Face", "web-server", "git_bug"]
+    classifier = default_classifier()
+    assert classifier.classify_many(names) == [classifier.classify(name) for name in names]
+    assert classifier.classify_many(names)[:2] == ["ui", "ui"]  # keywords don't span names
+
+
+def test_classifier_without_default():
+    classifier = Classifier({"a": ["alpha"], "b": ["beta"]}, default=None)
+    assert classifier.classify_many(["alpha-beta-beta", "gamma"]) == ["b", None]
+
+
+def test_trie_pattern_matches_exactly_the_words():
+    words = [word for words in CATEGORY_KEYWORDS.values() for word in words]
+    pattern = re.compile(trie_pattern(words))
+    assert all(pattern.fullmatch(word) for word in words)
+    assert not pattern.fullmatch("fil") and not pattern.fullmatch("locks")
+    assert pattern.match("powerbook").group() == "powerbook"
+
+
+def write_rows(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["id", "semantic", "category"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_classify_csv(im, library, capsys):
+    path = library / "batch.csv"
+    write_rows(path, [{"id": "1", "semantic": "padlock", "category": "ui"},
+                      {"id": "2", "semantic": "", "category": "ui"},
+                      {"id": "folder-3", "semantic": "", "category": "ui"}])
+    before = path.read_bytes()
+
+    im.IconManager().classify_csv(str(path), dry_run=True)
+    assert "3 row(s), 2 would change" in capsys.readouterr().out
+    assert path.read_bytes() == before
+
+    im.IconManager().classify_csv(str(path))
+    with open(path, newline="") as f:
+        assert [row["category"] for row in csv.DictReader(f)] == ["security", "ui", "files"]
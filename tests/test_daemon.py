@@ -0,0 +1,47 @@
+"""IconDaemon: warm managers that follow changes to their store"""
+
+import pytest
+
+
+@pytest.fixture
+def daemon(im, library):
+    return im.IconDaemon(library / ".icon-daemon.sock", im.build_parser())
+
+
+def run(daemon, library, *argv):
+    output, status = daemon.handle(str(library), list(argv))
+    assert status == 0, output
+    return output
+
+
+def test_search_keeps_manager_warm(daemon, library):
+    assert "lock-open" in run(daemon, library, "search", "lock")
+    manager = daemon.managers["json"]
+    run(daemon, library, "search", "clock")
+    assert daemon.managers["json"] is manager
+
+
+def test_own_writes_keep_manager(daemon, library):
+    run(daemon, library, "search", "lock")
+    manager = daemon.managers["json"]
+    run(daemon, library, "add", "7", "shield", "--tags", "security", "--category", "security")
+    run(daemon, library, "search", "shield")
+    assert daemon.managers["json"] is manager
+    assert manager.find_icon_by_id("7")["semanticName"] == "shield"
+
+
+@pytest.mark.parametrize("store", ["json", "sqlite", "sharded"])
+def test_picks_up_other_writers(im, daemon, library, store):
+    run(daemon, library, "--store", store, "search", "lock")
+    other = im.IconManager(store)
+    with other.locked():
+        other.add_icon("7", "shield", ["security"], "security")
+    run(daemon, library, "--store", store, "search", "shield")
+    assert daemon.managers[store].find_icon_by_id("7")["semanticName"] == "shield"
+
+
+def test_reloads_after_same_size_rewrite(daemon, library, edit_in_place):
+    assert "folder" in run(daemon, library, "search", "folder")
+    edit_in_place('"folder"', '"binder"')
+    run(daemon, library, "search", "binder")
+    assert daemon.managers["json"].find_icon_by_id("6")["semanticName"] == "binder"
@@ -0,0 +1,53 @@
+"""Resized derivatives: size specs, sibling reuse and the .derivative-cache"""
+
+import pngtools
+
+
+def test_target_dimensions(im):
+    assert im.target_dimensions("24", 48, 32) == (24, 16)
+    assert im.target_dimensions("2x", 48, 32) == (96, 64)
+    assert im.target_dimensions("1", 48, 2) == (1, 1)
+
+
+def test_resize_keeps_flat_color():
+    pixels = bytes([200, 40, 10, 255]) * (8 * 8)
+    assert bytes(pngtools.resize(8, 8, pixels, 3, 5)) == bytes([200, 40, 10, 255]) * (3 * 5)
+
+
+def test_derive_renders_once(im, library, write_png, capsys):
+    write_png("raw/1.png", size=32)
+    manager = im.IconManager()
+    lock = manager.find_icon_by_id("1")
+
+    [path] = manager.derive([lock], "24")
+    assert path.parent == library / ".derivative-cache"
+    width, height, _ = pngtools.decode(path.read_bytes())
+    assert (width, height) == (24, 24)
+    assert "Resizing 1 icon(s)" in capsys.readouterr().out
+
+    written = path.stat().st_mtime_ns
+    assert manager.derive([lock], "24") == [path]
+    assert path.stat().st_mtime_ns == written
+    assert "Resizing" not in capsys.readouterr().out
+
+
+def test_derive_uses_exact_sibling(im, library, write_png):
+    write_png("raw/1.png", size=32)
+    write_png("raw/7.png", size=16, seed=7)
+    manager = im.IconManager()
+    manager.add_icon("7", "lock-16x16", ["security"], "security")
+    assert manager.derive([manager.find_icon_by_id("1")], "16") == [library / "raw/7.png"]
+
+
+def test_derive_reports_unusable_sources(im, library, write_png, capsys):
+    write_png("raw/1.png", size=32)
+    (library / "raw/2.png").write_bytes(b"\x89PNG\r\n\x1a\n" + b"garbage")
+    manager = im.IconManager()
+    lock, lock_open, door = (manager.find_icon_by_id(i) for i in "123")
+    assert manager.derive([lock_open, door], "16") == [None, None]  # undecodable, missing
+
+    manager.export_icons(str(library / "project"), [lock, lock_open, door], size="16")
+    out = capsys.readouterr().out
+    assert "✓ Exported lock-16px.png" in out
+    assert "Could not resize 'lock-open' to 16: raw/2.png is not a readable PNG" in out
+    assert "Source file missing for 'door': raw/3.png" in out
@@ -0,0 +1,30 @@
+"""Exporting icons into a project's .github/assets/icons"""
+
+import pytest
+
+
+@pytest.mark.parametrize("link,status", [("copy", "copied"), ("hard", "linked")])
+def test_export_places_files(im, library, write_png, capsys, link, status):
+    source = write_png("raw/1.png")
+    project = library / "project"
+    manager = im.IconManager()
+    catalog_bytes = (library / "icon-catalog.json").read_bytes()
+
+    manager.export_to_project(str(project), ["lock"], link)
+    target = project / ".github" / "assets" / "icons" / "lock.png"
+    assert target.read_bytes() == source.read_bytes()
+    assert (target.stat().st_ino == source.stat().st_ino) == (link == "hard")
+    assert f"Exported lock.png ({status})" in capsys.readouterr().out
+
+    manager.export_to_project(str(project), ["lock"], link)
+    assert "lock.png already up to date" in capsys.readouterr().out
+    assert (library / "icon-catalog.json").read_bytes() == catalog_bytes  # usage goes to the log
+
+
+def test_export_reports_missing_source(im, library, capsys):
+    manager = im.IconManager()
+    icon = {"id": "9", "semanticName": "ghost"}  # no filename: raw/<id>.png is assumed
+    manager.export_icons(str(library / "project"), [icon])
+    out = capsys.readouterr().out
+    assert "Source file missing for 'ghost': raw/9.png" in out
+    assert not (library / ".icon-usage.log").exists()
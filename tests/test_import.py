@@ -0,0 +1,51 @@
+"""import-csv: chunked streaming import"""
+
+HEADER = "id,semantic,tags,category,description\n"
+
+
+def names(icons):
+    return [icon["semanticName"] for icon in icons]
+
+
+def write_csv(library, rows):
+    path = library / "import.csv"
+    path.write_text(HEADER + "".join(f"{row}\n" for row in rows))
+    return str(path)
+
+
+def test_import_saves_once_per_chunk(im, library, monkeypatch):
+    rows = [f"n{i},new-{i},\"a,b\",ui,Row {i}" for i in range(5)]
+    rows += ["n1,dup-in-file,x,ui,", "1,dup-in-catalog,x,ui,", "n9,bad,x,nonsense,"]
+    manager = im.IconManager()
+    saves = []
+    save = manager.save_catalog
+    monkeypatch.setattr(manager, "save_catalog", lambda **kw: (saves.append(kw), save(**kw)))
+
+    manager.bulk_import(write_csv(library, rows), chunk_size=2)
+
+    assert len(saves) == 3
+    ids = [icon["id"] for icon in im.IconManager().catalog["icons"]]
+    assert ids[-5:] == [f"n{i}" for i in range(5)]
+    assert ids.count("n1") == 1 and "n9" not in ids
+
+
+def test_import_scans_images_and_keeps_stats(im, library, write_png):
+    write_png("raw/n0.png", size=24)
+    manager = im.IconManager()
+    manager.stats()  # writes the summary the import then updates
+    manager.bulk_import(write_csv(library, ["n0,new-0,a,ui,", "n1,new-1,a,ui,"]), chunk_size=1)
+    assert (library / ".icon-stats.json").exists()  # updated, not dropped
+
+    assert names(im.IconManager().search("", size=24)) == ["new-0"]
+    assert "image" not in im.IconManager().find_icon_by_id("n1")  # no file
+    kept = im.IconManager()._current_stats()
+    (library / ".icon-stats.json").unlink()
+    assert {k: v for k, v in im.IconManager()._current_stats().items() if k != "stamp"} == \
+        {k: v for k, v in kept.items() if k != "stamp"}
+    assert kept["icons"] == 8
+
+
+def test_strict_import_rolls_back(im, library):
+    before = (library / "icon-catalog.json").read_bytes()
+    im.IconManager().bulk_import(write_csv(library, ["n0,new-0,a,ui,", "n1,bad,a,nonsense,"]), strict=True)
+    assert (library / "icon-catalog.json").read_bytes() == before
@@ -0,0 +1,36 @@
+"""icon-launcher.py: icon_manager loaded by path, pools under every start method"""
+
+import multiprocessing
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+START_METHODS = [m for m in ("fork", "spawn", "forkserver") if m in multiprocessing.get_all_start_methods()]
+
+
+def test_launcher_runs_commands(library):
+    result = subprocess.run([sys.executable, str(REPO_DIR / "icon-launcher.py"), "search", "lock", "--names"],
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.split()[0] == "lock"
+
+
+@pytest.mark.parametrize("method", START_METHODS)
+def test_pool_workers_import_under_start_method(im, write_png, monkeypatch, method):
+    monkeypatch.delitem(sys.modules, "icon_manager")  # workers can't import it by name
+    write_png("raw/1.png", seed=1)
+    write_png("raw/2.png", seed=2)
+    previous = multiprocessing.get_start_method(allow_none=True)
+    multiprocessing.set_start_method(method, force=True)
+    try:
+        manager = im.IconManager()
+        manager.optimize()
+        results = manager.similar("lock")
+    finally:
+        multiprocessing.set_start_method(previous, force=True)
+
+    assert manager.find_icon_by_id("1")["image"]["optimized"]
+    assert [icon["id"] for _, icon in results] == ["2"]
@@ -0,0 +1,66 @@
+"""Catalog locking, atomic replacement and conflict detection"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+
+@pytest.mark.parametrize("store", ["json", "sqlite"])
+def test_concurrent_save_conflicts(im, store):
+    first = im.IconManager(store)
+    second = im.IconManager(store)
+    first.catalog, second.catalog  # both load the same version
+
+    first.add_icon("7", "shield", ["security"], "security")
+    with pytest.raises(im.CatalogConflictError):
+        second.add_icon("8", "badge", ["security"], "security")
+
+    third = im.IconManager(store)
+    third.catalog
+    first.add_icon("9", "star", ["ui"], "ui")
+    with third.locked():  # reloads the catalog first
+        third.add_icon("8", "badge", ["security"], "security")
+
+    ids = [icon["id"] for icon in im.IconManager(store).catalog["icons"]]
+    assert ids[-3:] == ["7", "9", "8"]
+
+
+def test_parallel_adds_all_land(library):
+    script = str(REPO_DIR / "icon-manager.py")
+    runs = [subprocess.Popen([sys.executable, script, "add", str(i), f"icon-{i}",
+                              "--tags", "ui", "--category", "ui"],
+                             stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+            for i in range(10, 18)]
+    for run in runs:
+        output, _ = run.communicate()
+        assert run.returncode == 0, output
+
+    catalog = json.loads((library / "icon-catalog.json").read_text())
+    ids = {icon["id"] for icon in catalog["icons"]}
+    assert ids >= {str(i) for i in range(10, 18)}
+
+
+def test_atomic_write_keeps_permissions(im, library):
+    path = library / "icon-catalog.json"
+    os.chmod(path, 0o640)
+    with im.atomic_write(path) as f:
+        f.write("{}")
+    assert path.read_text() == "{}"
+    assert path.stat().st_mode & 0o777 == 0o640
+
+
+def test_atomic_write_failure_leaves_file(im, library):
+    path = library / "icon-catalog.json"
+    before = path.read_bytes()
+    with pytest.raises(RuntimeError):
+        with im.atomic_write(path) as f:
+            f.write("partial")
+            raise RuntimeError
+    assert path.read_bytes() == before
+    assert not list(library.glob(".icon-catalog.json.*.tmp"))
@@ -0,0 +1,26 @@
+"""optimize: lossless recompression of the library's PNGs"""
+
+import pngtools
+
+
+def test_optimize_shrinks_files_and_records_result(im, library, write_png):
+    path = write_png("raw/1.png")
+    pixels = pngtools.decode(path.read_bytes())
+    before = path.stat().st_size
+
+    im.IconManager().optimize()
+
+    assert path.stat().st_size < before
+    assert pngtools.decode(path.read_bytes()) == pixels
+    icon = im.IconManager().find_icon_by_id("1")
+    assert icon["image"]["optimized"]["before"] == before
+
+
+def test_optimize_dry_run_changes_nothing(im, library, write_png):
+    path = write_png("raw/1.png")
+    catalog = library / "icon-catalog.json"
+    files = {p: (p.stat().st_mtime_ns, p.read_bytes()) for p in (path, catalog)}
+
+    im.IconManager().optimize(dry_run=True)
+
+    assert {p: (p.stat().st_mtime_ns, p.read_bytes()) for p in files} == files
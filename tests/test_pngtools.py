@@ -0,0 +1,122 @@
+"""pngtools: decoding every color type and bit depth, encode and optimize"""
+
+import random
+import struct
+import zlib
+
+import pytest
+
+import pngtools
+
+WIDTH, HEIGHT = 5, 4  # odd width: low bit depths end rows mid-byte
+
+# (color type, bit depth) pairs PNG allows
+FORMATS = [(0, 1), (0, 2), (0, 4), (0, 8), (0, 16),
+           (2, 8), (2, 16),
+           (3, 1), (3, 2), (3, 4), (3, 8),
+           (4, 8), (4, 16),
+           (6, 8), (6, 16)]
+
+
+def pack_row(samples, bit_depth):
+    """Pack one scanline's samples MSB-first, as PNG stores them"""
+    if bit_depth == 16:
+        return b"".join(struct.pack(">H", s) for s in samples)
+    if bit_depth == 8:
+        return bytes(samples)
+    per_byte = 8 // bit_depth
+    out = bytearray()
+    for i in range(0, len(samples), per_byte):
+        byte = 0
+        for j, s in enumerate(samples[i:i + per_byte]):
+            byte |= s << (8 - bit_depth * (j + 1))
+        out.append(byte)
+    return bytes(out)
+
+
+def filtered(kind, row, prev, bpp):
+    """None, Sub or Up filtering, written independently of pngtools"""
+    if kind == 1:
+        return bytes((x - (row[i - bpp] if i >= bpp else 0)) & 0xFF for i, x in enumerate(row))
+    if kind == 2:
+        return bytes((x - p) & 0xFF for x, p in zip(row, prev))
+    return row
+
+
+def make_png(color_type, bit_depth, seed=0):
+    """A random WIDTHxHEIGHT PNG and the RGBA pixels it should decode to"""
+    rng = random.Random(seed)
+    channels = pngtools.CHANNELS[color_type]
+    top = (1 << bit_depth) - 1
+    chunks = [pngtools.chunk(b"IHDR", pngtools.IHDR.pack(WIDTH, HEIGHT, bit_depth, color_type, 0, 0, 0))]
+    palette = alpha = None
+    if color_type == 3:
+        palette = [tuple(rng.randrange(256) for _ in range(3)) for _ in range(top + 1)]
+        alpha = [rng.randrange(256) for _ in range(top + 1)]
+        chunks.append(pngtools.chunk(b"PLTE", bytes(v for rgb in palette for v in rgb)))
+        chunks.append(pngtools.chunk(b"tRNS", bytes(alpha)))
+
+    def to8(sample):
+        return sample >> 8 if bit_depth == 16 else sample * 255 // top
+
+    rows, expected = [], bytearray()
+    for _ in range(HEIGHT):
+        samples = [rng.randrange(top + 1) for _ in range(WIDTH * channels)]
+        rows.append(pack_row(samples, bit_depth))
+        for p in range(WIDTH):
+            px = samples[p * channels:(p + 1) * channels]
+            if color_type == 3:
+                expected += bytes(palette[px[0]]) + bytes([alpha[px[0]]])
+            elif color_type in (0, 4):
+                gray = to8(px[0])
+                expected += bytes([gray, gray, gray, to8(px[1]) if color_type == 4 else 255])
+            else:
+                expected += bytes(to8(s) for s in px) + (b"" if color_type == 6 else b"\xff")
+
+    bpp = max(1, bit_depth * channels // 8)
+    prev = bytes(len(rows[0]))
+    raw = bytearray()
+    for y, row in enumerate(rows):
+        kind = y % 3
+        raw += bytes([kind]) + filtered(kind, row, prev, bpp)
+        prev = row
+    chunks.append(pngtools.chunk(b"IDAT", zlib.compress(bytes(raw), 0)))
+    chunks.append(pngtools.chunk(b"tEXt", b"Comment\0" + b"x" * 200))
+    chunks.append(pngtools.chunk(b"IEND", b""))
+    return pngtools.PNG_SIGNATURE + b"".join(chunks), bytes(expected)
+
+
+@pytest.mark.parametrize("color_type,bit_depth", FORMATS)
+def test_decode_every_format(color_type, bit_depth):
+    data, expected = make_png(color_type, bit_depth)
+    width, height, pixels = pngtools.decode(data)
+    assert (width, height) == (WIDTH, HEIGHT)
+    assert bytes(pixels) == expected
+
+
+@pytest.mark.parametrize("color_type,bit_depth", FORMATS)
+def test_encode_round_trips(color_type, bit_depth):
+    width, height, pixels = pngtools.decode(make_png(color_type, bit_depth)[0])
+    assert pngtools.decode(pngtools.encode(width, height, pixels)) == (width, height, pixels)
+
+
+@pytest.mark.parametrize("color_type,bit_depth", FORMATS)
+def test_optimize_keeps_pixels_and_shrinks(color_type, bit_depth):
+    data, _ = make_png(color_type, bit_depth)
+    optimized = pngtools.optimize(data)
+    assert pngtools.decode(optimized) == pngtools.decode(data)
+    assert len(optimized) < len(data)  # stored IDAT and a tEXt chunk to drop
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_optimize_never_grows(seed):
+    width, height, pixels = pngtools.decode(make_png(6, 8, seed)[0])
+    once = pngtools.optimize(pngtools.encode(width, height, pixels))
+    twice = pngtools.optimize(once)
+    assert len(twice) <= len(once)
+    assert pngtools.decode(twice) == (width, height, pixels)
+
+
+def test_decode_rejects_garbage():
+    with pytest.raises(pngtools.PNGError):
+        pngtools.decode(b"not a png")
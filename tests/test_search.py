@@ -0,0 +1,24 @@
+"""IconManager.search: ranked multi-term search over the catalog"""
+
+
+def names(icons):
+    return [icon["semanticName"] for icon in icons]
+
+
+def test_search_rank_order(im):
+    manager = im.IconManager()
+    # Exact name, then name > tag > description matches, then substring-only
+    assert names(manager.search("lock")) == ["lock", "lock-open", "door", "key", "clock"]
+    assert names(manager.search("lock", limit=2)) == ["lock", "lock-open"]
+
+
+def test_search_prefix_and_typo(im):
+    manager = im.IconManager()
+    assert names(manager.search("fold")) == ["folder"]
+    assert names(manager.search("foldder")) == ["folder"]
+
+
+def test_search_ranks_icons_matching_more_words_first(im):
+    manager = im.IconManager()
+    assert names(manager.search("open padlock"))[0] == "lock-open"
+    assert manager.search("zebra") == []
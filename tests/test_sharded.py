@@ -0,0 +1,58 @@
+"""The sharded store: icon-catalog.d/ with one file per category"""
+
+import json
+
+import pytest
+
+
+def shard_stamps(library):
+    return {path.name: path.stat().st_ino for path in (library / "icon-catalog.d").glob("*.json")}
+
+
+def test_shards_round_trip_the_catalog(im, library):
+    original = json.loads((library / "icon-catalog.json").read_text())
+    im.IconManager().shard_import()
+    assert sorted(shard_stamps(library)) == ["_manifest.json", "files.json", "security.json", "ui.json"]
+    assert im.IconManager("sharded").catalog == original  # order across shards is kept
+
+    (library / "icon-catalog.json").unlink()
+    im.IconManager().shard_export()
+    assert json.loads((library / "icon-catalog.json").read_text()) == original
+
+
+def test_first_load_seeds_shards(im, library):
+    manager = im.IconManager("sharded")
+    assert [icon["id"] for icon in manager.catalog["icons"]] == ["1", "2", "3", "4", "5", "6"]
+    assert (library / "icon-catalog.d" / "_manifest.json").exists()
+
+
+def test_save_rewrites_only_changed_shards(im, library):
+    im.IconManager().shard_import()
+    before = shard_stamps(library)
+    im.IconManager("sharded").add_icon("7", "shield", ["security"], "security")
+    after = shard_stamps(library)
+    assert {name for name in after if after[name] != before[name]} == {"_manifest.json", "security.json"}
+    assert im.IconManager("sharded").find_icon_by_id("7")["semanticName"] == "shield"
+
+
+def test_unsafe_categories_share_a_shard(im, library):
+    store = im.ShardedCatalogStore(library / "icon-catalog.d")
+    catalog = {"version": "1.0", "icons": [{"id": "1", "category": "../escape"}, {"id": "2"},
+                                           {"id": "3", "category": "ui"}]}
+    store.replace_catalog(catalog)
+    assert sorted(shard_stamps(library)) == ["_manifest.json", "_other.json", "ui.json"]
+    assert store.load() == catalog
+
+    store.save({"version": "1.0", "icons": [{"id": "3", "category": "ui"}]})
+    assert sorted(shard_stamps(library)) == ["_manifest.json", "ui.json"]  # emptied shards go
+
+
+def test_load_categories_reads_only_their_shards(im, library):
+    im.IconManager().shard_import()
+    (library / "icon-catalog.d" / "ui.json").write_text("not json")  # would fail if read
+
+    manager = im.IconManager("sharded")
+    manager.load_categories(["security"])
+    assert [icon["id"] for icon in manager.catalog["icons"]] == ["1", "2", "4"]
+    with pytest.raises(RuntimeError):
+        manager.save_catalog()
@@ -0,0 +1,18 @@
+"""The marshal sidecar (.icon-catalog.cache) next to icon-catalog.json"""
+
+
+def test_sidecar_is_written_and_reused(im, library):
+    im.IconManager().catalog
+    cache = library / ".icon-catalog.cache"
+    assert cache.exists()
+    written = cache.stat().st_mtime_ns
+
+    manager = im.IconManager()
+    assert manager.find_icon_by_id("6")["semanticName"] == "folder"
+    assert cache.stat().st_mtime_ns == written  # read, not rebuilt
+
+
+def test_sidecar_ignored_after_same_size_rewrite(im, edit_in_place):
+    im.IconManager().catalog
+    edit_in_place('"folder"', '"binder"')
+    assert im.IconManager().find_icon_by_id("6")["semanticName"] == "binder"
@@ -0,0 +1,21 @@
+"""similar: perceptual-hash lookups, hashing icons lazily"""
+
+
+def test_add_leaves_hashing_to_similar(im, write_png):
+    write_png("raw/1.png", seed=1)
+    write_png("raw/2.png", seed=2)
+    manager = im.IconManager()
+    assert [icon["id"] for _, icon in manager.similar("lock")] == ["2"]  # builds the tree
+
+    write_png("raw/7.png", seed=7)
+    manager.add_icon("7", "shield", ["security"], "security")
+    assert "phash" not in manager.find_icon_by_id("7")["image"]
+
+    assert sorted(icon["id"] for _, icon in manager.similar("lock")) == ["2", "7"]
+    assert im.IconManager().find_icon_by_id("7")["image"]["phash"]  # saved once computed
+
+
+def test_similar_skips_icons_without_files(im, write_png):
+    write_png("raw/1.png")
+    assert im.IconManager().similar("lock") == []
+    assert im.IconManager().similar("no-such-icon") is None
@@ -0,0 +1,63 @@
+"""Sprite sheets: shelf packing, rendering and the .sprite-cache"""
+
+import json
+import random
+
+import pngtools
+
+
+def overlaps(a, b):
+    (ax, ay, aw, ah), (bx, by, bw, bh) = a, b
+    return ax < bx + bw and bx < ax + aw and ay < by + bh and by < ay + ah
+
+
+def test_pack_shelves_places_without_overlap(im):
+    rng = random.Random(0)
+    sizes = [(rng.randint(4, 40), rng.randint(4, 40)) for _ in range(60)]
+    placements, dimensions = im.pack_shelves(sizes, max_size=128, padding=1)
+    assert len(dimensions) > 1  # too much for one 128px sheet
+    for sheet, (width, height) in enumerate(dimensions):
+        rects = [(x, y, w + 1, h + 1) for (s, x, y), (w, h) in zip(placements, sizes) if s == sheet]
+        assert width <= 128 and height <= 128
+        assert all(x + w - 1 <= width and y + h - 1 <= height for x, y, w, h in rects)
+        assert not any(overlaps(a, b) for i, a in enumerate(rects) for b in rects[i + 1:])
+
+
+def test_sprite_writes_sheets_and_maps(im, library, write_png, capsys):
+    for icon_id, size in [("1", 16), ("2", 16), ("4", 16), ("5", 24)]:
+        write_png(f"raw/{icon_id}.png", size=size, seed=int(icon_id))
+    out = library / "sprites"
+    im.IconManager().sprite(str(out), ["lock", "lock-open", "key", "clock"])
+
+    maps = json.loads((out / "icons.json").read_text())
+    assert sorted(maps["sheets"]) == ["icons-16px.png", "icons-24px.png"]
+    css = (out / "icons.css").read_text()
+    sheets = {}
+    for name, icon_id in [("lock", "1"), ("lock-open", "2"), ("key", "4"), ("clock", "5")]:
+        entry = maps["icons"][name]
+        assert f".icon-{name} {{ background-image: url({entry['sheet']}); " \
+               f"background-position: {-entry['x']}px {-entry['y']}px;" in css
+        if entry["sheet"] not in sheets:
+            sheets[entry["sheet"]] = pngtools.decode((out / entry["sheet"]).read_bytes())
+        sheet_width, _, canvas = sheets[entry["sheet"]]
+        width, height, pixels = pngtools.decode((library / f"raw/{icon_id}.png").read_bytes())
+        for row in range(height):
+            start = ((entry["y"] + row) * sheet_width + entry["x"]) * 4
+            assert canvas[start:start + width * 4] == pixels[row * width * 4:(row + 1) * width * 4]
+    assert "Rendered 2, reused 0" in capsys.readouterr().out
+
+
+def test_sprite_cache_reuses_unchanged_sheets(im, library, write_png, capsys):
+    for icon_id, size in [("1", 16), ("2", 16), ("5", 24)]:
+        write_png(f"raw/{icon_id}.png", size=size, seed=int(icon_id))
+    out = library / "sprites"
+    im.IconManager().sprite(str(out), ["lock", "lock-open", "clock"])
+    capsys.readouterr()
+
+    im.IconManager().sprite(str(out), ["lock", "lock-open", "clock"])
+    assert "Rendered 0, reused 2" in capsys.readouterr().out
+
+    write_png("raw/1.png", seed=9)
+    im.IconManager().sprite(str(out), ["lock", "lock-open", "clock"])
+    assert "Rendered 1, reused 1" in capsys.readouterr().out
+    assert len(list((library / ".sprite-cache").glob("*.png"))) == 3
@@ -0,0 +1,58 @@
+"""stats: the cached single-pass summary in .icon-stats.json"""
+
+import json
+
+
+def stats_json(im, capsys):
+    im.IconManager().stats(as_json=True)
+    return json.loads(capsys.readouterr().out)
+
+
+def summary_matches_catalog(im):
+    saved = im.IconManager._read_stats()
+    fresh = im.IconManager()._compute_stats()
+    return {k: v for k, v in saved.items() if k not in ("stamp", "raw")} == fresh
+
+
+def test_stats_json(im, library, write_png, capsys):
+    for icon_id in "123":
+        write_png(f"raw/{icon_id}.png")
+    write_png("raw/extra.png")
+    figures = stats_json(im, capsys)
+    assert (figures["library"], figures["cataloged"], figures["uncataloged"]) == (4, 6, -2)
+    assert figures["categories"] == {
+        "files": {"count": 1, "samples": ["folder"]},
+        "security": {"count": 3, "samples": ["lock", "lock-open", "key"]},
+        "ui": {"count": 2, "samples": ["door", "clock"]},
+    }
+
+
+def test_stats_are_served_from_the_summary(im, library, capsys):
+    stats_json(im, capsys)
+    assert (library / ".icon-stats.json").exists()
+    manager = im.IconManager()
+    manager.stats(as_json=True)
+    assert "catalog" not in manager.__dict__
+
+
+def test_mutations_update_the_summary(im, library, capsys):
+    stats_json(im, capsys)
+    manager = im.IconManager()
+    manager.add_icon("7", "shield", ["security"], "security")
+    manager.add_icon("8", "star", ["ui"], "emoji")
+    manager.add_icon("3", "door", ["home"], "files")  # moves a listed icon
+    capsys.readouterr()
+    assert summary_matches_catalog(im)
+
+    figures = stats_json(im, capsys)
+    assert figures["cataloged"] == 8
+    assert figures["categories"]["files"] == {"count": 2, "samples": ["door", "folder"]}
+    assert figures["categories"]["emoji"]["samples"] == ["star"]
+
+
+def test_outside_edits_invalidate_the_summary(im, library, capsys, edit_in_place):
+    stats_json(im, capsys)
+    edit_in_place('"category": "files"', '"category": "tools"')
+    figures = stats_json(im, capsys)
+    assert "files" not in figures["categories"]
+    assert figures["categories"]["tools"]["count"] == 1
@@ -0,0 +1,69 @@
+"""Catalog stores: json, sharded and sqlite must behave alike"""
+
+import json
+
+import pytest
+
+STORES = ["json", "sharded", "sqlite"]
+QUERIES = ["lock", "older", "padlock", "lock open", "fold", "clo", "front door"]
+
+
+def names(icons):
+    return [icon["semanticName"] for icon in icons]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search_parity(im, query):
+    results = {store: names(im.IconManager(store).search(query)) for store in STORES}
+    expected = results["json"]
+    assert results["sharded"] == expected
+    assert set(results["sqlite"]) == set(expected)
+    assert results["sqlite"][:1] == expected[:1]  # exact semantic name first
+
+
+def test_sqlite_exact_name_first_and_substring_last(im):
+    manager = im.IconManager("sqlite")
+    manager.catalog  # seed icon-catalog.db
+    fresh = im.IconManager("sqlite")
+    assert names(fresh.search("lock"))[0] == "lock"
+    assert names(fresh.search("lock"))[-1] == "clock"  # substring-only match
+    assert names(fresh.search("older")) == ["folder"]
+    assert "catalog" not in fresh.__dict__
+
+
+def test_sqlite_answers_without_loading(im, capsys):
+    im.IconManager("sqlite").catalog  # seed icon-catalog.db from the JSON catalog
+    manager = im.IconManager("sqlite")
+
+    assert names(manager.search("padlock")) == ["lock", "lock-open"]
+    manager.info("door")
+    assert "Tags: lock, home" in capsys.readouterr().out
+    manager.add_icon("7", "shield", ["security"], "security")
+    assert "catalog" not in manager.__dict__
+
+    loaded = im.IconManager("sqlite")
+    assert loaded.find_icon_by_id("7")["semanticName"] == "shield"
+    assert names(loaded.catalog["icons"])[-1] == "shield"
+    assert "shield" in (im.ICON_DIR / ".icon-names").read_text().split()
+
+
+def test_sqlite_round_trips_the_catalog(im, library):
+    original = json.loads((library / "icon-catalog.json").read_text())
+    im.IconManager().db_import()
+    assert im.IconManager("sqlite").catalog == original
+
+    im.IconManager("sqlite").add_icon("7", "shield", ["security"], "security", "Crest")
+    im.IconManager().db_export(str(library / "exported.json"))
+    exported = json.loads((library / "exported.json").read_text())
+    assert exported["icons"][:6] == original["icons"]
+    assert exported["icons"][6]["semanticName"] == "shield"
+    assert {k: v for k, v in exported.items() if k != "icons"} == \
+           {k: v for k, v in original.items() if k != "icons"}
+
+
+@pytest.mark.parametrize("store", STORES)
+def test_updates_replace_in_place(im, store):
+    im.IconManager(store).add_icon("3", "door", ["entry"], "ui", "Back door")
+    icons = im.IconManager(store).catalog["icons"]
+    assert [icon["id"] for icon in icons] == ["1", "2", "3", "4", "5", "6"]
+    assert icons[2]["tags"] == ["entry"] and icons[2]["description"] == "Back door"
@@ -0,0 +1,67 @@
+"""The append-only usage log and its compacted history/analytics files"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_exports_are_appended_not_rewritten(im, library):
+    manager = im.IconManager()
+    manager.track_usage(str(library / "app"), ["lock", "key"])
+    manager.track_usage(str(library / "site"), ["lock"])
+    manager.track_usage(str(library / "app"), ["clock"])
+
+    assert len((library / ".icon-usage.log").read_text().splitlines()) == 3
+    assert not (library / ".icon-history.json").exists()
+    assert manager.get_project_history(str(library / "app"))["icons"] == ["clock"]
+    assert manager.get_popular_icons(1) == [("lock", {"count": 2, "projects": ["app", "site"]})]
+
+
+def test_compaction_keeps_every_event(im, library, monkeypatch):
+    monkeypatch.setattr(im, "USAGE_COMPACT_BYTES", 300)
+    manager = im.IconManager()
+    for i in range(10):
+        manager.track_usage(str(library / f"project-{i % 3}"), ["lock"])
+
+    assert (library / ".icon-usage.log").stat().st_size <= 300
+    assert (library / ".icon-analytics.json").exists()
+    assert manager.get_popular_icons()[0][1]["count"] == 10
+
+    manager.usage.compact()
+    assert (library / ".icon-usage.log").stat().st_size == 0
+    assert json.loads((library / ".icon-analytics.json").read_text())["lock"]["count"] == 10
+
+
+def test_torn_lines_are_skipped(im, library):
+    manager = im.IconManager()
+    manager.track_usage(str(library / "app"), ["lock"])
+    with open(library / ".icon-usage.log", "a") as log:
+        log.write('{"timestamp": "2026-')  # a write cut short
+    manager.track_usage(str(library / "app"), ["key"])
+    assert [name for name, _ in manager.get_popular_icons()] == ["lock", "key"]
+
+
+def test_concurrent_appends(im, library, monkeypatch):
+    monkeypatch.setattr(im, "USAGE_COMPACT_BYTES", 2000)
+
+    def export(worker):
+        log = im.UsageLog()  # its own file handle, so flock serializes the threads
+        for _ in range(25):
+            log.append(library / f"project-{worker}", ["lock"])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(export, range(8)))
+    _, analytics = im.UsageLog().aggregates()
+    assert analytics["lock"]["count"] == 200
+    assert len(analytics["lock"]["projects"]) == 8
+
+
+def test_projects_using_merges_recorded_usage(im, library, capsys):
+    catalog = json.loads((library / "icon-catalog.json").read_text())
+    catalog["icons"][0]["usedIn"] = ["legacy"]
+    (library / "icon-catalog.json").write_text(json.dumps(catalog))
+    manager = im.IconManager()
+    manager.track_usage(str(library / "app"), ["lock"])
+    assert manager.get_projects_using()["lock"] == ["app", "legacy"]
+
+    manager.show_history(str(library / "app"), icons_only=True)
+    assert capsys.readouterr().out == "lock\n"
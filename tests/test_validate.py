@@ -0,0 +1,63 @@
+"""validate: issues from directory listings, --incremental and --baseline"""
+
+import json
+import os
+
+import pytest
+
+
+def report(im, capsys, **options):
+    ok = im.IconManager().validate(as_json=True, **options)
+    result = json.loads(capsys.readouterr().out)
+    assert result["ok"] == ok
+    return result
+
+
+def issue_paths(result):
+    return sorted(issue["path"] for issue in result["issues"])
+
+
+def test_validate_finds_missing_sources_and_broken_links(im, library, write_png, capsys):
+    for icon_id in "12345":
+        write_png(f"raw/{icon_id}.png")
+    (library / "catalog" / "ui").mkdir()
+    os.symlink("../../raw/5.png", library / "catalog" / "ui" / "clock.png")
+    os.symlink("../../raw/gone.png", library / "catalog" / "ui" / "gone.png")
+
+    result = report(im, capsys)
+    assert not result["ok"]
+    assert [issue["type"] for issue in result["issues"]] == ["missing-source", "broken-symlink"]
+    assert result["issues"][0]["path"] == "raw/6.png"
+    warned = {warning["semanticName"] for warning in result["warnings"]}
+    assert warned == {"lock", "lock-open", "door", "key", "folder"}  # clock's link is fine
+
+
+def test_incremental_rereads_changed_directories(im, library, write_png, capsys):
+    assert len(report(im, capsys)["issues"]) == 6
+    write_png("raw/1.png")
+    assert issue_paths(report(im, capsys, incremental=True)) == [f"raw/{i}.png" for i in "23456"]
+
+
+def test_baseline_fails_only_on_new_issues(im, library, capsys):
+    assert not report(im, capsys)["ok"]  # records the six missing sources
+
+    result = report(im, capsys, baseline=True)
+    assert result["ok"] and result["baseline"]
+    assert not any(issue["new"] for issue in result["issues"])
+
+    im.IconManager().add_icon("7", "shield", ["security"], "security")
+    capsys.readouterr()
+    for _ in range(2):  # --baseline leaves the record alone
+        result = report(im, capsys, baseline=True)
+        assert not result["ok"]
+        assert [issue["path"] for issue in result["issues"] if issue["new"]] == ["raw/7.png"]
+
+
+def test_baseline_exit_status(im, library, write_png):
+    with pytest.raises(SystemExit) as exit_info:
+        im.main(["validate", "--baseline"])  # nothing recorded: every issue is new
+    assert exit_info.value.code == 1
+
+    with pytest.raises(SystemExit):
+        im.main(["validate"])
+    im.main(["validate", "--baseline"])  # no new issues: returns normally
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Phase timing for icon-manager.py (--profile / ICONICS_TRACE)
+
+A Tracer records named, nested phases with their wall time and the I/O
+the process did meanwhile (bytes and read/write syscalls from
+/proc/self/io, where available). Call sites attach their own figures,
+such as catalog bytes loaded or saved, as phase arguments. The result is
+printed as a summary table or written as a Chrome trace (chrome://tracing,
+Perfetto); a cProfile dump can be taken alongside.
+
+Standard library only; icon-manager.py imports it only when profiling.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+IO_FIELDS = ("rchar", "wchar", "syscr", "syscw")
+SUMMARY_TARGETS = ("1", "summary", "-")
+TRACE_SUFFIX = ".json"  # other file targets get a cProfile dump
+
+_own_io = [0, 0]  # bytes and read calls spent reading /proc/self/io so far
+
+
+def read_io() -> Optional[Dict[str, int]]:
+    """This process's cumulative I/O counters, or None off Linux
+
+    rchar/wchar count bytes passed to read/write-like syscalls (page
+    cache hits included), syscr/syscw the number of those calls. The
+    reads of /proc/self/io made here are left out.
+    """
+    try:
+        fd = os.open("/proc/self/io", os.O_RDONLY)
+        try:
+            data = os.read(fd, 4096)
+        finally:
+            os.close(fd)
+    except OSError:
+        return None
+    counters = {}
+    for line in data.splitlines():
+        key, _, value = line.partition(b":")
+        counters[key.decode()] = int(value)
+    result = {field: counters.get(field, 0) for field in IO_FIELDS}
+    result["rchar"] -= _own_io[0]
+    result["syscr"] -= _own_io[1]
+    _own_io[0] += len(data)
+    _own_io[1] += 1
+    return result
+
+
+def process_start() -> Optional[float]:
+    """Wall-clock time (epoch seconds) this process was started, if known
+
+    Prefers ICONICS_START (set by the icon wrapper from $EPOCHREALTIME,
+    so the wrapper's own time is included) and falls back to the start
+    time in /proc, which has clock-tick (~10 ms) resolution.
+    """
+    try:
+        return float(os.environ["ICONICS_START"].replace(",", "."))
+    except (KeyError, ValueError):
+        pass
+    try:
+        with open("/proc/self/stat", "rb") as f:
+            # Fields after the parenthesised command name; starttime is field 22
+            start_ticks = int(f.read().rsplit(b")", 1)[1].split()[19])
+        with open("/proc/uptime", "rb") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return time.time() - (uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+
+
+def needs_profiler(targets: List[str]) -> bool:
+    """Whether any target is a cProfile dump (not a summary or Chrome trace)"""
+    return any(target not in SUMMARY_TARGETS and not target.endswith(TRACE_SUFFIX) for target in targets)
+
+
+def format_bytes(count: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(count) < 1024 or unit == "GB":
+            return f"{count} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+
+
+def format_ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f} ms"
+
+
+class Tracer:
+    """Records nested phases; see phase()
+
+    Phases are expected to be opened from the main thread; work fanned out
+    to pools is timed (and its I/O counted) by the phase around it.
+
+    Args:
+        started: Epoch time the process started (see process_start), to
+                 record start-up before the tracer existed as a phase
+    """
+
+    def __init__(self, started: Optional[float] = None):
+        self.origin = time.perf_counter()
+        self.events = []  # (path, start, end, io delta, args), in completion order
+        self._stack = []
+        self._io_available = read_io() is not None
+        if started is not None:
+            # perf_counter has no epoch; place the start on its timeline via the wall clock
+            self.started = self.origin - (time.time() - started)
+        else:
+            self.started = None
+
+    def add(self, name: str, start: float, end: float, **args):
+        """Record a phase measured elsewhere (perf_counter start and end)"""
+        self.events.append(((*self._stack, name), start, end, None, args))
+
+    @contextmanager
+    def phase(self, name: str, **args):
+        """Time the block as a phase nested under any open one
+
+        Yields the phase's argument dict, so the block can add figures
+        (e.g. bytes=...) found out while it runs.
+        """
+        path = (*self._stack, name)
+        self._stack.append(name)
+        io_start = read_io() if self._io_available else None
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            end = time.perf_counter()
+            io = None
+            if io_start is not None:
+                io_end = read_io()
+                io = {field: io_end[field] - io_start[field] for field in IO_FIELDS}
+            self._stack.pop()
+            self.events.append((path, start, end, io, args))
+
+    def summary(self, title: str = "") -> str:
+        """Phase table: total time, calls and I/O per phase path, in start order"""
+        rows = {}
+        for path, start, end, io, args in sorted(self.events, key=lambda event: event[1]):
+            row = rows.setdefault(path, {"calls": 0, "time": 0.0, "io": None, "bytes": 0})
+            row["calls"] += 1
+            row["time"] += end - start
+            row["bytes"] += args.get("bytes", 0)
+            if io is not None:
+                row["io"] = {field: (row["io"] or {}).get(field, 0) + io[field] for field in IO_FIELDS}
+
+        lines = [f"=== Profile{': ' + title if title else ''} ===",
+                 f"{'Phase':36} {'Time':>10} {'Calls':>6} {'Read':>10} {'Written':>10} "
+                 f"{'Syscalls':>10} {'Data':>10}"]
+        for path, row in rows.items():
+            name = "  " * (len(path) - 1) + path[-1]
+            io = row["io"]
+            read = format_bytes(io["rchar"]) if io else ""
+            written = format_bytes(io["wchar"]) if io else ""
+            calls = f"{io['syscr']}r/{io['syscw']}w" if io else ""
+            data = format_bytes(row["bytes"]) if row["bytes"] else ""
+            lines.append(f"{name[:36]:36} {format_ms(row['time']):>10} {row['calls']:>6} {read:>10} "
+                         f"{written:>10} {calls:>10} {data:>10}")
+
+        end = time.perf_counter()
+        total = end - (self.started if self.started is not None else self.origin)
+        lines.append(f"Total {format_ms(total)} "
+                     f"({'since process start' if self.started is not None else 'traced'})")
+        if not self._io_available:
+            lines.append("(I/O counters need /proc/self/io)")
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> Dict:
+        """The phases as Chrome trace-event JSON ("X" complete events, µs from process start)"""
+        base = self.started if self.started is not None else self.origin
+        pid, tid = os.getpid(), threading.get_ident()
+        events = []
+        for path, start, end, io, args in self.events:
+            event_args = dict(args)
+            if io is not None:
+                event_args.update(io)
+            events.append({"name": path[-1], "cat": "iconics", "ph": "X", "pid": pid, "tid": tid,
+                           "ts": round((start - base) * 1e6, 1), "dur": round((end - start) * 1e6, 1),
+                           "args": event_args})
+        events.sort(key=lambda event: (event["ts"], -event["dur"]))
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def report(self, targets: List[str], title: str = "", profiler=None):
+        """Write results to each target: summary (stderr), Chrome trace or cProfile dump"""
+        for target in targets:
+            if target in SUMMARY_TARGETS:
+                print(self.summary(title), file=sys.stderr)
+            elif target.endswith(TRACE_SUFFIX):
+                with open(target, "w") as f:
+                    json.dump(self.chrome_trace(), f)
+                print(f"✓ Trace written to {target} (open in chrome://tracing or ui.perfetto.dev)",
+                      file=sys.stderr)
+            elif profiler is not None:
+                profiler.dump_stats(target)
+                print(f"✓ cProfile stats written to {target} (python3 -m pstats {target})",
+                      file=sys.stderr)